@@ -1,13 +1,89 @@
+import importlib
+
 from ._base_api import DigisellerApi
 from ._exceptions import *
 
+# Вспомогательные классы импортируются при первом обращении: короткоживущим скриптам
+# нужен только DigisellerApi, а http.server, sqlite3, tracemalloc и т. п. загружаются по требованию
+_LAZY = {
+    "Recorder": "._cassette",
+    "load_cassette": "._cassette",
+    "ReplayServer": "._replay_server",
+    "HedgePolicy": "._hedging",
+    "CircuitBreaker": "._circuit_breaker",
+    "Deadline": "._timeouts",
+    "ImageCache": "._image_cache",
+    "NotificationReceiver": "._notifications",
+    "parse_notification": "._notifications",
+    "TemplateProductsSync": "._template_sync",
+    "OptionsReconciler": "._options_reconciler",
+    "PlanStep": "._options_reconciler",
+    "WriteBehindBatcher": "._write_behind",
+    "PriceQuoteCache": "._price_cache",
+    "LedgerSync": "._ledger",
+    "ReviewsCrawler": "._reviews",
+    "ProductPublisher": "._publisher",
+    "ProxyPool": "._proxy_pool",
+    "AgentOfferScanner": "._agent_offers",
+    "Outbox": "._outbox",
+    "MemoryProfiler": "._memory",
+    "measure_startup": "._startup",
+    "LoadCall": "._load",
+    "LoadReport": "._load",
+    "mixed_workload": "._load",
+    "run_load": "._load",
+}
+
+
+def __getattr__(name):
+    module = _LAZY.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY))
+
+
 __all__ = [
     "DigisellerApi",
     "DigisellerError",
     "DigisellerTimeoutError",
+    "DigisellerDeadlineExceededError",
     "DigisellerInvalidResponseError",
     "DigisellerHTTPError",
     "DigisellerUnavailableError",
     "DigisellerAPIAuthError",
-    "DigisellerProxyError"
+    "DigisellerProxyError",
+    "DigisellerConnectionError",
+    "DigisellerCircuitOpenError",
+    "Recorder",
+    "load_cassette",
+    "ReplayServer",
+    "LoadCall",
+    "LoadReport",
+    "mixed_workload",
+    "run_load",
+    "HedgePolicy",
+    "CircuitBreaker",
+    "Deadline",
+    "ImageCache",
+    "NotificationReceiver",
+    "parse_notification",
+    "TemplateProductsSync",
+    "OptionsReconciler",
+    "PlanStep",
+    "WriteBehindBatcher",
+    "PriceQuoteCache",
+    "LedgerSync",
+    "ReviewsCrawler",
+    "ProductPublisher",
+    "ProxyPool",
+    "AgentOfferScanner",
+    "Outbox",
+    "MemoryProfiler",
+    "measure_startup"
 ]
@@ -0,0 +1,154 @@
+import threading
+import time
+from concurrent.futures import Future
+
+from digiseller_api_python._concurrency import map_concurrent
+from digiseller_api_python._pagination import fetch_all_pages
+from digiseller_api_python._rate_limit import RateLimiter
+from digiseller_api_python._tracing import span
+
+# Поля предложения и ключи, под которыми они ищутся в ответе agents_offer
+OFFER_FIELDS = {
+    "product_id": ("productId", "product_id", "id"),
+    "name": ("productName", "product_name", "name", "title"),
+    "in_stock": ("inStock", "in_stock", "isInStock", "is_in_stock", "available"),
+    "individual": ("isIndividual", "individual", "is_individual", "onlyIndividual"),
+}
+
+
+def offer_field(offer: dict, field: str):
+    """Значение поля предложения (product_id, name, in_stock, individual) или None."""
+    for key in OFFER_FIELDS[field]:
+        if offer.get(key) is not None:
+            return offer[key]
+    return None
+
+
+def _text(value) -> str:
+    # Название может быть строкой, словарем локалей или списком {"locale", "value"}
+    if isinstance(value, dict):
+        return " ".join(_text(v) for v in value.values())
+    if isinstance(value, list):
+        return " ".join(_text(v) for v in value)
+    return "" if value is None else str(value)
+
+
+class AgentOfferScanner:
+    """
+    Параллельный обход предложений продавцов для агента (agents_offer) с кэшем и локальным поиском.
+
+    scan() загружает все страницы предложений продавцов параллельно, не превышая rate запросов в секунду,
+    и хранит предложения каждого продавца ttl секунд. search() отвечает на запросы по загруженным
+    предложениям (наличие, индивидуальность, название, ID товара), обращаясь к API только за устаревшими продавцами.
+
+    :param api: Экземпляр DigisellerApi
+    :param rate: Не более стольких запросов в секунду
+    :param burst: Сколько запросов можно отправить подряд без ожидания
+    :param ttl: Сколько секунд хранить предложения продавца
+    :param page_size: Размер страницы agents_offer
+    :param max_workers: Сколько продавцов обходить параллельно
+    """
+
+    def __init__(self, api, rate: float = 10, burst: int = None, ttl: float = 600, page_size: int = 100,
+                 max_workers: int = 8):
+        self.api = api
+        self.ttl = ttl
+        self.page_size = page_size
+        self.max_workers = max_workers
+        self.stats = {"hits": 0, "scans": 0, "pages": 0}
+        self._limiter = RateLimiter(rate, burst)
+        self._offers = {}     # seller_id -> (fetched_at, [offer])
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    def _fresh(self, fetched_at: float, now: float) -> bool:
+        return fetched_at + self.ttl > now
+
+    def _fetch_page(self, seller_id, page):
+        self._limiter.acquire()
+        with self._lock:
+            self.stats["pages"] += 1
+        return self.api.agents_offer(seller_id, None, None, None, None, page, self.page_size)
+
+    def _seller_offers(self, seller_id, refresh: bool) -> list:
+        with self._lock:
+            cached = self._offers.get(seller_id)
+            if cached is not None and not refresh and self._fresh(cached[0], time.monotonic()):
+                self.stats["hits"] += 1
+                return cached[1]
+            future = self._inflight.get(seller_id)
+            leader = future is None
+            if leader:
+                future = self._inflight[seller_id] = Future()
+                self.stats["scans"] += 1
+        if not leader:
+            return future.result()
+
+        try:
+            # Страницы одного продавца загружаются последовательно, параллельность - по продавцам
+            offers = fetch_all_pages(lambda page: self._fetch_page(seller_id, page), self.page_size, max_workers=1)
+            offers = [offer for offer in offers if isinstance(offer, dict)]
+        except BaseException as e:
+            with self._lock:
+                self._inflight.pop(seller_id, None)
+            future.set_exception(e)
+            raise
+        with self._lock:
+            self._inflight.pop(seller_id, None)
+            self._offers[seller_id] = (time.monotonic(), offers)
+        future.set_result(offers)
+        return offers
+
+    def scan(self, seller_ids, refresh: bool = False) -> dict:
+        """
+        Загружает предложения продавцов, которых нет в кэше или чьи данные устарели (refresh=True - всех).
+
+        :return: {seller_id: [предложения] или исключение загрузки}
+        """
+        seller_ids = list(dict.fromkeys(seller_ids))
+        with span(getattr(self.api, "tracer", None), "digiseller.agent_offers.scan",
+                  {"digiseller.sellers": len(seller_ids)}):
+            results = map_concurrent(lambda seller_id: self._seller_offers(seller_id, refresh), seller_ids,
+                                     max_workers=self.max_workers, return_exceptions=True)
+        return dict(zip(seller_ids, results))
+
+    def search(self, seller_ids=None, name: str = None, in_stock: bool = None, individual: bool = None,
+               product_id: int = None) -> list:
+        """
+        Предложения, подходящие под фильтры. Если переданы seller_ids, устаревшие продавцы загружаются заново
+        (ошибки загрузки пропускаются); иначе поиск идет по всем неустаревшим продавцам в кэше.
+
+        :param name: Подстрока названия без учета регистра
+        :return: [(seller_id, предложение)]
+        """
+        if seller_ids is not None:
+            sources = [(seller_id, offers) for seller_id, offers in self.scan(seller_ids).items()
+                       if not isinstance(offers, Exception)]
+        else:
+            now = time.monotonic()
+            with self._lock:
+                sources = [(seller_id, offers) for seller_id, (fetched_at, offers) in self._offers.items()
+                           if self._fresh(fetched_at, now)]
+
+        needle = name.casefold() if name else None
+        found = []
+        for seller_id, offers in sources:
+            for offer in offers:
+                if in_stock is not None and bool(offer_field(offer, "in_stock")) != in_stock:
+                    continue
+                if individual is not None and bool(offer_field(offer, "individual")) != individual:
+                    continue
+                if product_id is not None and str(offer_field(offer, "product_id")) != str(product_id):
+                    continue
+                if needle is not None and needle not in _text(offer_field(offer, "name")).casefold():
+                    continue
+                found.append((seller_id, offer))
+        return found
+
+    def invalidate(self, seller_id=None):
+        """Сбрасывает кэш продавца или весь кэш (seller_id=None)."""
+        with self._lock:
+            if seller_id is None:
+                self._offers.clear()
+            else:
+                self._offers.pop(seller_id, None)
@@ -1,30 +1,252 @@
 import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional
+from urllib.parse import urlsplit
 
-from digiseller_api_python._exceptions import DigisellerError, DigisellerInvalidResponseError
-from digiseller_api_python._request_handler import send_request
+from digiseller_api_python._exceptions import (
+    DigisellerError,
+    DigisellerInvalidResponseError,
+    DigisellerTimeoutError,
+    DigisellerDeadlineExceededError
+)
+from digiseller_api_python._batch import Batch, gather
+from digiseller_api_python._files import file_lock
+from digiseller_api_python._price_cache import edit_task_finished, edit_task_id
+from digiseller_api_python._request_handler import create_client, send_request, stream_request, _endpoint_template
+from digiseller_api_python._timeouts import Deadline, build_timeout, cap_timeout, check_timeout, current_deadline
+from digiseller_api_python._tracing import span, trace_public_methods
 
+logger = logging.getLogger(__name__)
+
+
+@trace_public_methods
 class DigisellerApi:
     URL = 'https://api.digiseller.ru/api/'
     TOKEN_LIFETIME = 6600  # Token lifetime in seconds
 
-    def __init__(self, seller_id: str, api_key: str, timeout: int = 60, proxy: str = None):
+    def __init__(self, seller_id: str, api_key: str, timeout=60, proxy: str = None,
+                 recorder=None, base_urls: dict = None, hedging=None, circuit_breaker=None,
+                 endpoint_timeouts: dict = None, image_cache=None, price_cache=None,
+                 tracer=None, max_connections: int = 100, batch_workers: int = 16, proxy_pool=None,
+                 token_cache: str = None):
+        """
+        :param timeout: Тайм-аут в секундах на каждую фазу запроса, httpx.Timeout
+            или словарь {"default", "connect", "read", "write", "pool"}
+        :param endpoint_timeouts: Переопределения тайм-аута по префиксу эндпоинта
+            (например {"product/preview/add": 300, "purchase/info": 5}); ключ "upload" - для любых загрузок файлов
+        :param tracer: Трассировщик в стиле OpenTelemetry (opentelemetry.trace.get_tracer(...)): спан на каждый
+            вызов метода с дочерними спанами обновления токена, HTTP-запроса (connect, send, receive) и разбора ответа
+        :param max_connections: Размер общего пула соединений
+        :param batch_workers: Количество потоков для batch() и gather()
+        :param proxy_pool: ProxyPool вместо одного proxy: запросы распределяются по прокси,
+            идемпотентные запросы после ошибки прокси повторяются через другой прокси
+        :param token_cache: Путь к JSON-файлу токенов: действующий токен, полученный другим процессом,
+            используется без запроса apilogin, новый токен сохраняется в файл (под блокировкой <путь>.lock).
+            Файл читается при первом вызове, конструктор не обращается ни к сети, ни к диску
+        """
         if not isinstance(seller_id, str) or not seller_id:
             raise DigisellerError("You must pass the correct 'seller_id'.")
         if not isinstance(api_key, str) or not api_key:
             raise DigisellerError("You must pass the correct 'api_key'.")
+        if proxy is not None and proxy_pool is not None:
+            raise DigisellerError("Pass either 'proxy' or 'proxy_pool', not both.")
 
         self.seller_id = int(seller_id)
         self.api_key = api_key
         self.timeout = timeout
+        self.endpoint_timeouts = endpoint_timeouts or {}
+        for value in (timeout, *self.endpoint_timeouts.values()):
+            check_timeout(value)
         self.proxy = proxy
+        self.proxy_pool = proxy_pool
+        self.recorder = recorder
+        self.base_urls = base_urls or {}
+        self.hedging = hedging
+        self.circuit_breaker = circuit_breaker
+        self.image_cache = image_cache
+        self.price_cache = price_cache
+        self.tracer = tracer
+        self.max_connections = max_connections
+        self.batch_workers = batch_workers
+        self.token_cache = token_cache
         self.token_expiration = 0
         self.token = None
+        self._token_cache_loaded = False
+        self._client = None
+        self._executor = None
+        self._lock = threading.Lock()
+        # Отдельная блокировка: обновление токена - сетевой запрос, а _lock берется при создании пула соединений
+        self._token_lock = threading.RLock()
+
+    def _http_client(self):
+        # Общий пул соединений создается при первом запросе
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = create_client(self.proxy, self.max_connections)
+        return self._client
+
+    def _batch_executor(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.batch_workers,
+                                                        thread_name_prefix="digiseller-batch")
+        return self._executor
+
+    def batch(self) -> Batch:
+        """
+        Пакет параллельных вызовов: методы пакета сразу возвращают Future.
 
-    def _send_request(self, method, url, **kwargs):
-        """Внутренний метод для отправки запросов с учетом настроек экземпляра класса."""
-        return send_request(method, url, timeout=self.timeout, proxy=self.proxy, **kwargs)
+            with api.batch() as batch:
+                futures = [batch.purchase_info(invoice_id) for invoice_id in invoice_ids]
+            purchases = batch.results()
+        """
+        return Batch(self, self._batch_executor())
+
+    def gather(self, calls, return_exceptions: bool = True) -> list:
+        """
+        Выполняет вызовы параллельно в общем пуле и возвращает результаты (или исключения) в исходном порядке:
+
+            api.gather([(api.purchase_info, 123), (api.purchase_info, 124), lambda: api.chat_status(...)])
+
+        :param calls: Функции без аргументов или кортежи (метод, *аргументы)
+        :param return_exceptions: Возвращать исключения на месте результатов, иначе пробрасывать первое по порядку
+        """
+        return gather(self._batch_executor(), calls, return_exceptions)
+
+    def close(self):
+        """
+        Закрывает пул соединений, пулы соединений proxy_pool (с остановкой его фоновой проверки)
+        и пул потоков batch()/gather(). Клиент можно использовать дальше.
+        """
+        with self._lock:
+            client, self._client = self._client, None
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+        if client is not None:
+            client.close()
+        if self.proxy_pool is not None:
+            self.proxy_pool.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _send_request(self, method, url, idempotent=False, **kwargs):
+        """
+        Внутренний метод для отправки запросов с учетом настроек экземпляра класса.
+
+        :param idempotent: Запрос только читает данные, его можно безопасно повторить (хеджирование)
+        """
+        def request():
+            deadline = current_deadline()
+            timeout = self._timeout_for(url, kwargs)
+            if deadline is not None:
+                timeout = cap_timeout(timeout, deadline.remaining())
+
+            def send(proxy, client):
+                return send_request(method, self._resolve_url(url), timeout=timeout, proxy=proxy,
+                                    recorder=self.recorder, tracer=self.tracer, client=client, logical_url=url,
+                                    endpoint=self._span_endpoint(url), **kwargs)
+            try:
+                if self.proxy_pool is None:
+                    return send(self.proxy, self._http_client())
+                return self.proxy_pool.call(send, retry=idempotent)
+            except DigisellerTimeoutError as e:
+                if deadline is not None and deadline.expired:
+                    raise DigisellerDeadlineExceededError("The deadline for the operation has been exceeded.") from e
+                raise
+
+        def call():
+            deadline = current_deadline()
+            if deadline is not None:
+                deadline.check()
+            if self.circuit_breaker is None:
+                return request()
+            return self.circuit_breaker.call(urlsplit(url).hostname, request)
+
+        if idempotent and self.hedging is not None:
+            return self.hedging.execute(_endpoint_template(urlsplit(url).path), call)
+        return call()
+
+    def _stream_request(self, method, url, item_key=None, **kwargs):
+        """Внутренний метод для потокового получения элементов списка (см. stream_request)."""
+        deadline = current_deadline()
+        if deadline is not None:
+            deadline.check()
+        timeout = self._timeout_for(url, kwargs)
+        if deadline is not None:
+            timeout = cap_timeout(timeout, deadline.remaining())
+        proxy, client = self.proxy_pool.pick() if self.proxy_pool is not None else (self.proxy, self._http_client())
+        items = stream_request(method, self._resolve_url(url), timeout=timeout, proxy=proxy,
+                               item_key=item_key, tracer=self.tracer, client=client,
+                               endpoint=self._span_endpoint(url), **kwargs)
+        if self.circuit_breaker is None:
+            return items
+        return self.circuit_breaker.guard_iter(urlsplit(url).hostname, items)
+
+    def _invalidate_prices(self, product_id=None):
+        # Сброс кэша расчетов цен после изменений, влияющих на цену (None - все товары)
+        if self.price_cache is not None:
+            self.price_cache.invalidate(product_id)
+
+    def _invalidate_edited_prices(self, data, response=None):
+        # Товары из тела product_edit_prices; если их не удалось определить - сбрасываются все расчеты.
+        # Цены меняются асинхронной задачей: до ее завершения расчеты этих товаров не кэшируются
+        if self.price_cache is None:
+            return
+        products = data.get("products") if isinstance(data, dict) else data
+        product_ids = [p.get("product_id") for p in products if isinstance(p, dict)] if isinstance(products, list) else []
+        if not product_ids or None in product_ids:
+            product_ids = None
+        task = edit_task_id(response)
+        if task is not None:
+            return self.price_cache.begin_edit(task, product_ids)
+        for product_id in product_ids or [None]:
+            self._invalidate_prices(product_id)
+
+    def _timeout_for(self, url, kwargs):
+        # Самое длинное совпадение префикса эндпоинта, затем "upload" для загрузок файлов
+        path = urlsplit(url).path.lstrip('/')
+        if path.startswith('api/'):
+            path = path[len('api/'):]
+        prefixes = [prefix for prefix in self.endpoint_timeouts if prefix != 'upload' and path.startswith(prefix)]
+        if prefixes:
+            return build_timeout(self.endpoint_timeouts[max(prefixes, key=len)])
+        if 'files' in kwargs and 'upload' in self.endpoint_timeouts:
+            return build_timeout(self.endpoint_timeouts['upload'])
+        return build_timeout(self.timeout)
+
+    def _span_endpoint(self, url):
+        # Шаблон эндпоинта (регулярное выражение на сегмент пути) вычисляется только при трассировке
+        return _endpoint_template(urlsplit(url).path) if self.tracer is not None else None
+
+    def _resolve_url(self, url):
+        # Подмена хостов Digiseller (например, на локальный ReplayServer)
+        for prefix, target in self.base_urls.items():
+            if url.startswith(prefix):
+                return target + url[len(prefix):]
+        return url
+
+    def deadline(self, seconds: float) -> Deadline:
+        """
+        Общий бюджет времени на несколько вызовов:
+
+            with api.deadline(300):
+                for page in range(1, 100):
+                    api.templates_list(page, 100)
+        """
+        return Deadline(seconds)
 
     def _token_response(self):
         current_time = int(time.time())
@@ -38,19 +260,75 @@ class DigisellerApi:
         response = self._send_request('POST', self.URL + 'apilogin', json=data)
         return response
 
+    def _load_cached_token(self):
+        # Токен, сохраненный предыдущим процессом, если он еще действует
+        self._token_cache_loaded = True
+        try:
+            with open(self.token_cache, "r", encoding="utf-8") as f:
+                entry = json.load(f).get(str(self.seller_id))
+        except (OSError, ValueError, AttributeError):
+            return
+        if isinstance(entry, dict) and entry.get("token") and int(time.time()) < entry.get("expires_at", 0):
+            self.token, self.token_expiration = entry["token"], entry["expires_at"]
+
+    def _save_cached_token(self):
+        # Кэш токена необязателен: любая ошибка записи не должна прерывать вызов
+        try:
+            with file_lock(self.token_cache + ".lock"):
+                self._write_cached_token()
+        except Exception:
+            logger.warning("Failed to save the Digiseller token to %s", self.token_cache, exc_info=True)
+
+    def _write_cached_token(self):
+        # Файл общий для продавцов и процессов: запись продавца обновляется под блокировкой файла,
+        # чтобы одновременные процессы не потеряли записи друг друга
+        try:
+            with open(self.token_cache, "r", encoding="utf-8") as f:
+                tokens = json.load(f)
+        except (OSError, ValueError):
+            tokens = {}
+        if not isinstance(tokens, dict):
+            tokens = {}
+        tokens[str(self.seller_id)] = {"token": self.token, "expires_at": self.token_expiration}
+        # mkstemp создает файл с правами 0600 - токен не виден другим пользователям
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(self.token_cache)), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(tokens, f)
+            os.replace(tmp, self.token_cache)
+        except BaseException:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            raise
+
     def _get_valid_token(self):
-        if not self.token or int(time.time()) >= self.token_expiration:
+        if self.token and int(time.time()) < self.token_expiration:
+            return self.token
+        with self._token_lock:
+            if self.token_cache is not None and not self._token_cache_loaded:
+                self._load_cached_token()
+            # Пока поток ждал блокировку, токен мог обновить другой поток (batch()/gather())
+            if self.token and int(time.time()) < self.token_expiration:
+                return self.token
             return self.get_token()
-        return self.token
 
     # Получение токена для api.digiseller.ru
     # Getting the token for api.digiseller.ru
     def get_token(self):
+        with self._token_lock:
+            return self._refresh_token()
+
+    def _refresh_token(self):
         current_time = int(time.time())
-        token_validation = self._token_response()
+        with span(self.tracer, "digiseller.token_refresh"):
+            token_validation = self._token_response()
         if token_validation.get('retval') == 0 and token_validation.get('token'):
             self.token = token_validation['token']
             self.token_expiration = current_time + self.TOKEN_LIFETIME
+            if self.token_cache is not None:
+                self._save_cached_token()
             return self.token
         else:
             raise DigisellerInvalidResponseError(f"Error obtaining authorization token on the server: {token_validation.get('desc')}")
@@ -80,7 +358,7 @@ class DigisellerApi:
     def perms_token(self):
         params = {"token": self._get_valid_token()}
         endpoint = 'token/perms'
-        return self._send_request('GET', self.URL + endpoint, params=params)
+        return self._send_request('GET', self.URL + endpoint, params=params, idempotent=True)
 
     # Поиск и проверка платежа по уникальному коду
     # Search and verification of payments by a unique code
@@ -90,7 +368,7 @@ class DigisellerApi:
         """
         params = {"token": self._get_valid_token()}
         endpoint = f'purchases/unique-code/{unique_code}'
-        return self._send_request('GET', self.URL + endpoint, params=params)
+        return self._send_request('GET', self.URL + endpoint, params=params, idempotent=True)
 
     # Перевод статуса уникального кода в "товар доставлен"
     # Change the status of the unique code to "goods delivered"
@@ -107,7 +385,7 @@ class DigisellerApi:
     def purchase_info(self, invoice_id):
         params = {"token": self._get_valid_token()}
         endpoint = f'purchase/info/{invoice_id}'
-        return self._send_request('GET', self.URL + endpoint, params=params)
+        return self._send_request('GET', self.URL + endpoint, params=params, idempotent=True)
 
     # Список последних продаж
     # List of latest sales
@@ -119,7 +397,19 @@ class DigisellerApi:
             "top": top
         }
         endpoint = 'seller-last-sales'
-        return self._send_request('GET', self.URL + endpoint, params=params)
+        return self._send_request('GET', self.URL + endpoint, params=params, idempotent=True)
+
+    # Список последних продаж (потоково, по мере получения ответа)
+    # List of latest sales (streamed as the response arrives)
+    def iter_seller_last_sales(self, group=True, top=1000):
+        params = {
+            "token": self._get_valid_token(),
+            "seller_id": self.seller_id,
+            "group": group,
+            "top": top
+        }
+        endpoint = 'seller-last-sales'
+        return self._stream_request('GET', self.URL + endpoint, params=params)
 
     # Статистика продаж
     # Sales statistics
@@ -134,7 +424,7 @@ class DigisellerApi:
             "rows": rows
         }
         endpoint = 'seller-sells/v2'
-        return self._send_request('POST', self.URL + endpoint, params=params, json=data)
+        return self._send_request('POST', self.URL + endpoint, params=params, json=data, idempotent=True)
 
     # Статистика продаж в роли агента
     # Sales statistics as an agent
@@ -149,7 +439,7 @@ class DigisellerApi:
             "rows": rows
         }
         endpoint = 'agent-sales/v2'
-        return self._send_request('POST', self.URL + endpoint, params=params, json=data)
+        return self._send_request('POST', self.URL + endpoint, params=params, json=data, idempotent=True)
 
     # Список категорий (каталог)
     # The list of categories (catalog)
@@ -160,7 +450,7 @@ class DigisellerApi:
             "lang": lang
         }
         endpoint = f'categories'
-        return self._send_request('GET', self.URL + endpoint, params=params)
+        return self._send_request('GET', self.URL + endpoint, params=params, idempotent=True)
 
     # Список товаров из категории
     # The list of products from the category
@@ -175,7 +465,7 @@ class DigisellerApi:
             "lang": lang
         }
         endpoint = f'shop/products'
-        return self._send_request('GET', self.URL + endpoint, params=params)
+        return self._send_request('GET', self.URL + endpoint, params=params, idempotent=True)
 
     # Быстрое получение описаний товаров по списку ID
     # Quickly get product descriptions from ID list
@@ -187,7 +477,7 @@ class DigisellerApi:
         if use_token:
             data["token"] = self._get_valid_token()
         endpoint = f'products/list'
-        return self._send_request('POST', self.URL + endpoint, json=data)
+        return self._send_request('POST', self.URL + endpoint, json=data, idempotent=True)
 
     # Описание товара
     # Product description
@@ -202,7 +492,7 @@ class DigisellerApi:
             "showHiddenVariants": show_hidden_variants
         }
         endpoint = f'products/{product_id}/data'
-        return self._send_request('GET', self.URL + endpoint, params=params)
+        return self._send_request('GET', self.URL + endpoint, params=params, idempotent=True)
 
     # Получение цены с учетом входящих значений параметров и/или количества товара
     # Obtaining a price taking into account the input values of the parameters and/or quantity of the product
@@ -216,7 +506,10 @@ class DigisellerApi:
             "count": count
         }
         endpoint = f'products/price/calc'
-        return self._send_request('GET', self.URL + endpoint, params=params)
+        if self.price_cache is not None:
+            key = self.price_cache.make_key(product_id, options, currency, amount, unit_cnt, count)
+            return self.price_cache.get(key, lambda: self._send_request('GET', self.URL + endpoint, params=params, idempotent=True))
+        return self._send_request('GET', self.URL + endpoint, params=params, idempotent=True)
 
     # Отзывы о товарах
     # Products reviews
@@ -231,7 +524,7 @@ class DigisellerApi:
             "lang": lang
         }
         endpoint = f'reviews'
-        return self._send_request('GET', self.URL + endpoint, params=params)
+        return self._send_request('GET', self.URL + endpoint, params=params, idempotent=True)
 
     # Товары продавца
     # Items of seller
@@ -249,7 +542,25 @@ class DigisellerApi:
         }
         params = {"token": self._get_valid_token()}
         endpoint = f'seller-goods'
-        return self._send_request('POST', self.URL + endpoint, json=data, params=params)
+        return self._send_request('POST', self.URL + endpoint, json=data, params=params, idempotent=True)
+
+    # Товары продавца (потоково, по мере получения ответа)
+    # Items of seller (streamed as the response arrives)
+    def iter_seller_goods(self, seller_id: int, order_col: str, order_dir: str, rows: int, page: int, currency: str, lang: str, show_hidden: int, owner_id: int):
+        data = {
+            "id_seller": seller_id,
+            "order_col": order_col,
+            "order_dir": order_dir,
+            "rows": rows,
+            "page": page,
+            "currency": currency,
+            "lang": lang,
+            "show_hidden": show_hidden,
+            "owner_id": owner_id,
+        }
+        params = {"token": self._get_valid_token()}
+        endpoint = f'seller-goods'
+        return self._stream_request('POST', self.URL + endpoint, json=data, params=params)
 
     # Скидка по товару
     # Product discount
@@ -264,7 +575,7 @@ class DigisellerApi:
             </digiseller.request>
             """
         url = f'https://shop.digiseller.ru/xml/shop_discount.asp'
-        return self._send_request('POST', url, data=xml_data)
+        return self._send_request('POST', url, data=xml_data, idempotent=True)
 
     # Поиск по товарам
     # Product search
@@ -286,11 +597,25 @@ class DigisellerApi:
             </digiseller.request>
             """
         url = f'https://shop.digiseller.ru/xml/shop_search.asp'
-        return self._send_request('POST', url, data=xml_data)
+        return self._send_request('POST', url, data=xml_data, idempotent=True)
 
     # Быстрое получение основного изображения товара
     # Quickly get the main product image
     def get_main_img(self, id_d: int, maxlength: int, w: int, h: int, crop: bool):
+        if self.image_cache is not None:
+            key = self.image_cache.make_key(id_d, maxlength, w, h, crop)
+            return self.image_cache.get(key, lambda: self._main_img_request(id_d, maxlength, w, h, crop))
+        return self._main_img_request(id_d, maxlength, w, h, crop)
+
+    # Путь к основному изображению товара в дисковом кэше (для os.sendfile / FileResponse)
+    # Path to the main product image in the disk cache (for os.sendfile / FileResponse)
+    def get_main_img_path(self, id_d: int, maxlength: int, w: int, h: int, crop: bool):
+        if self.image_cache is None:
+            raise DigisellerError("get_main_img_path requires DigisellerApi(image_cache=ImageCache(...)).")
+        key = self.image_cache.make_key(id_d, maxlength, w, h, crop)
+        return self.image_cache.get_path(key, lambda: self._main_img_request(id_d, maxlength, w, h, crop))
+
+    def _main_img_request(self, id_d, maxlength, w, h, crop):
         params = {
             "id_d": id_d,
             "maxlength": maxlength,
@@ -299,7 +624,7 @@ class DigisellerApi:
             "crop": crop
         }
         url = 'https://graph.digiseller.ru/img.ashx'
-        return self._send_request('GET', url, params=params)
+        return self._send_request('GET', url, params=params, idempotent=True)
 
     # Создание копии описания товара (клонирование без содержимого)
     # Creation of a copy of the product description (cloning without contents)
@@ -331,7 +656,7 @@ class DigisellerApi:
             "token": self._get_valid_token()
         }
         endpoint = f'agents/offer'
-        return self._send_request('GET', self.URL + endpoint, params=params)
+        return self._send_request('GET', self.URL + endpoint, params=params, idempotent=True)
 
     # Создание товара типа "Уникальный товар с фиксированной ценой"
     # Creation of product of type "Unique product with fixed price"
@@ -373,42 +698,60 @@ class DigisellerApi:
     def product_edit_uniquefixed(self, product_id: int, data: dict):
         params = {"token": self._get_valid_token()}
         endpoint = f'product/edit/uniquefixed/{product_id}'
-        return self._send_request('POST', self.URL + endpoint, json=data, params=params)
+        try:
+            return self._send_request('POST', self.URL + endpoint, json=data, params=params)
+        finally:
+            self._invalidate_prices(product_id)
 
     # Редактирование товара типа "Уникальный товар с нефиксированной ценой"
     # Editing of goods of "Unique item with variable price" type
     def product_edit_uniqueunfixed(self, product_id: int, data: dict):
         params = {"token": self._get_valid_token()}
         endpoint = f'product/edit/uniqueunfixed/{product_id}'
-        return self._send_request('POST', self.URL + endpoint, json=data, params=params)
+        try:
+            return self._send_request('POST', self.URL + endpoint, json=data, params=params)
+        finally:
+            self._invalidate_prices(product_id)
 
     # Редактирование товара типа "Электронная книга"
     # Editing of goods of "Electronic books" type
     def product_edit_book(self, product_id: int, data: dict):
         params = {"token": self._get_valid_token()}
         endpoint = f'product/edit/book/{product_id}'
-        return self._send_request('POST', self.URL + endpoint, json=data, params=params)
+        try:
+            return self._send_request('POST', self.URL + endpoint, json=data, params=params)
+        finally:
+            self._invalidate_prices(product_id)
 
     # Редактирование товара типа "Программное обеспечение"
     # Editing of goods of "Software" type
     def product_edit_software(self, product_id: int, data: dict):
         params = {"token": self._get_valid_token()}
         endpoint = f'product/edit/software/{product_id}'
-        return self._send_request('POST', self.URL + endpoint, json=data, params=params)
+        try:
+            return self._send_request('POST', self.URL + endpoint, json=data, params=params)
+        finally:
+            self._invalidate_prices(product_id)
 
     # Редактирование товара типа "Произвольный цифровой товар"
     # Editing of goods of "Arbitrary digital product" type
     def product_edit_arbitrary(self, product_id: int, data: dict):
         params = {"token": self._get_valid_token()}
         endpoint = f'product/edit/arbitrary/{product_id}'
-        return self._send_request('POST', self.URL + endpoint, json=data, params=params)
+        try:
+            return self._send_request('POST', self.URL + endpoint, json=data, params=params)
+        finally:
+            self._invalidate_prices(product_id)
 
     # Редактирование базовых свойств товара. Включение / выключение товара.
     # Editing of base props of product. Switch on/off sales.
     def product_edit_base(self, product_id: int, data: dict):
         params = {"token": self._get_valid_token()}
         endpoint = f'product/edit/base/{product_id}'
-        return self._send_request('POST', self.URL + endpoint, json=data, params=params)
+        try:
+            return self._send_request('POST', self.URL + endpoint, json=data, params=params)
+        finally:
+            self._invalidate_prices(product_id)
 
     # Добавление изображений товара
     # Add product images
@@ -453,7 +796,12 @@ class DigisellerApi:
     def product_edit_prices(self, data: dict):
         params = {"token": self._get_valid_token()}
         endpoint = f'product/edit/prices'
-        return self._send_request('POST', self.URL + endpoint, json=data, params=params)
+        response = None
+        try:
+            response = self._send_request('POST', self.URL + endpoint, json=data, params=params)
+            return response
+        finally:
+            self._invalidate_edited_prices(data, response)
 
     # Получение статуса выполнения асинхронной задачи
     # Getting the execution status of an asynchronous task
@@ -463,7 +811,10 @@ class DigisellerApi:
             "taskId": task_id
         }
         endpoint = f'product/edit/UpdateProductsTaskStatus'
-        return self._send_request('GET', self.URL + endpoint, params=params)
+        response = self._send_request('GET', self.URL + endpoint, params=params, idempotent=True)
+        if self.price_cache is not None and edit_task_finished(response):
+            self.price_cache.end_edit(task_id)
+        return response
 
     # Добавление товара в подкатегорию торговой площадки
     # Adding goods to the marketplace subcategory
@@ -476,13 +827,13 @@ class DigisellerApi:
     # Getting the category tree of the marketplace
     def dictionary_platforms_categories(self, id_: str):
         endpoint = f'dictionary/platforms/categories/{id_}'
-        return self._send_request('GET', self.URL + endpoint)
+        return self._send_request('GET', self.URL + endpoint, idempotent=True)
 
     # Получение подкатегорий торговой площадки
     # Getting the subcategories of the marketplace
     def dictionary_platforms_subcategories(self, id_: int):
         endpoint = f'dictionary/platforms/subcategories/{id_}'
-        return self._send_request('GET', self.URL + endpoint)
+        return self._send_request('GET', self.URL + endpoint, idempotent=True)
 
     # Метод добавления содержимого типа "Файл"
     # The method of adding content of type "File"
@@ -518,7 +869,7 @@ class DigisellerApi:
             "variant_id": variant_id
         }
         endpoint = f'product/content/code/count'
-        return self._send_request('GET', self.URL + endpoint, params=params)
+        return self._send_request('GET', self.URL + endpoint, params=params, idempotent=True)
 
     # Изменение количества кодов, генерируемых Digiseller
     # Change the number of codes generated by Digiseller
@@ -635,7 +986,7 @@ class DigisellerApi:
             "count": count
         }
         endpoint = f'templates'
-        return self._send_request('GET', self.URL + endpoint, params=params)
+        return self._send_request('GET', self.URL + endpoint, params=params, idempotent=True)
 
     # Удаление шаблона комиссионных отчислений
     # Delete a commission template
@@ -667,7 +1018,7 @@ class DigisellerApi:
             "token": self._get_valid_token()
         }
         endpoint = f'templates/products'
-        return self._send_request('GET', self.URL + endpoint, params=params)
+        return self._send_request('GET', self.URL + endpoint, params=params, idempotent=True)
 
     # Обновление товаров в шаблоне отчислений
     # Product update in the commission template
@@ -692,56 +1043,74 @@ class DigisellerApi:
     def products_options_list(self, product_id: int):
         params = {"token": self._get_valid_token()}
         endpoint = f'products/options/list/{product_id}'
-        return self._send_request('GET', self.URL + endpoint, params=params)
+        return self._send_request('GET', self.URL + endpoint, params=params, idempotent=True)
 
     # Информация о параметре
     # Parameter information
     def products_options_info(self, option_id: int):
         params = {"token": self._get_valid_token()}
         endpoint = f'products/options/{option_id}'
-        return self._send_request('GET', self.URL + endpoint, params=params)
+        return self._send_request('GET', self.URL + endpoint, params=params, idempotent=True)
 
     # Создание параметра
     # Create parameter
     def products_options_add(self, data: dict):
         params = {"token": self._get_valid_token()}
         endpoint = f'products/options'
-        return self._send_request('POST', self.URL + endpoint, json=data, params=params)
+        try:
+            return self._send_request('POST', self.URL + endpoint, json=data, params=params)
+        finally:
+            self._invalidate_prices(data.get("product_id"))
 
     # Редактирование параметра
     # Edit parameter
     def products_options_update(self, data: dict):
         params = {"token": self._get_valid_token()}
         endpoint = f'products/options/update'
-        return self._send_request('POST', self.URL + endpoint, json=data, params=params)
+        try:
+            return self._send_request('POST', self.URL + endpoint, json=data, params=params)
+        finally:
+            self._invalidate_prices()
 
     # Удаление параметра
     # Delete parameter
     def products_options_delete(self, option_id: int):
         params = {"token": self._get_valid_token()}
         endpoint = f'products/options/{option_id}/delete'
-        return self._send_request('GET', self.URL + endpoint, params=params)
+        try:
+            return self._send_request('GET', self.URL + endpoint, params=params)
+        finally:
+            self._invalidate_prices()
 
     # Создание варианта
     # Create variant
     def products_variant_add(self, option_id: int, data: dict):
         params = {"token": self._get_valid_token()}
         endpoint = f'products/options/{option_id}/variants'
-        return self._send_request('POST', self.URL + endpoint, json=data, params=params)
+        try:
+            return self._send_request('POST', self.URL + endpoint, json=data, params=params)
+        finally:
+            self._invalidate_prices()
 
     # Редактирование варианта
     # Edit variant
     def products_variant_edit(self, option_id: int, variants: list, data: dict):
         params = {"token": self._get_valid_token()}
         endpoint = f'products/options/{option_id}/variants/{variants}'
-        return self._send_request('POST', self.URL + endpoint, json=data, params=params)
+        try:
+            return self._send_request('POST', self.URL + endpoint, json=data, params=params)
+        finally:
+            self._invalidate_prices()
 
     # Удаление варианта
     # Delete variant
     def products_variant_delete(self, option_id: int, variant_id: int):
         params = {"token": self._get_valid_token()}
         endpoint = f'products/options/{option_id}/variants/{variant_id}/delete'
-        return self._send_request('GET', self.URL + endpoint, params=params)
+        try:
+            return self._send_request('GET', self.URL + endpoint, params=params)
+        finally:
+            self._invalidate_prices()
 
     # Получение списка диалогов
     # Getting a list of dialogs
@@ -755,7 +1124,7 @@ class DigisellerApi:
             'page': page
         }
         endpoint = f'debates/v2/chats'
-        return self._send_request('GET', self.URL + endpoint, params=params)
+        return self._send_request('GET', self.URL + endpoint, params=params, idempotent=True)
 
     # Получение статуса диалога
     # Getting dialog status
@@ -765,7 +1134,7 @@ class DigisellerApi:
             "id_i": order_id
         }
         endpoint = f'debates/v2/chat-state'
-        return self._send_request('GET', self.URL + endpoint, params=params)
+        return self._send_request('GET', self.URL + endpoint, params=params, idempotent=True)
 
     # Изменение статуса диалога
     # Changing the status of a dialog
@@ -792,7 +1161,7 @@ class DigisellerApi:
             "count": count
         }
         endpoint = f'debates/v2'
-        return self._send_request('GET', self.URL + endpoint, params=params)
+        return self._send_request('GET', self.URL + endpoint, params=params, idempotent=True)
 
     # Установка флага прочитан
     # Setting the read flag
@@ -847,7 +1216,22 @@ class DigisellerApi:
             "only_unread": only_unread
         }
         endpoint = f'messages/v2'
-        return self._send_request('GET', self.URL + endpoint, params=params)
+        return self._send_request('GET', self.URL + endpoint, params=params, idempotent=True)
+
+    # Получение списка сообщений (потоково, по мере получения ответа)
+    # Getting a list of messages (streamed as the response arrives)
+    def iter_chat_admin_messages(self, date_from: str, count: int, id_from: int, id_to: int, corr_id: int, only_unread: bool):
+        params = {
+            "token": self._get_valid_token(),
+            "date_from": date_from,
+            "count": count,
+            "id_from": id_from,
+            "id_to": id_to,
+            "corr_id": corr_id,
+            "only_unread": only_unread
+        }
+        endpoint = f'messages/v2'
+        return self._stream_request('GET', self.URL + endpoint, params=params)
 
     # Получение текущих значений валют
     # Getting current currency values
@@ -857,7 +1241,7 @@ class DigisellerApi:
             "base_currency": base_currency
         }
         endpoint = f'sellers/currency'
-        return self._send_request('GET', self.URL + endpoint, params=params)
+        return self._send_request('GET', self.URL + endpoint, params=params, idempotent=True)
 
     # Изменение курса валют
     # Exchange rate changes
@@ -871,7 +1255,10 @@ class DigisellerApi:
             "complement": complement,
             "type_currency": type_currency
         }
-        return self._send_request('POST', self.URL + endpoint, json=data, params=params)
+        try:
+            return self._send_request('POST', self.URL + endpoint, json=data, params=params)
+        finally:
+            self._invalidate_prices()
 
     # Реклама на площадке
     # Advertisement on marketplace
@@ -883,7 +1270,7 @@ class DigisellerApi:
             "lang": lang
         }
         endpoint = f'rekl'
-        return self._send_request('GET', self.URL + endpoint, params=params)
+        return self._send_request('GET', self.URL + endpoint, params=params, idempotent=True)
 
     # Операции по личному счету Digiseller
     # Operations on Digiseller personal account
@@ -900,7 +1287,7 @@ class DigisellerApi:
             "finish": finish
         }
         endpoint = f'sellers/account/receipts'
-        return self._send_request('GET', self.URL + endpoint, params=params)
+        return self._send_request('GET', self.URL + endpoint, params=params, idempotent=True)
 
     # Операции через внешних агрегаторов
     # Operations through external aggregators
@@ -914,7 +1301,7 @@ class DigisellerApi:
             "aggregator": aggregator
         }
         endpoint = f'sellers/account/receipts/external'
-        return self._send_request('GET', self.URL + endpoint, params=params)
+        return self._send_request('GET', self.URL + endpoint, params=params, idempotent=True)
 
     # Информация о балансе личного счёта
     # Information about personal account balance
@@ -923,4 +1310,4 @@ class DigisellerApi:
             "token": self._get_valid_token()
         }
         endpoint = f'sellers/account/balance/info'
-        return self._send_request('GET', self.URL + endpoint, params=params)
\ No newline at end of file
+        return self._send_request('GET', self.URL + endpoint, params=params, idempotent=True)
\ No newline at end of file
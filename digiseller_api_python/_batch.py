@@ -0,0 +1,96 @@
+import contextvars
+from concurrent.futures import Future, ThreadPoolExecutor
+
+# Установлено внутри задач пакета: вложенный gather выполняется в том же потоке, чтобы не ждать занятый пул
+_in_batch = contextvars.ContextVar("digiseller_in_batch", default=False)
+
+
+def _call_of(item):
+    if callable(item):
+        return item, ()
+    if isinstance(item, tuple) and item and callable(item[0]):
+        return item[0], item[1:]
+    raise TypeError(f"Expected a callable or a (callable, *args) tuple, got {item!r}")
+
+
+def _run(fn, args):
+    _in_batch.set(True)
+    return fn(*args)
+
+
+def submit(executor: ThreadPoolExecutor, fn, *args) -> Future:
+    """Ставит fn(*args) в общий пул в копии текущего контекста (дедлайн, трассировка)."""
+    if _in_batch.get():
+        future = Future()
+        try:
+            future.set_result(fn(*args))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+    return executor.submit(contextvars.copy_context().run, _run, fn, args)
+
+
+def gather(executor: ThreadPoolExecutor, calls, return_exceptions: bool = True) -> list:
+    """
+    Выполняет вызовы параллельно и возвращает результаты в исходном порядке.
+
+    :param calls: Функции без аргументов или кортежи (функция, *аргументы)
+    :param return_exceptions: Возвращать исключения на месте результатов, иначе пробрасывать первое по порядку
+    """
+    return _collect([submit(executor, fn, *args) for fn, args in map(_call_of, calls)], return_exceptions)
+
+
+def _collect(futures, return_exceptions: bool) -> list:
+    results = []
+    for future in futures:
+        error = future.exception()
+        if error is not None and not return_exceptions:
+            for pending in futures:
+                pending.cancel()
+            raise error
+        results.append(error if error is not None else future.result())
+    return results
+
+
+class Batch:
+    """
+    Пакет вызовов методов DigisellerApi: каждый вызов сразу ставится в общий пул и возвращает Future.
+
+        with api.batch() as batch:
+            purchase = batch.purchase_info(123)
+            status = batch.chat_status(...)
+        purchase.result()
+
+    При выходе из блока with ожидается завершение всех вызовов; results() возвращает результаты
+    (или исключения) в порядке вызовов.
+    """
+
+    def __init__(self, api, executor: ThreadPoolExecutor):
+        self._api = api
+        self._executor = executor
+        self._futures = []
+
+    def __getattr__(self, name):
+        method = getattr(self._api, name)
+        if name.startswith("_") or not callable(method):
+            raise AttributeError(name)
+
+        def call(*args, **kwargs) -> Future:
+            future = submit(self._executor, lambda: method(*args, **kwargs))
+            self._futures.append(future)
+            return future
+        return call
+
+    def results(self, return_exceptions: bool = True) -> list:
+        """Результаты вызовов в порядке их добавления."""
+        return _collect(self._futures, return_exceptions)
+
+    def wait(self):
+        for future in self._futures:
+            future.exception()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.wait()
@@ -0,0 +1,99 @@
+import base64
+import json
+import threading
+import time
+from urllib.parse import urlsplit, parse_qs
+
+# Ключи, значения которых вырезаются из кассеты (запросы и JSON-ответы)
+DEFAULT_REDACT_KEYS = frozenset({"token", "sign", "timestamp", "api_key", "email", "password"})
+REDACTED = "***"
+
+
+def _redact(value, keys):
+    if isinstance(value, dict):
+        return {k: REDACTED if str(k).lower() in keys else _redact(v, keys) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_redact(v, keys) for v in value]
+    return value
+
+
+def _is_text(content_type: str) -> bool:
+    return content_type.startswith(("application/json", "application/xml", "text/"))
+
+
+class Recorder:
+    """
+    Записывает пары запрос/ответ, проходящие через send_request, в файл-кассету (JSON Lines).
+
+    Секреты и персональные данные (ключи из redact_keys) заменяются на '***'.
+    sanitize - необязательная функция entry -> entry для дополнительной очистки; если она вернет None, запись пропускается.
+    """
+
+    def __init__(self, path: str, redact_keys=DEFAULT_REDACT_KEYS, sanitize=None):
+        self.path = path
+        self.redact_keys = frozenset(k.lower() for k in redact_keys)
+        self.sanitize = sanitize
+        self._lock = threading.Lock()
+        self._started = None
+
+    def record(self, method, url, request_kwargs, response, elapsed: float):
+        """
+        :param url: Адрес до подмены base_urls: кассета, записанная через стенд, хранит хост и путь Digiseller
+        """
+        parts = urlsplit(url)
+        sent = urlsplit(str(response.request.url))
+        query = {k: v[0] if len(v) == 1 else v for k, v in parse_qs(sent.query, keep_blank_values=True).items()}
+        content_type = response.headers.get("Content-Type", "")
+
+        if content_type.startswith("application/json"):
+            try:
+                body = json.dumps(_redact(response.json(), self.redact_keys), ensure_ascii=False)
+            except ValueError:
+                body = response.text
+            encoding = "text"
+        elif _is_text(content_type) or not response.content:
+            body, encoding = response.text, "text"
+        else:
+            body, encoding = base64.b64encode(response.content).decode("ascii"), "base64"
+
+        entry = {
+            "method": method.upper(),
+            "host": parts.hostname,
+            "path": parts.path,
+            "query": _redact(query, self.redact_keys),
+            "status": response.status_code,
+            "content_type": content_type,
+            "body": body,
+            "encoding": encoding,
+            "elapsed": round(elapsed, 6),
+        }
+        if request_kwargs.get("json") is not None:
+            entry["json"] = _redact(request_kwargs["json"], self.redact_keys)
+        if request_kwargs.get("files"):
+            entry["files"] = sorted(request_kwargs["files"])
+
+        if self.sanitize is not None:
+            entry = self.sanitize(entry)
+            if entry is None:
+                return
+
+        with self._lock:
+            now = time.monotonic()
+            if self._started is None:
+                self._started = now
+            entry["t"] = round(now - self._started, 6)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+
+def load_cassette(path: str) -> list:
+    """Читает кассету, записанную Recorder, в список словарей."""
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def entry_body(entry: dict) -> bytes:
+    """Тело ответа записи кассеты в байтах."""
+    if entry.get("encoding") == "base64":
+        return base64.b64decode(entry["body"])
+    return (entry.get("body") or "").encode("utf-8")
@@ -0,0 +1,190 @@
+import threading
+import time
+
+from digiseller_api_python._exceptions import (
+    DigisellerCircuitOpenError,
+    DigisellerConnectionError,
+    DigisellerDeadlineExceededError,
+    DigisellerHTTPError,
+    DigisellerTimeoutError,
+    DigisellerUnavailableError
+)
+
+
+class _HostState:
+    __slots__ = ("state", "failures", "opened_at", "trials", "successes")
+
+    def __init__(self):
+        self.state = CircuitBreaker.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.trials = 0
+        self.successes = 0
+
+
+class CircuitBreaker:
+    """
+    Автоматический выключатель для хостов Digiseller (api., shop., graph.digiseller.ru).
+
+    После failure_threshold подряд неудачных запросов (обслуживание, тайм-аут, ошибка сети, HTTP 5xx)
+    хост считается недоступным и запросы к нему сразу завершаются DigisellerCircuitOpenError.
+    Через recovery_timeout секунд пропускаются пробные запросы (half-open): успех замыкает цепь, ошибка снова размыкает.
+
+    :param failure_threshold: Количество ошибок подряд для размыкания
+    :param recovery_timeout: Через сколько секунд после размыкания пробовать снова
+    :param half_open_max_calls: Сколько пробных запросов одновременно пропускается в состоянии half-open
+    :param success_threshold: Сколько успешных пробных запросов нужно для замыкания
+    :param on_state_change: Необязательная функция (host, old_state, new_state), например для логирования
+    """
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, recovery_timeout: float = 30.0, half_open_max_calls: int = 1,
+                 success_threshold: int = 1, on_state_change=None):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self.success_threshold = success_threshold
+        self.on_state_change = on_state_change
+        self._hosts = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def is_failure(exc: Exception) -> bool:
+        """Считается ли ошибка признаком недоступности хоста."""
+        if isinstance(exc, DigisellerHTTPError):
+            return exc.status_code >= 500
+        return isinstance(exc, (DigisellerUnavailableError, DigisellerTimeoutError, DigisellerConnectionError))
+
+    def _host(self, host):
+        if host not in self._hosts:
+            self._hosts[host] = _HostState()
+        return self._hosts[host]
+
+    def _transition(self, host, entry, new_state):
+        old_state, entry.state = entry.state, new_state
+        entry.trials = entry.successes = 0
+        if new_state == self.OPEN:
+            entry.opened_at = time.monotonic()
+        elif new_state == self.CLOSED:
+            entry.failures = 0
+        return (host, old_state, new_state) if old_state != new_state else None
+
+    def _notify(self, change):
+        if change and self.on_state_change is not None:
+            self.on_state_change(*change)
+
+    def before(self, host: str):
+        """Проверка перед запросом. Бросает DigisellerCircuitOpenError, если запрос не должен уходить."""
+        change = None
+        with self._lock:
+            entry = self._host(host)
+            if entry.state == self.OPEN:
+                retry_after = entry.opened_at + self.recovery_timeout - time.monotonic()
+                if retry_after > 0:
+                    raise DigisellerCircuitOpenError(host, retry_after)
+                change = self._transition(host, entry, self.HALF_OPEN)
+            if entry.state == self.HALF_OPEN:
+                if entry.trials >= self.half_open_max_calls:
+                    raise DigisellerCircuitOpenError(host, 0.0)
+                entry.trials += 1
+        self._notify(change)
+
+    def on_success(self, host: str):
+        change = None
+        with self._lock:
+            entry = self._host(host)
+            if entry.state == self.HALF_OPEN:
+                entry.successes += 1
+                entry.trials -= 1
+                if entry.successes >= self.success_threshold:
+                    change = self._transition(host, entry, self.CLOSED)
+            else:
+                entry.failures = 0
+        self._notify(change)
+
+    def on_failure(self, host: str):
+        change = None
+        with self._lock:
+            entry = self._host(host)
+            entry.failures += 1
+            if entry.state == self.HALF_OPEN or entry.failures >= self.failure_threshold:
+                change = self._transition(host, entry, self.OPEN)
+        self._notify(change)
+
+    def _release(self, host: str):
+        with self._lock:
+            entry = self._host(host)
+            if entry.state == self.HALF_OPEN and entry.trials > 0:
+                entry.trials -= 1
+
+    def call(self, host: str, fn):
+        """Выполняет fn() под защитой выключателя хоста."""
+        self.before(host)
+        try:
+            result = fn()
+        except DigisellerDeadlineExceededError:
+            # Исчерпан бюджет вызывающего кода - о состоянии хоста это ничего не говорит
+            self._release(host)
+            raise
+        except Exception as e:
+            if self.is_failure(e):
+                self.on_failure(host)
+            else:
+                self.on_success(host)
+            raise
+        self.on_success(host)
+        return result
+
+    def guard_iter(self, host: str, items):
+        """Аналог call для генераторов: результат учитывается после полного прохода или ошибки."""
+        self.before(host)
+        completed = False
+        try:
+            yield from items
+            completed = True
+        except DigisellerDeadlineExceededError:
+            raise
+        except Exception as e:
+            completed = True
+            if self.is_failure(e):
+                self.on_failure(host)
+            else:
+                self.on_success(host)
+            raise
+        finally:
+            if not completed:
+                # Потребитель остановился раньше или исчерпан дедлайн - хост ответил, но итог неизвестен
+                self._release(host)
+        self.on_success(host)
+
+    def state(self, host: str) -> str:
+        with self._lock:
+            entry = self._hosts.get(host)
+            if entry is None:
+                return self.CLOSED
+            if entry.state == self.OPEN and time.monotonic() >= entry.opened_at + self.recovery_timeout:
+                return self.HALF_OPEN
+            return entry.state
+
+    def health(self) -> dict:
+        """Состояние всех известных хостов для health-check: {host: {"state", "failures", "retry_after"}}."""
+        now = time.monotonic()
+        with self._lock:
+            hosts = dict(self._hosts)
+        return {
+            host: {
+                "state": self.state(host),
+                "failures": entry.failures,
+                "retry_after": max(0.0, entry.opened_at + self.recovery_timeout - now) if entry.state == self.OPEN else 0.0,
+            }
+            for host, entry in hosts.items()
+        }
+
+    def reset(self, host: str = None):
+        with self._lock:
+            if host is None:
+                self._hosts.clear()
+            else:
+                self._hosts.pop(host, None)
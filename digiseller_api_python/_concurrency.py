@@ -0,0 +1,26 @@
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+
+
+def map_concurrent(fn, items, max_workers: int = 8, return_exceptions: bool = False) -> list:
+    """
+    Выполняет fn(item) для каждого элемента в пуле потоков и возвращает результаты в исходном порядке.
+
+    Каждая задача запускается в копии текущего контекста, поэтому дедлайн (api.deadline) действует и внутри пула.
+    При return_exceptions=True исключения возвращаются на месте результатов, иначе пробрасывается первое.
+    """
+    items = list(items)
+    if not items:
+        return []
+
+    def run(item):
+        try:
+            return fn(item), None
+        except Exception as e:
+            if not return_exceptions:
+                raise
+            return e, e
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(items))) as pool:
+        futures = [pool.submit(contextvars.copy_context().run, run, item) for item in items]
+        return [future.result()[0] for future in futures]
@@ -4,7 +4,14 @@ class DigisellerError(Exception):
 
 
 class DigisellerTimeoutError(DigisellerError):
-    """Ошибка тайм-аута при запросе к API Digiseller."""
+    """Ошибка тайм-аута при запросе к API Digiseller. phase - фаза запроса: connect, read, write, pool или None."""
+    def __init__(self, message, phase=None):
+        super().__init__(message)
+        self.phase = phase
+
+
+class DigisellerDeadlineExceededError(DigisellerTimeoutError):
+    """Исчерпан общий бюджет времени операции (Deadline)"""
     pass
 
 
@@ -30,4 +37,17 @@ class DigisellerAPIAuthError(DigisellerError):
 
 class DigisellerProxyError(DigisellerError):
     """Ошибка связанная с использованием прокси"""
-    pass
\ No newline at end of file
+    pass
+
+
+class DigisellerConnectionError(DigisellerError):
+    """Ошибка сети при выполнении запроса (соединение, чтение, запись)"""
+    pass
+
+
+class DigisellerCircuitOpenError(DigisellerUnavailableError):
+    """Запрос не отправлен: автоматический выключатель для хоста разомкнут"""
+    def __init__(self, host, retry_after):
+        super().__init__(f"Circuit breaker for {host} is open, retry in {retry_after:.1f}s")
+        self.host = host
+        self.retry_after = retry_after
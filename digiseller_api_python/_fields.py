@@ -0,0 +1,36 @@
+from datetime import datetime
+
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+INPUT_DATE_FORMATS = (DATE_FORMAT, "%Y-%m-%dT%H:%M:%S", "%d.%m.%Y %H:%M:%S", "%d.%m.%Y %H:%M", "%Y-%m-%d", "%d.%m.%Y")
+
+
+def first_value(source: dict, keys):
+    """Значение первого непустого ключа из keys: Digiseller называет одно поле по-разному в разных методах."""
+    for key in keys:
+        if source.get(key) not in (None, ""):
+            return source[key]
+    return None
+
+
+def parse_date(value):
+    """datetime из datetime или строки в одном из форматов Digiseller. None, если разобрать не удалось."""
+    if isinstance(value, datetime) or value is None:
+        return value
+    value = str(value).strip()
+    for date_format in INPUT_DATE_FORMATS:
+        try:
+            return datetime.strptime(value, date_format)
+        except ValueError:
+            continue
+    try:
+        return datetime.fromisoformat(value).replace(tzinfo=None)
+    except ValueError:
+        return None
+
+
+def parse_number(value):
+    """float из числа или строки ("1 234,5"). None, если разобрать не удалось."""
+    try:
+        return float(str(value).replace(",", ".").replace(" ", ""))
+    except (TypeError, ValueError):
+        return None
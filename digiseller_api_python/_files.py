@@ -0,0 +1,24 @@
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:   # Windows
+    fcntl = None
+
+
+@contextmanager
+def file_lock(path: str):
+    """
+    Межпроцессная блокировка на время чтения-изменения-записи общего файла (flock на path).
+    На платформах без fcntl блокировка не выполняется: одновременная запись из нескольких процессов
+    может потерять изменения одного из них.
+    """
+    if fcntl is None:
+        yield
+        return
+    with open(path, "a") as f:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
@@ -0,0 +1,105 @@
+import contextvars
+import threading
+import time
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from digiseller_api_python._stats import percentile
+
+
+class HedgePolicy:
+    """
+    Хеджирование идемпотентных запросов для сокращения хвостовых задержек.
+
+    Если ответ не пришел за адаптивную задержку (перцентиль наблюдаемых задержек эндпоинта),
+    отправляется второй такой же запрос; побеждает первый ответ, проигравший отменяется
+    (если еще не начат) либо его результат отбрасывается.
+
+    :param percentile: Перцентиль задержки, после которого отправляется дубль
+    :param initial_delay: Задержка, пока по эндпоинту мало замеров
+    :param min_delay: Нижняя граница задержки
+    :param max_delay: Верхняя граница задержки
+    :param budget: Максимальная доля дополнительной нагрузки (0.05 = не более 5% лишних запросов)
+    :param burst: Запас хеджей, который может накопиться в периоды без задержек
+    :param window: Количество последних замеров на эндпоинт
+    :param min_samples: Сколько замеров нужно для адаптивной задержки
+    :param max_workers: Размер пула потоков для попыток
+    """
+
+    def __init__(self, percentile: float = 95, initial_delay: float = 1.0, min_delay: float = 0.05,
+                 max_delay: float = 10.0, budget: float = 0.05, burst: float = 10, window: int = 200,
+                 min_samples: int = 20, max_workers: int = 32):
+        if not 0 <= budget <= 1:
+            raise ValueError("'budget' must be between 0 and 1.")
+        self.percentile = percentile
+        self.initial_delay = initial_delay
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.budget = budget
+        self.burst = burst
+        self.min_samples = min_samples
+        self.stats = {"requests": 0, "hedges": 0, "hedge_wins": 0}
+        self._samples = defaultdict(lambda: deque(maxlen=window))
+        self._tokens = 0.0
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="digiseller-hedge")
+
+    def delay(self, key: str) -> float:
+        with self._lock:
+            samples = list(self._samples[key])
+        if len(samples) < self.min_samples:
+            return self.initial_delay
+        return min(self.max_delay, max(self.min_delay, percentile(samples, self.percentile)))
+
+    def observe(self, key: str, latency: float):
+        with self._lock:
+            self._samples[key].append(latency)
+
+    def _earn(self):
+        with self._lock:
+            self.stats["requests"] += 1
+            self._tokens = min(self.burst, self._tokens + self.budget)
+
+    def _spend(self) -> bool:
+        with self._lock:
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            self.stats["hedges"] += 1
+            return True
+
+    def _attempt(self, key, call):
+        started = time.monotonic()
+        result = call()
+        self.observe(key, time.monotonic() - started)
+        return result
+
+    def _submit(self, key, call):
+        return self._pool.submit(contextvars.copy_context().run, self._attempt, key, call)
+
+    def execute(self, key: str, call):
+        """Выполняет call() с хеджированием. key - шаблон эндпоинта для статистики задержек."""
+        self._earn()
+        primary = self._submit(key, call)
+        done, _ = wait([primary], timeout=self.delay(key))
+        if done or not self._spend():
+            return primary.result()
+
+        hedge = self._submit(key, call)
+        pending = {primary, hedge}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    for loser in pending:
+                        loser.cancel()
+                    if future is hedge:
+                        with self._lock:
+                            self.stats["hedge_wins"] += 1
+                    return future.result()
+                error = error or future.exception()
+        raise error
+
+    def close(self):
+        self._pool.shutdown(wait=False)
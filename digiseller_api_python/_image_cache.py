@@ -0,0 +1,208 @@
+import contextvars
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from digiseller_api_python._exceptions import DigisellerInvalidResponseError
+
+
+class ImageCache:
+    """
+    Дисковый кэш изображений get_main_img с адресацией по содержимому.
+
+    Ключ - (id_d, maxlength, w, h, crop), файлы хранятся по SHA-256 содержимого (одинаковые картинки
+    хранятся один раз), при превышении max_bytes вытесняются давно не использованные записи.
+    Устаревшие записи (старше ttl) отдаются сразу и обновляются в фоне, одновременные промахи
+    по одному ключу выполняют один запрос.
+
+    Для отдачи без копирования в память используйте DigisellerApi.get_main_img_path и os.sendfile
+    (или FileResponse веб-фреймворка).
+
+    :param directory: Каталог кэша
+    :param max_bytes: Бюджет на диске в байтах
+    :param ttl: Через сколько секунд запись перепроверяется в фоне
+    :param max_workers: Потоки для фоновой перепроверки
+    """
+    INDEX_FILE = "index.jsonl"
+
+    def __init__(self, directory: str, max_bytes: int = 256 * 1024 * 1024, ttl: float = 86400, max_workers: int = 2):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.stats = {"hits": 0, "misses": 0, "revalidations": 0, "evictions": 0}
+        self._entries = OrderedDict()   # key -> [digest, size, fetched_at]
+        self._index_records = 0         # Записей в журнале индекса (включая устаревшие)
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="digiseller-img")
+        os.makedirs(directory, exist_ok=True)
+        self._load_index()
+
+    @staticmethod
+    def make_key(id_d, maxlength, w, h, crop) -> str:
+        return f"{int(id_d)}:{int(maxlength)}:{int(w)}:{int(h)}:{int(bool(crop))}"
+
+    @property
+    def size(self) -> int:
+        with self._lock:
+            return sum(entry[1] for entry in self._entries.values())
+
+    def _blob_path(self, digest: str) -> str:
+        return os.path.join(self.directory, digest[:2], digest)
+
+    def _load_index(self):
+        # Индекс - журнал записей ["put", key, digest, size, fetched_at] и ["del", key]
+        try:
+            with open(os.path.join(self.directory, self.INDEX_FILE), "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue   # Незавершенная последняя строка после сбоя
+                    self._entries.pop(record[1], None)
+                    if record[0] == "put":
+                        self._entries[record[1]] = record[2:5]
+        except OSError:
+            return
+        for key in [key for key, entry in self._entries.items() if not os.path.exists(self._blob_path(entry[0]))]:
+            del self._entries[key]
+        self._compact_index()
+
+    def _append_index(self, records):
+        # Вызывается под self._lock: дописывает изменения вместо перезаписи всего индекса
+        with open(os.path.join(self.directory, self.INDEX_FILE), "a", encoding="utf-8") as f:
+            f.write("".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records))
+        self._index_records += len(records)
+        if self._index_records > 2 * len(self._entries) + 64:
+            self._compact_index()
+
+    def _compact_index(self):
+        # Вызывается под self._lock (или из конструктора): журнал заменяется текущим состоянием
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            for key, entry in self._entries.items():
+                f.write(json.dumps(["put", key, *entry], ensure_ascii=False) + "\n")
+        os.replace(tmp, os.path.join(self.directory, self.INDEX_FILE))
+        self._index_records = len(self._entries)
+
+    def _store(self, key: str, content: bytes):
+        digest = hashlib.sha256(content).hexdigest()
+        path = self._blob_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(content)
+            os.replace(tmp, path)
+
+        with self._lock:
+            old = self._entries.pop(key, None)
+            self._entries[key] = entry = [digest, len(content), time.time()]
+            records = [["put", key, *entry]]
+            if old is not None and old[0] != digest:
+                self._drop_blob(old[0])
+            total = sum(entry[1] for entry in self._entries.values())
+            while total > self.max_bytes and len(self._entries) > 1:
+                evicted_key, (evicted, size, _) = self._entries.popitem(last=False)
+                total -= size
+                self._drop_blob(evicted)
+                records.append(["del", evicted_key])
+                self.stats["evictions"] += 1
+            self._append_index(records)
+        return path
+
+    def _drop_blob(self, digest: str):
+        # Файл удаляется, только если на него больше не ссылается ни один ключ (вызывается под self._lock)
+        if any(entry[0] == digest for entry in self._entries.values()):
+            return
+        try:
+            os.remove(self._blob_path(digest))
+        except OSError:
+            pass
+
+    def _fetch(self, key: str, loader):
+        """
+        Загрузка с объединением одновременных запросов по одному ключу.
+        Возвращает (путь к файлу, результат loader); путь None, если результат не bytes и не кэшируется.
+        """
+        with self._lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = Future()
+        if not leader:
+            return future.result()
+
+        try:
+            content = loader()
+            result = (self._store(key, content) if isinstance(content, bytes) else None, content)
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def _revalidate(self, key: str, loader):
+        with self._lock:
+            if key in self._inflight:
+                return
+            self.stats["revalidations"] += 1
+        self._pool.submit(contextvars.copy_context().run, self._fetch, key, loader)
+
+    def _lookup(self, key: str, loader):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+            path, stale = self._blob_path(entry[0]), time.time() - entry[2] > self.ttl
+        if stale:
+            self._revalidate(key, loader)
+        return path
+
+    def get_path(self, key: str, loader) -> str:
+        """Путь к файлу изображения в кэше. loader() вызывается при промахе и должен вернуть bytes."""
+        path = self._lookup(key, loader)
+        if path is None:
+            path, content = self._fetch(key, loader)
+            if path is None:
+                raise DigisellerInvalidResponseError(f"Expected image content, got: {str(content)[:300]}")
+        return path
+
+    def get(self, key: str, loader):
+        """
+        Содержимое изображения. Результат loader(), отличный от bytes (например, текст ошибки),
+        не кэшируется и возвращается как есть.
+        """
+        path = self._lookup(key, loader)
+        if path is None:
+            return self._fetch(key, loader)[1]
+        try:
+            with open(path, "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            # Файл вытеснен между поиском и чтением
+            with self._lock:
+                if self._entries.pop(key, None) is not None:
+                    self._append_index([["del", key]])
+            return self.get(key, loader)
+
+    def clear(self):
+        with self._lock:
+            for digest, _, _ in self._entries.values():
+                try:
+                    os.remove(self._blob_path(digest))
+                except OSError:
+                    pass
+            self._entries.clear()
+            self._compact_index()
@@ -0,0 +1,153 @@
+import codecs
+import json
+import re
+
+from digiseller_api_python._exceptions import DigisellerInvalidResponseError
+
+_WHITESPACE = " \t\n\r"
+_decoder = json.JSONDecoder()
+_STRUCTURE = re.compile(r'["\[\]{}]')
+_STRING_SPECIAL = re.compile(r'["\\]')
+_SCALAR_END = re.compile(r'[\s,\]}]')
+
+
+class _Buffer:
+    """Текстовый буфер поверх потока байтов; хранит только еще не разобранный хвост."""
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._decode = codecs.getincrementaldecoder("utf-8")().decode
+        self.text = ""
+        self.pos = 0
+        self.eof = False
+
+    def _read(self):
+        """Следующий непустой фрагмент текста или None, если поток закончился."""
+        if self.eof:
+            return None
+        for chunk in self._chunks:
+            text = self._decode(chunk)
+            if text:
+                return text
+        self.eof = True
+        return self._decode(b"", final=True) or None
+
+    def more(self) -> bool:
+        """Дочитывает следующий фрагмент. False, если поток закончился."""
+        text = self._read()
+        if text is None:
+            return False
+        self.text = self.text[self.pos:] + text
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        """Следующий значимый символ ('' в конце потока)."""
+        while True:
+            while self.pos < len(self.text) and self.text[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.text):
+                return self.text[self.pos]
+            if not self.more():
+                return ""
+
+    def expect(self, chars: str) -> str:
+        char = self.peek()
+        if not char or char not in chars:
+            raise DigisellerInvalidResponseError(
+                f"Json decoding error: expected one of {chars!r}, got {char or 'end of data'!r}")
+        self.pos += 1
+        return char
+
+    def value(self):
+        """
+        Следующее значение. Сначала за один проход по фрагментам находится его конец (с учетом строк
+        и вложенности), затем значение разбирается целиком: крупный элемент, разбитый на много фрагментов,
+        не разбирается заново после каждого из них.
+        """
+        first = self.peek()
+        scalar = first not in ("{", "[", '"')
+        parts = []
+        text, start = self.text, self.pos
+        i, depth, in_string, escape = start, 0, False, False
+        while True:
+            end = None
+            if scalar:
+                match = _SCALAR_END.search(text, i)
+                end = match.start() if match else None
+            else:
+                while True:
+                    if escape:
+                        if i >= len(text):
+                            break
+                        i, escape = i + 1, False
+                    match = (_STRING_SPECIAL if in_string else _STRUCTURE).search(text, i)
+                    if match is None:
+                        i = len(text)
+                        break
+                    char, i = match.group(), match.end()
+                    if in_string:
+                        if char == "\\":
+                            escape = True
+                        else:
+                            in_string = False
+                            if depth == 0:
+                                end = i
+                                break
+                    elif char == '"':
+                        in_string = True
+                    elif char in "[{":
+                        depth += 1
+                    else:
+                        depth -= 1
+                        if depth == 0:
+                            end = i
+                            break
+            if end is not None:
+                break
+            parts.append(text[start:])
+            text = self._read()
+            if text is None:
+                text, start, end = "", 0, 0
+                break
+            start = i = 0
+
+        self.text, self.pos = text, end
+        document = "".join(parts) + text[start:end]
+        value, consumed = _decoder.raw_decode(document)
+        if consumed != len(document):
+            raise json.JSONDecodeError("Extra data", document, consumed)
+        return value
+
+
+def iter_json_items(chunks, key: str = None):
+    """
+    Инкрементально разбирает JSON из потока байтов и выдает элементы массива по мере их поступления.
+
+    Массивом считается сам документ, если он начинается с '[', иначе значение поля key
+    объекта верхнего уровня (если key не указан - первое поле-массив).
+    Память расходуется на один элемент, а не на весь ответ.
+    """
+    buffer = _Buffer(chunks)
+    if buffer.expect("[{") == "{":
+        skipped = {}
+        while True:
+            if buffer.peek() == "}":
+                raise DigisellerInvalidResponseError(
+                    f"The response does not contain a list of items: {str(skipped)[:300]}")
+            name = buffer.value()
+            buffer.expect(":")
+            if buffer.peek() == "[" and (key is None or name == key):
+                buffer.pos += 1
+                break
+            skipped[name] = buffer.value()
+            if buffer.expect(",}") == "}":
+                raise DigisellerInvalidResponseError(
+                    f"The response does not contain a list of items: {str(skipped)[:300]}")
+
+    if buffer.peek() == "]":
+        return
+    while True:
+        yield buffer.value()
+        if buffer.expect(",]") == "]":
+            return
@@ -0,0 +1,246 @@
+import json
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+
+from digiseller_api_python._concurrency import map_concurrent
+from digiseller_api_python._fields import DATE_FORMAT, first_value, parse_date, parse_number
+from digiseller_api_python._pagination import _content, fetch_all_pages, page_items
+from digiseller_api_python._tracing import span
+
+# Поля операции и ключи, под которыми они ищутся в ответе
+FIELDS = {
+    "id": ("id", "operation_id", "id_operation", "op_id", "transaction_id"),
+    "code": ("code", "code_operation", "operation_code", "inv", "invoice_id"),
+    "date": ("date", "date_operation", "operation_date", "date_add", "created"),
+    "amount": ("amount", "sum", "amount_in", "total"),
+    "currency": ("currency", "currency_type"),
+    "aggregator": ("aggregator",),
+}
+BALANCE_KEYS = ("balance", "amount", "sum", "available", "total")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS operations (
+    source TEXT NOT NULL,
+    id TEXT NOT NULL,
+    currency TEXT,
+    type TEXT,
+    code TEXT,
+    date TEXT,
+    amount REAL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (source, id)
+);
+CREATE INDEX IF NOT EXISTS operations_code ON operations (code);
+CREATE INDEX IF NOT EXISTS operations_date ON operations (date);
+CREATE TABLE IF NOT EXISTS watermarks (
+    source TEXT NOT NULL,
+    currency TEXT NOT NULL,
+    type TEXT NOT NULL,
+    synced_until TEXT NOT NULL,
+    PRIMARY KEY (source, currency, type)
+);
+"""
+
+
+def _field(operation: dict, name: str):
+    return first_value(operation, FIELDS[name])
+
+
+def split_windows(start: datetime, finish: datetime, window: timedelta) -> list:
+    """Разбивает [start, finish) на подряд идущие окна не длиннее window."""
+    windows = []
+    while start < finish:
+        end = min(start + window, finish)
+        windows.append((start, end))
+        start = end
+    return windows
+
+
+class LedgerSync:
+    """
+    Инкрементальная синхронизация операций личного счета в локальную базу SQLite.
+
+    sync_receipts() помнит, до какого момента синхронизированы операции sellers_account_receipts
+    по каждой паре (валюта, тип), и загружает только новый интервал, разбивая его на окна,
+    которые загружаются параллельно. sync_external() читает sellers_account_receipts_external
+    от новых к старым до первой уже известной операции. Операции доступны по коду и дате через
+    индексы, check_balance() сверяет сумму операций с sellers_account_balance_info.
+
+    :param api: Экземпляр DigisellerApi
+    :param path: Путь к файлу базы (":memory:" - база в памяти)
+    :param page_size: Размер страницы запросов
+    :param window: Длина окна, на которые разбивается интервал синхронизации
+    :param max_workers: Сколько окон загружать параллельно
+    :param overlap: На сколько раньше отметки начинать следующую синхронизацию (операции с запоздалой датой)
+    :param initial: Глубина первой синхронизации пары (валюта, тип)
+    :param date_format: Формат дат start/finish в запросах
+    """
+
+    def __init__(self, api, path: str, page_size: int = 500, window: timedelta = timedelta(days=7),
+                 max_workers: int = 8, overlap: timedelta = timedelta(hours=1), initial: timedelta = timedelta(days=365),
+                 date_format: str = DATE_FORMAT):
+        self.api = api
+        self.path = path
+        self.page_size = page_size
+        self.window = window
+        self.max_workers = max_workers
+        self.overlap = overlap
+        self.initial = initial
+        self.date_format = date_format
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._db.executescript(SCHEMA)
+        self._lock = threading.Lock()
+
+    def close(self):
+        self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def watermark(self, currency: str, rtype: str, source: str = "receipts"):
+        """Момент, до которого синхронизированы операции пары (валюта, тип), или None."""
+        with self._lock:
+            row = self._db.execute("SELECT synced_until FROM watermarks WHERE source = ? AND currency = ? AND type = ?",
+                                   (source, currency or "", rtype or "")).fetchone()
+        return parse_date(row["synced_until"]) if row else None
+
+    def _fetch_window(self, currency, rtype, code_filter, allow_type, start, finish):
+        def fetch(page):
+            return self.api.sellers_account_receipts(page, self.page_size, currency, rtype, code_filter, allow_type,
+                                                     start.strftime(self.date_format), finish.strftime(self.date_format))
+        return fetch_all_pages(fetch, self.page_size, max_workers=1)
+
+    def sync_receipts(self, currency: str, rtype: str, code_filter: str = None, allow_type: str = None,
+                      since: datetime = None, until: datetime = None) -> int:
+        """
+        Загружает операции с отметки пары (валюта, тип) (или since) до until (по умолчанию - сейчас).
+        Отметка сдвигается только после сохранения всех окон и только если загруженный интервал начинается
+        не позже нее: иначе операции между отметкой и since были бы пропущены при следующих синхронизациях.
+        Синхронизация с code_filter или allow_type загружает не все операции и отметку не сдвигает.
+
+        :return: Количество сохраненных операций
+        """
+        until = until or datetime.now().replace(microsecond=0)
+        watermark = self.watermark(currency, rtype)
+        if since is None:
+            since = watermark - self.overlap if watermark else until - self.initial
+        windows = split_windows(since, until, self.window)
+        with span(getattr(self.api, "tracer", None), "digiseller.ledger.sync_receipts",
+                  {"digiseller.currency": currency, "digiseller.type": rtype, "digiseller.windows": len(windows)}):
+            batches = map_concurrent(lambda w: self._fetch_window(currency, rtype, code_filter, allow_type, *w),
+                                     windows, max_workers=self.max_workers)
+
+        operations = [operation for batch in batches for operation in batch if isinstance(operation, dict)]
+        with self._lock, self._db:
+            self._store("receipts", operations, currency, rtype)
+            if not code_filter and not allow_type and (watermark is None or since <= watermark < until):
+                self._db.execute("INSERT OR REPLACE INTO watermarks VALUES ('receipts', ?, ?, ?)",
+                                 (currency or "", rtype or "", until.strftime(DATE_FORMAT)))
+        return len(operations)
+
+    def sync_external(self, aggregator: str = None, code: str = None, order: str = "desc", max_pages: int = None) -> int:
+        """
+        Загружает операции через внешних агрегаторов, читая страницы от новых к старым (order)
+        до первой страницы с уже известной операцией.
+
+        :return: Количество новых операций
+        """
+        with self._lock:
+            known = {row["id"] for row in self._db.execute("SELECT id FROM operations WHERE source = 'external'")}
+        operations, page = [], 1
+        with span(getattr(self.api, "tracer", None), "digiseller.ledger.sync_external",
+                  {"digiseller.aggregator": aggregator}):
+            while max_pages is None or page <= max_pages:
+                items = [item for item in page_items(
+                    self.api.sellers_account_receipts_external(page, self.page_size, order, code, aggregator))
+                    if isinstance(item, dict)]
+                new = [item for item in items if str(_field(item, "id")) not in known]
+                operations.extend(new)
+                if len(new) < len(items) or len(items) < self.page_size:
+                    break
+                page += 1
+        with self._lock, self._db:
+            self._store("external", operations, None, aggregator)
+        return len(operations)
+
+    def _store(self, source, operations, currency, rtype):
+        rows = []
+        for operation in operations:
+            operation_id = _field(operation, "id")
+            if operation_id is None:
+                # Без ID операция идентифицируется своим содержимым
+                operation_id = json.dumps(operation, sort_keys=True, ensure_ascii=False)
+            date = parse_date(_field(operation, "date"))
+            rows.append((source, str(operation_id), _field(operation, "currency") or currency,
+                         rtype if source == "receipts" else _field(operation, "aggregator") or rtype,
+                         None if _field(operation, "code") is None else str(_field(operation, "code")),
+                         date.strftime(DATE_FORMAT) if date else None, parse_number(_field(operation, "amount")),
+                         json.dumps(operation, ensure_ascii=False)))
+        self._db.executemany("INSERT OR REPLACE INTO operations VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+
+    def _select(self, where: str, arguments) -> list:
+        with self._lock:
+            rows = self._db.execute(f"SELECT data FROM operations WHERE {where} ORDER BY date, id", arguments).fetchall()
+        return [json.loads(row["data"]) for row in rows]
+
+    def by_code(self, code) -> list:
+        """Операции с указанным кодом."""
+        return self._select("code = ?", (str(code),))
+
+    def between(self, start, finish, currency: str = None, source: str = None) -> list:
+        """Операции с датой в [start, finish), при необходимости - только указанной валюты и источника."""
+        where, arguments = "date >= ? AND date < ?", [parse_date(start).strftime(DATE_FORMAT),
+                                                      parse_date(finish).strftime(DATE_FORMAT)]
+        if currency is not None:
+            where, arguments = where + " AND currency = ?", arguments + [currency]
+        if source is not None:
+            where, arguments = where + " AND source = ?", arguments + [source]
+        return self._select(where, arguments)
+
+    def totals(self, source: str = "receipts") -> dict:
+        """Сумма операций по валютам."""
+        with self._lock:
+            rows = self._db.execute("SELECT currency, SUM(amount) AS total FROM operations WHERE source = ? "
+                                    "GROUP BY currency", (source,)).fetchall()
+        return {row["currency"]: row["total"] or 0.0 for row in rows}
+
+    @staticmethod
+    def balances(response) -> dict:
+        """Баланс по валютам из ответа sellers_account_balance_info."""
+        content = _content(response)
+        items = content if isinstance(content, list) else page_items(response)
+        balances = {}
+        for item in items:
+            if isinstance(item, dict) and _field(item, "currency"):
+                value = next((parse_number(item[key]) for key in BALANCE_KEYS if key in item), None)
+                if value is not None:
+                    balances[_field(item, "currency")] = value
+        if not balances and isinstance(content, dict):
+            for currency, value in content.items():
+                if isinstance(value, dict):
+                    value = next((value[key] for key in BALANCE_KEYS if key in value), None)
+                if parse_number(value) is not None and not isinstance(value, bool):
+                    balances[currency] = parse_number(value)
+        return balances
+
+    def check_balance(self, opening: dict = None, tolerance: float = 0.01) -> dict:
+        """
+        Сверяет баланс счета с суммой синхронизированных операций (плюс начальный остаток opening).
+        Сверка имеет смысл, если операции синхронизированы с момента opening.
+
+        :return: {валюта: {"balance", "ledger", "difference", "ok"}}
+        """
+        opening = opening or {}
+        totals = self.totals()
+        report = {}
+        for currency, balance in self.balances(self.api.sellers_account_balance_info()).items():
+            ledger = opening.get(currency, 0.0) + totals.get(currency, 0.0)
+            difference = round(balance - ledger, 6)
+            report[currency] = {"balance": balance, "ledger": ledger, "difference": difference,
+                                "ok": abs(difference) <= tolerance}
+        return report
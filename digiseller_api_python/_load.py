@@ -0,0 +1,104 @@
+import random
+import threading
+import time
+from collections import Counter, defaultdict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from digiseller_api_python._stats import percentile
+
+# Один вызов нагрузочного сценария: время старта от начала прогона, имя метода DigisellerApi и аргументы
+LoadCall = namedtuple("LoadCall", ["at", "method", "args", "kwargs"])
+
+
+def mixed_workload(mix: dict, count: int, rate: float, seed: int = None) -> list:
+    """
+    Смешанный сценарий с пуассоновским потоком вызовов.
+
+    :param mix: {имя метода: (вес, args, kwargs)}
+    :param count: Количество вызовов
+    :param rate: Средняя интенсивность, вызовов в секунду
+    """
+    rnd = random.Random(seed)
+    names = list(mix)
+    weights = [mix[name][0] for name in names]
+    calls, at = [], 0.0
+    for _ in range(count):
+        name = rnd.choices(names, weights)[0]
+        _, args, kwargs = mix[name]
+        calls.append(LoadCall(at, name, tuple(args), dict(kwargs)))
+        at += rnd.expovariate(rate)
+    return calls
+
+
+class LoadReport:
+    """Результат прогона run_load: пропускная способность, ошибки и задержки по методам."""
+
+    def __init__(self, elapsed: float, latencies: dict, errors: Counter):
+        self.elapsed = elapsed
+        self.latencies = latencies
+        self.errors = errors
+
+    @property
+    def total(self) -> int:
+        return sum(len(v) for v in self.latencies.values())
+
+    @property
+    def throughput(self) -> float:
+        return self.total / self.elapsed if self.elapsed else 0.0
+
+    def percentile(self, q: float, method: str = None):
+        if method is not None:
+            return percentile(self.latencies.get(method, []), q)
+        return percentile([x for v in self.latencies.values() for x in v], q)
+
+    def summary(self) -> str:
+        lines = [
+            f"calls: {self.total}, errors: {sum(self.errors.values())}, "
+            f"elapsed: {self.elapsed:.2f}s, throughput: {self.throughput:.1f}/s"
+        ]
+        for method in sorted(self.latencies):
+            values = self.latencies[method]
+            lines.append(
+                f"  {method}: n={len(values)} p50={percentile(values, 50) * 1000:.1f}ms "
+                f"p95={percentile(values, 95) * 1000:.1f}ms p99={percentile(values, 99) * 1000:.1f}ms"
+            )
+        for name, count in self.errors.most_common():
+            lines.append(f"  error {name}: {count}")
+        return "\n".join(lines)
+
+    def __str__(self):
+        return self.summary()
+
+
+def run_load(api, calls: list, concurrency: int = 16, speed: float = 1.0) -> LoadReport:
+    """
+    Выполняет сценарий над экземпляром DigisellerApi.
+
+    Вызовы стартуют в моменты call.at / speed. Задержка считается от запланированного момента,
+    поэтому включает ожидание свободного потока.
+    """
+    latencies = defaultdict(list)
+    errors = Counter()
+    lock = threading.Lock()
+    started = time.monotonic()
+
+    def execute(call, scheduled):
+        try:
+            getattr(api, call.method)(*call.args, **call.kwargs)
+        except Exception as e:
+            with lock:
+                errors[type(e).__name__] += 1
+        finally:
+            latency = time.monotonic() - scheduled
+            with lock:
+                latencies[call.method].append(latency)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for call in sorted(calls, key=lambda c: c.at):
+            scheduled = started + call.at / speed
+            delay = scheduled - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            pool.submit(execute, call, scheduled)
+
+    return LoadReport(time.monotonic() - started, dict(latencies), errors)
@@ -0,0 +1,153 @@
+import contextvars
+import sys
+import threading
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+
+from digiseller_api_python._tracing import _NOOP
+
+# Глубина вложенности профилируемых спанов; копируется в пулы потоков вместе с контекстом
+_depth = contextvars.ContextVar("digiseller_memory_depth", default=0)
+
+HAS_RESET_PEAK = hasattr(tracemalloc, "reset_peak")   # Python 3.9+
+SNAPSHOT_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+
+class MemoryProfiler:
+    """
+    Профилирование памяти вызовов DigisellerApi и пакетных помощников через tracemalloc.
+
+    Подключается как трассировщик: DigisellerApi(tracer=MemoryProfiler()) или, вместе с трассировкой,
+    DigisellerApi(tracer=MemoryProfiler(tracer=otel_tracer)). Для каждого спана (вызов метода, HTTP-запрос
+    по шаблону эндпоинта, разбор ответа, пакетный помощник) считается, сколько памяти осталось занятым после него.
+    Для внешнего спана (вызов из пользовательского кода) дополнительно измеряется пиковая память и сравниваются
+    снимки tracemalloc: так находятся строки кода, выделившие больше всего памяти.
+
+    Счетчики tracemalloc общие для процесса: при параллельных вызовах числа включают чужие выделения.
+
+    :param tracer: Необязательный трассировщик, в который передаются спаны
+    :param top: Сколько крупнейших мест выделения хранить и выводить для каждого спана
+    :param frames: Глубина стека, сохраняемого tracemalloc
+    :param snapshots: Сравнивать снимки для внешних спанов (дороже, но показывает места выделения)
+    """
+
+    def __init__(self, tracer=None, top: int = 10, frames: int = 1, snapshots: bool = True):
+        self.tracer = tracer
+        self.top = top
+        self.frames = frames
+        self.snapshots = snapshots
+        self._stats = {}
+        self._allocators = {}   # key -> Counter({место: байт}), Counter({место: блоков})
+        self._started = False
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Включает tracemalloc, если он еще не включен."""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+            self._started = True
+        return self
+
+    def stop(self):
+        """Выключает tracemalloc, если его включил этот профилировщик."""
+        if self._started:
+            tracemalloc.stop()
+            self._started = False
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    @staticmethod
+    def _key(name: str, attributes) -> str:
+        endpoint = (attributes or {}).get("digiseller.endpoint")
+        return f"{name} {endpoint}" if endpoint else name
+
+    @contextmanager
+    def start_as_current_span(self, name: str, attributes: dict = None):
+        key = self._key(name, attributes)
+        outer = _depth.get() == 0
+        token = _depth.set(_depth.get() + 1)
+        tracing = tracemalloc.is_tracing()
+        before = snapshot = None
+        if tracing:
+            if outer and HAS_RESET_PEAK:
+                tracemalloc.reset_peak()
+            snapshot = tracemalloc.take_snapshot() if outer and self.snapshots else None
+            before = tracemalloc.get_traced_memory()[0]
+        try:
+            if self.tracer is None:
+                yield _NOOP
+            else:
+                with self.tracer.start_as_current_span(name, attributes=attributes) as current:
+                    yield current
+        finally:
+            _depth.reset(token)
+            if tracing and tracemalloc.is_tracing():
+                self._record(key, before, snapshot, outer)
+
+    def _record(self, key, before, snapshot, outer):
+        current, peak = tracemalloc.get_traced_memory()
+        top = None
+        if snapshot is not None:
+            after = tracemalloc.take_snapshot().filter_traces(SNAPSHOT_FILTERS)
+            top = after.compare_to(snapshot.filter_traces(SNAPSHOT_FILTERS), "lineno")
+        with self._lock:
+            stats = self._stats.setdefault(key, {"calls": 0, "retained": 0, "max_retained": 0, "max_peak": None,
+                                                 "blocks": 0})
+            stats["calls"] += 1
+            stats["retained"] += current - before
+            stats["max_retained"] = max(stats["max_retained"], current - before)
+            if outer and HAS_RESET_PEAK:
+                stats["max_peak"] = max(stats["max_peak"] or 0, peak - before)
+            if top is not None:
+                sizes, counts = self._allocators.setdefault(key, (Counter(), Counter()))
+                for stat in top:
+                    if stat.size_diff > 0:
+                        frame = stat.traceback[0]
+                        location = f"{frame.filename}:{frame.lineno}"
+                        sizes[location] += stat.size_diff
+                        counts[location] += stat.count_diff
+                        stats["blocks"] += stat.count_diff
+
+    def report(self) -> dict:
+        """
+        {спан: {"calls", "retained" (байт осталось занятыми, сумма), "max_retained", "max_peak" (только внешние спаны),
+                "blocks" (новых блоков по снимкам), "top": [(место, байт, блоков)]}}
+        """
+        with self._lock:
+            report = {}
+            for key, stats in self._stats.items():
+                sizes, counts = self._allocators.get(key, (Counter(), Counter()))
+                report[key] = {**stats, "top": [(location, size, counts[location])
+                                                for location, size in sizes.most_common(self.top)]}
+            return report
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+            self._allocators.clear()
+
+    def dump(self, file=None, limit: int = None):
+        """Выводит отчет (по убыванию пиковой памяти) в файл по пути, поток или stdout."""
+        if isinstance(file, str):
+            with open(file, "w", encoding="utf-8") as f:
+                return self.dump(f, limit)
+        file = file or sys.stdout
+        report = self.report()
+        keys = sorted(report, key=lambda k: (report[k]["max_peak"] or 0, report[k]["max_retained"]), reverse=True)
+        for key in keys[:limit]:
+            stats = report[key]
+            peak = "n/a" if stats["max_peak"] is None else f"{stats['max_peak'] / 1024:.1f} KiB"
+            print(f"{key}: calls={stats['calls']} peak={peak} "
+                  f"retained={stats['retained'] / 1024:.1f} KiB max_retained={stats['max_retained'] / 1024:.1f} KiB",
+                  file=file)
+            for location, size, count in stats["top"]:
+                print(f"    {size / 1024:10.1f} KiB {count:8d} blocks  {location}", file=file)
@@ -0,0 +1,240 @@
+import asyncio
+import functools
+import json
+import logging
+import queue
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import parse_qsl
+
+from digiseller_api_python._timeouts import Deadline
+
+logger = logging.getLogger(__name__)
+
+INVOICE_KEYS = ("id_i", "inv", "invoice_id")
+UNIQUE_CODE_KEYS = ("unique_code", "uniquecode", "uc")
+REASONS = {200: "OK", 400: "Bad Request", 403: "Forbidden", 503: "Service Unavailable"}
+
+
+def _find(notification: dict, keys):
+    lowered = {str(k).lower(): v for k, v in notification.items()}
+    for key in keys:
+        if lowered.get(key) not in (None, ""):
+            return lowered[key]
+    return None
+
+
+def parse_notification(body: bytes, content_type: str = "", query_string: str = "") -> dict:
+    """Разбирает уведомление Digiseller: JSON, form-urlencoded или параметры строки запроса."""
+    notification = dict(parse_qsl(query_string, keep_blank_values=True))
+    if body:
+        if content_type.startswith("application/json") or body.lstrip()[:1] == b"{":
+            notification.update(json.loads(body))
+        else:
+            notification.update(parse_qsl(body.decode("utf-8"), keep_blank_values=True))
+    return notification
+
+
+class NotificationReceiver:
+    """
+    Приемник уведомлений Digiseller об оплате, подключаемый как WSGI или ASGI приложение.
+
+    Уведомление подтверждается сразу и ставится в ограниченную очередь; повторы по номеру заказа
+    отбрасываются. Пул потоков дополняет уведомление данными purchase_info (и unique_code, если
+    код есть в уведомлении или ответе) и передает результат в callback(notification, purchase, unique).
+
+    :param api: Экземпляр DigisellerApi
+    :param callback: Функция (notification, purchase, unique), unique - None, если код не запрашивался
+    :param workers: Количество потоков обработки
+    :param queue_size: Размер очереди; при переполнении приемник отвечает 503, и Digiseller повторит уведомление
+    :param with_unique_code: Запрашивать unique_code
+    :param verify: Необязательная проверка подписи: verify(notification) -> bool, при False ответ 403
+    :param on_error: Функция (notification, exception) для ошибок обработки; по умолчанию ошибка пишется в лог
+    :param deadline: Бюджет времени на дополнение одного уведомления в секундах
+    :param dedup_size: Сколько последних номеров заказов помнить для отбрасывания повторов
+    :param dedup_ttl: Сколько секунд помнить номер заказа
+    """
+
+    def __init__(self, api, callback, workers: int = 4, queue_size: int = 1000, with_unique_code: bool = False,
+                 verify=None, on_error=None, deadline: float = None, dedup_size: int = 100000, dedup_ttl: float = 86400):
+        self.api = api
+        self.callback = callback
+        self.workers = workers
+        self.with_unique_code = with_unique_code
+        self.verify = verify
+        self.on_error = on_error
+        self.deadline = deadline
+        self.dedup_size = dedup_size
+        self.dedup_ttl = dedup_ttl
+        self.stats = {"received": 0, "duplicates": 0, "rejected": 0, "processed": 0, "failed": 0}
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._seen = OrderedDict()
+        self._lock = threading.Lock()
+        self._threads = []
+        self._stopping = threading.Event()
+
+    def start(self):
+        with self._lock:
+            if self._threads:
+                return self
+            self._stopping.clear()
+            self._threads = [threading.Thread(target=self._worker, name=f"digiseller-notify-{n}", daemon=True)
+                             for n in range(self.workers)]
+        for thread in self._threads:
+            thread.start()
+        return self
+
+    def stop(self, drain: bool = True):
+        """
+        Останавливает обработку; при drain=True дожидается обработки очереди, при drain=False необработанные
+        уведомления отбрасываются (Digiseller повторит их, так как номера заказов забываются).
+        """
+        if drain:
+            self._queue.join()
+        self._stopping.set()
+        self._discard()
+        with self._lock:
+            threads, self._threads = self._threads, []
+        for _ in threads:
+            try:
+                self._queue.put_nowait(None)
+            except queue.Full:
+                # Очередь снова заполнена - потоки выйдут, получив из нее любой элемент
+                break
+        for thread in threads:
+            thread.join()
+        self._discard()
+
+    def _discard(self):
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            if item is not None:
+                self._forget(item[0])
+            self._queue.task_done()
+
+    def join(self):
+        """Ожидает обработки всех принятых уведомлений."""
+        self._queue.join()
+
+    def _count(self, name):
+        with self._lock:
+            self.stats[name] += 1
+
+    def _remember(self, invoice) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            while self._seen and (len(self._seen) >= self.dedup_size or next(iter(self._seen.values())) < now - self.dedup_ttl):
+                self._seen.popitem(last=False)
+            if invoice in self._seen:
+                return False
+            self._seen[invoice] = now
+            return True
+
+    def _forget(self, invoice):
+        with self._lock:
+            self._seen.pop(invoice, None)
+
+    def submit(self, notification: dict) -> int:
+        """Принимает уведомление. Возвращает HTTP-статус для ответа Digiseller."""
+        if self.verify is not None and not self.verify(notification):
+            return 403
+        invoice = _find(notification, INVOICE_KEYS)
+        if invoice is None:
+            return 400
+        invoice = str(invoice)
+
+        self._count("received")
+        if not self._remember(invoice):
+            self._count("duplicates")
+            return 200
+        self.start()
+        try:
+            self._queue.put_nowait((invoice, notification))
+        except queue.Full:
+            self._forget(invoice)
+            self._count("rejected")
+            return 503
+        return 200
+
+    def _enrich(self, invoice, notification):
+        purchase = self.api.purchase_info(invoice)
+        unique = None
+        if self.with_unique_code:
+            content = purchase.get("content") if isinstance(purchase, dict) else None
+            code = _find(notification, UNIQUE_CODE_KEYS) or (_find(content, UNIQUE_CODE_KEYS) if isinstance(content, dict) else None)
+            if code:
+                unique = self.api.unique_code(code)
+        self.callback(notification, purchase, unique)
+
+    def _worker(self):
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None or self._stopping.is_set():
+                    if item is not None:
+                        self._forget(item[0])
+                    return
+                invoice, notification = item
+                try:
+                    if self.deadline is None:
+                        self._enrich(invoice, notification)
+                    else:
+                        with Deadline(self.deadline):
+                            self._enrich(invoice, notification)
+                    self._count("processed")
+                except Exception as e:
+                    # Повторное уведомление по этому заказу будет обработано заново
+                    self._forget(invoice)
+                    self._count("failed")
+                    if self.on_error is not None:
+                        self.on_error(notification, e)
+                    else:
+                        logger.exception("Failed to process Digiseller notification for invoice %s", invoice)
+            finally:
+                self._queue.task_done()
+
+    def _respond(self, body: bytes, content_type: str, query_string: str) -> int:
+        try:
+            notification = parse_notification(body, content_type, query_string)
+        except (ValueError, TypeError):
+            return 400
+        return self.submit(notification)
+
+    # WSGI
+    def __call__(self, environ, start_response):
+        length = int(environ.get("CONTENT_LENGTH") or 0)
+        body = environ["wsgi.input"].read(length) if length else b""
+        status = self._respond(body, environ.get("CONTENT_TYPE", ""), environ.get("QUERY_STRING", ""))
+        reason = REASONS[status]
+        start_response(f"{status} {reason}", [("Content-Type", "text/plain"), ("Content-Length", str(len(reason)))])
+        return [reason.encode()]
+
+    # ASGI
+    async def asgi(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            while True:
+                message = await receive()
+                if message["type"] == "lifespan.startup":
+                    self.start()
+                    await send({"type": "lifespan.startup.complete"})
+                elif message["type"] == "lifespan.shutdown":
+                    # stop() ожидает завершения потоков - не блокируем цикл событий
+                    await asyncio.get_running_loop().run_in_executor(None, functools.partial(self.stop, drain=False))
+                    await send({"type": "lifespan.shutdown.complete"})
+                    return
+
+        body, more = b"", True
+        while more:
+            message = await receive()
+            body += message.get("body", b"")
+            more = message.get("more_body", False)
+        headers = {k.decode("latin-1").lower(): v.decode("latin-1") for k, v in scope.get("headers", [])}
+        status = self._respond(body, headers.get("content-type", ""), scope.get("query_string", b"").decode("latin-1"))
+        reason = REASONS[status].encode()
+        await send({"type": "http.response.start", "status": status,
+                    "headers": [(b"content-type", b"text/plain"), (b"content-length", str(len(reason)).encode())]})
+        await send({"type": "http.response.body", "body": reason})
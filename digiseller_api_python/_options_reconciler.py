@@ -0,0 +1,174 @@
+from collections import namedtuple
+
+from digiseller_api_python._concurrency import map_concurrent
+from digiseller_api_python._fields import first_value
+from digiseller_api_python._pagination import page_items
+from digiseller_api_python._tracing import set_attributes, span
+
+# Шаг плана: product_id, действие, имя параметра, имя варианта (или None) и данные запроса
+PlanStep = namedtuple("PlanStep", ["product_id", "action", "option", "variant", "data"])
+
+OPTION_ACTIONS = ("option_add", "option_update", "option_delete")
+VARIANT_ACTIONS = ("variant_add", "variant_edit", "variant_delete")
+
+
+def _content(response):
+    if isinstance(response, dict) and isinstance(response.get("content"), dict):
+        return response["content"]
+    return response if isinstance(response, dict) else {}
+
+
+def default_key(item: dict):
+    """Имя параметра или варианта для сопоставления: строка или значение первой локали."""
+    value = first_value(item, ("name", "value", "text", "title"))
+    if isinstance(value, list):
+        value = next((v.get("value") for v in value if isinstance(v, dict)), None)
+    elif isinstance(value, dict):
+        value = value.get("ru-RU") or value.get("en-US") or next(iter(value.values()), None)
+    return value
+
+
+class OptionsReconciler:
+    """
+    Приведение параметров и вариантов товаров к желаемому состоянию минимальным набором запросов.
+
+    Желаемое состояние: {product_id: [{"name": имя, "data": {...поля параметра...},
+    "variants": [{"name": имя, "data": {...поля варианта...}}]}]}.
+    "name" служит только для сопоставления, "data" передается в запросы как есть и сравнивается с текущими полями.
+    Текущее состояние загружается параллельно (products_options_list, затем products_options_info),
+    план выполняется параллельно по товарам; внутри товара параметры изменяются раньше своих вариантов.
+
+    :param api: Экземпляр DigisellerApi
+    :param max_workers: Параллельность загрузки и выполнения
+    :param delete_missing: Удалять параметры и варианты, которых нет в желаемом состоянии
+    :param key: Функция item -> имя для сопоставления текущих параметров и вариантов с желаемыми
+    """
+    ID_KEYS = ("id", "option_id", "variant_id")
+
+    def __init__(self, api, max_workers: int = 8, delete_missing: bool = False, key=default_key):
+        self.api = api
+        self.max_workers = max_workers
+        self.delete_missing = delete_missing
+        self.key = key
+
+    def fetch_state(self, product_ids) -> dict:
+        """Текущее состояние: {product_id: {имя параметра: информация о параметре (с variants)}}."""
+        product_ids = list(product_ids)
+        lists = map_concurrent(self.api.products_options_list, product_ids, max_workers=self.max_workers)
+        option_ids = [(product_id, first_value(option, self.ID_KEYS))
+                      for product_id, response in zip(product_ids, lists) for option in page_items(response)]
+        infos = map_concurrent(lambda pair: self.api.products_options_info(pair[1]), option_ids,
+                               max_workers=self.max_workers)
+
+        state = {product_id: {} for product_id in product_ids}
+        for (product_id, option_id), response in zip(option_ids, infos):
+            info = dict(_content(response))
+            info.setdefault("option_id", option_id)
+            state[product_id][self.key(info)] = info
+        return state
+
+    def _variants(self, info: dict) -> dict:
+        variants = info.get("variants") or []
+        return {self.key(variant): variant for variant in variants if isinstance(variant, dict)}
+
+    def plan(self, desired: dict, state: dict) -> list:
+        """Минимальный план изменений."""
+        steps = []
+        for product_id, options in desired.items():
+            current = state.get(product_id, {})
+            wanted = {option["name"] for option in options}
+            for option in options:
+                name, data = option["name"], option.get("data", {})
+                info = current.get(name)
+                if info is None:
+                    steps.append(PlanStep(product_id, "option_add", name, None, {"product_id": product_id, **data}))
+                    existing = {}
+                else:
+                    option_id = info["option_id"]
+                    if any(info.get(field) != value for field, value in data.items()):
+                        steps.append(PlanStep(product_id, "option_update", name, None, {"option_id": option_id, **data}))
+                    existing = self._variants(info)
+
+                variant_names = set()
+                for variant in option.get("variants", []):
+                    variant_name, variant_data = variant["name"], variant.get("data", {})
+                    variant_names.add(variant_name)
+                    current_variant = existing.get(variant_name)
+                    if current_variant is None:
+                        steps.append(PlanStep(product_id, "variant_add", name, variant_name, variant_data))
+                    elif any(current_variant.get(field) != value for field, value in variant_data.items()):
+                        steps.append(PlanStep(product_id, "variant_edit", name, variant_name,
+                                              {"variant_id": first_value(current_variant, self.ID_KEYS), **variant_data}))
+                if self.delete_missing:
+                    for variant_name, current_variant in existing.items():
+                        if variant_name not in variant_names:
+                            steps.append(PlanStep(product_id, "variant_delete", name, variant_name,
+                                                  {"variant_id": first_value(current_variant, self.ID_KEYS)}))
+
+            if self.delete_missing:
+                for name, info in current.items():
+                    if name not in wanted:
+                        steps.append(PlanStep(product_id, "option_delete", name, None, {"option_id": info["option_id"]}))
+        return steps
+
+    def _execute_product(self, steps, state):
+        """Выполняет шаги одного товара: сначала параметры, затем их варианты."""
+        product_id = steps[0].product_id
+        option_ids = {name: info["option_id"] for name, info in state.get(product_id, {}).items()}
+        failed_options = set()
+        results = []
+
+        for step in sorted(steps, key=lambda s: s.action in VARIANT_ACTIONS):
+            if step.action in VARIANT_ACTIONS and step.option in failed_options:
+                results.append((step, None, "skipped: option step failed"))
+                continue
+            try:
+                response = self._run(step, option_ids)
+            except Exception as e:
+                if step.action in OPTION_ACTIONS:
+                    failed_options.add(step.option)
+                results.append((step, None, e))
+                continue
+            if step.action == "option_add":
+                option_ids[step.option] = first_value(_content(response), self.ID_KEYS)
+            results.append((step, response, None))
+        return results
+
+    def _run(self, step, option_ids):
+        if step.action == "option_add":
+            return self.api.products_options_add(step.data)
+        if step.action == "option_update":
+            return self.api.products_options_update(step.data)
+        if step.action == "option_delete":
+            return self.api.products_options_delete(step.data["option_id"])
+
+        option_id = option_ids.get(step.option)
+        if option_id is None:
+            raise LookupError(f"Option {step.option!r} of product {step.product_id} has no ID")
+        data = {k: v for k, v in step.data.items() if k != "variant_id"}
+        if step.action == "variant_add":
+            return self.api.products_variant_add(option_id, data)
+        if step.action == "variant_edit":
+            return self.api.products_variant_edit(option_id, step.data["variant_id"], data)
+        return self.api.products_variant_delete(option_id, step.data["variant_id"])
+
+    def reconcile(self, desired: dict, dry_run: bool = False) -> dict:
+        """
+        Загружает текущее состояние, строит план и выполняет его.
+
+        :return: {"plan": [PlanStep], "results": [(PlanStep, ответ, ошибка или None)]}
+        """
+        with span(getattr(self.api, "tracer", None), "digiseller.options_reconcile",
+                  {"digiseller.products": len(desired)}) as current:
+            state = self.fetch_state(desired)
+            steps = self.plan(desired, state)
+            set_attributes(current, **{"digiseller.steps": len(steps)})
+            if dry_run or not steps:
+                return {"plan": steps, "results": []}
+
+            by_product = {}
+            for step in steps:
+                by_product.setdefault(step.product_id, []).append(step)
+            per_product = map_concurrent(lambda product_steps: self._execute_product(product_steps, state),
+                                         list(by_product.values()), max_workers=self.max_workers)
+        return {"plan": steps, "results": [result for results in per_product for result in results]}
@@ -0,0 +1,245 @@
+import json
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+
+from digiseller_api_python._exceptions import (
+    DigisellerConnectionError,
+    DigisellerHTTPError,
+    DigisellerTimeoutError,
+    DigisellerUnavailableError
+)
+from digiseller_api_python._rate_limit import RateLimiter
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    key TEXT NOT NULL UNIQUE,
+    method TEXT NOT NULL,
+    args TEXT NOT NULL,
+    kwargs TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_at REAL NOT NULL,
+    created_at REAL NOT NULL,
+    last_error TEXT,
+    result TEXT,
+    order_key TEXT
+);
+CREATE INDEX IF NOT EXISTS outbox_due ON outbox (status, next_at);
+"""
+
+PENDING = "pending"
+DONE = "done"
+FAILED = "failed"
+
+
+def is_retryable(exc: Exception) -> bool:
+    """Временная ошибка, после которой вызов стоит повторить (обслуживание, сеть, тайм-аут, 429, 5xx)."""
+    if isinstance(exc, DigisellerHTTPError):
+        return exc.status_code == 429 or exc.status_code >= 500
+    return isinstance(exc, (DigisellerUnavailableError, DigisellerTimeoutError, DigisellerConnectionError))
+
+
+class Outbox:
+    """
+    Надежная очередь изменяющих вызовов DigisellerApi в локальной базе SQLite (режим WAL).
+
+    enqueue() записывает вызов в журнал и сразу возвращает его ключ; фоновый диспетчер выполняет вызовы
+    в порядке постановки, не чаще rate в секунду. Вызов, ожидающий повтора, задерживает только следующие вызовы
+    с тем же ключом порядка (метод и первый позиционный аргумент или явный order_key), остальные выполняются.
+    Временные ошибки (обслуживание, сеть, тайм-аут, 429, 5xx) повторяются с экспоненциальной задержкой,
+    остальные ошибки и исчерпание попыток переводят вызов в failed.
+    Невыполненные вызовы переживают перезапуск процесса. Ключ идемпотентности отбрасывает повторную
+    постановку того же вызова; доставка - не менее одного раза (вызов, прерванный сбоем процесса, повторяется).
+
+    :param api: Экземпляр DigisellerApi
+    :param path: Путь к файлу базы
+    :param rate: Не более стольких вызовов в секунду (None - без ограничения)
+    :param max_attempts: Сколько раз пробовать вызов
+    :param backoff: Задержка перед первым повтором в секундах, далее удваивается
+    :param max_backoff: Максимальная задержка между повторами
+    :param on_result: Необязательная функция (key, method, result) после успешного вызова
+    :param on_failure: Необязательная функция (key, method, exception) после окончательной ошибки
+    """
+
+    def __init__(self, api, path: str, rate: float = None, max_attempts: int = 10, backoff: float = 1.0,
+                 max_backoff: float = 300.0, on_result=None, on_failure=None):
+        self.api = api
+        self.path = path
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.on_result = on_result
+        self.on_failure = on_failure
+        self._limiter = RateLimiter(rate) if rate else None
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(SCHEMA)
+        if "order_key" not in [column[1] for column in self._db.execute("PRAGMA table_info(outbox)")]:
+            self._db.execute("ALTER TABLE outbox ADD COLUMN order_key TEXT")
+        self._db.execute("CREATE INDEX IF NOT EXISTS outbox_order ON outbox (order_key, status, id)")
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition()
+        self._stopping = False
+        self._thread = None
+
+    def _execute(self, sql: str, arguments=()):
+        with self._lock:
+            return self._db.execute(sql, arguments).fetchall()
+
+    def enqueue(self, method: str, *args, key: str = None, order_key: str = None, **kwargs) -> str:
+        """
+        Ставит вызов api.<method>(*args, **kwargs) в очередь. Аргументы должны сериализоваться в JSON.
+        Если вызов с таким key уже есть в очереди, он не добавляется повторно.
+
+        :param order_key: Вызовы с одинаковым ключом порядка выполняются строго по очереди, даже если
+            предыдущий ожидает повтора. По умолчанию - метод и первый позиционный аргумент (объект изменения)
+        :return: Ключ вызова
+        """
+        if method.startswith("_") or not callable(getattr(self.api, method, None)):
+            raise AttributeError(f"DigisellerApi has no method {method!r}")
+        key = key or uuid.uuid4().hex
+        if order_key is None and args:
+            order_key = json.dumps([method, args[0]], ensure_ascii=False, default=str)
+        now = time.time()
+        self._execute("INSERT OR IGNORE INTO outbox "
+                      "(key, method, args, kwargs, status, next_at, created_at, order_key) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                      (key, method, json.dumps(args, ensure_ascii=False), json.dumps(kwargs, ensure_ascii=False),
+                       PENDING, now, now, order_key))
+        with self._wakeup:
+            self._wakeup.notify()
+        return key
+
+    def status(self, key: str):
+        """Состояние вызова: {"method", "status", "attempts", "last_error", "result"} или None."""
+        rows = self._execute("SELECT method, status, attempts, last_error, result FROM outbox WHERE key = ?", (key,))
+        if not rows:
+            return None
+        row = dict(rows[0])
+        row["result"] = json.loads(row["result"]) if row["result"] is not None else None
+        return row
+
+    def pending(self) -> int:
+        """Количество невыполненных вызовов."""
+        return self._execute("SELECT COUNT(*) FROM outbox WHERE status = ?", (PENDING,))[0][0]
+
+    def failed(self) -> list:
+        """Окончательно неудавшиеся вызовы: [{"key", "method", "attempts", "last_error"}]."""
+        rows = self._execute("SELECT key, method, attempts, last_error FROM outbox WHERE status = ? ORDER BY id",
+                             (FAILED,))
+        return [dict(row) for row in rows]
+
+    def retry_failed(self) -> int:
+        """Возвращает неудавшиеся вызовы в очередь. Возвращает их количество."""
+        with self._lock:
+            count = self._db.execute("UPDATE outbox SET status = ?, attempts = 0, next_at = ? WHERE status = ?",
+                                     (PENDING, time.time(), FAILED)).rowcount
+        with self._wakeup:
+            self._wakeup.notify()
+        return count
+
+    def purge(self, older_than: float = 0) -> int:
+        """Удаляет выполненные вызовы старше older_than секунд. Возвращает их количество."""
+        with self._lock:
+            return self._db.execute("DELETE FROM outbox WHERE status = ? AND created_at <= ?",
+                                    (DONE, time.time() - older_than)).rowcount
+
+    def _next(self):
+        # Из вызовов с одним ключом порядка выполняется только самый ранний, даже если он ждет повтора
+        rows = self._execute("SELECT id, key, method, args, kwargs, attempts, next_at FROM outbox AS o "
+                             "WHERE status = ? AND (order_key IS NULL OR id = (SELECT MIN(id) FROM outbox "
+                             "WHERE status = ? AND order_key = o.order_key)) ORDER BY next_at, id LIMIT 1",
+                             (PENDING, PENDING))
+        return rows[0] if rows else None
+
+    def _dispatch(self, row):
+        if self._limiter is not None:
+            self._limiter.acquire()
+        attempts = row["attempts"] + 1
+        try:
+            result = getattr(self.api, row["method"])(*json.loads(row["args"]), **json.loads(row["kwargs"]))
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            if is_retryable(e) and attempts < self.max_attempts:
+                delay = min(self.max_backoff, self.backoff * 2 ** (attempts - 1))
+                delay = max(delay, getattr(e, "retry_after", 0) or 0)
+                self._execute("UPDATE outbox SET attempts = ?, next_at = ?, last_error = ? WHERE id = ?",
+                              (attempts, time.time() + delay, error, row["id"]))
+                return
+            self._execute("UPDATE outbox SET status = ?, attempts = ?, last_error = ? WHERE id = ?",
+                          (FAILED, attempts, error, row["id"]))
+            self._notify(self.on_failure, row, e)
+            return
+        self._execute("UPDATE outbox SET status = ?, attempts = ?, last_error = NULL, result = ? WHERE id = ?",
+                      (DONE, attempts, json.dumps(result, ensure_ascii=False, default=str), row["id"]))
+        self._notify(self.on_result, row, result)
+
+    @staticmethod
+    def _notify(callback, row, value):
+        if callback is None:
+            return
+        try:
+            callback(row["key"], row["method"], value)
+        except Exception:
+            logger.exception("Outbox callback failed for %s", row["key"])
+
+    def _run(self):
+        while True:
+            # Очередь проверяется под условием, чтобы не пропустить уведомление enqueue()
+            with self._wakeup:
+                if self._stopping:
+                    return
+                row = self._next()
+                wait = None if row is None else row["next_at"] - time.time()
+                if wait is None or wait > 0:
+                    self._wakeup.wait(wait)
+                    continue
+            self._dispatch(row)
+
+    def start(self):
+        """Запускает фоновый диспетчер."""
+        with self._wakeup:
+            if self._thread is not None:
+                return self
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name="digiseller-outbox", daemon=True)
+        self._thread.start()
+        return self
+
+    def drain(self, timeout: float = None) -> bool:
+        """
+        Ожидает, пока не останется невыполненных вызовов (включая ожидающие повтора), но не дольше timeout.
+        Возвращает True, если очередь пуста, False - если время вышло.
+        """
+        finish = None if timeout is None else time.monotonic() + timeout
+        while self.pending():
+            if finish is not None and time.monotonic() >= finish:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def stop(self):
+        """Останавливает диспетчер после текущего вызова; невыполненные вызовы остаются в базе."""
+        with self._wakeup:
+            self._stopping = True
+            self._wakeup.notify_all()
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            thread.join()
+
+    def close(self):
+        self.stop()
+        with self._lock:
+            self._db.close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,72 @@
+import math
+
+from digiseller_api_python._concurrency import map_concurrent
+from digiseller_api_python._exceptions import DigisellerInvalidResponseError
+
+ITEM_KEYS = ("items", "rows", "products", "data", "list")
+PAGES_KEYS = ("total_pages", "totalPages", "pages", "pages_count", "cnt_pages")
+TOTAL_KEYS = ("total_count", "totalCount", "total", "total_items", "totalItems", "cnt_goods")
+
+
+def _content(response):
+    if isinstance(response, dict):
+        retval = response.get("retval")
+        if retval not in (None, 0):
+            raise DigisellerInvalidResponseError(f"Digiseller returned an error: {response.get('retdesc') or response}")
+        if isinstance(response.get("content"), (dict, list)):
+            return response["content"]
+    return response
+
+
+def page_items(response) -> list:
+    """Элементы страницы из ответа Digiseller (список в content/items/rows/...)."""
+    content = _content(response)
+    if isinstance(content, list):
+        return content
+    if isinstance(content, dict):
+        for key in ITEM_KEYS:
+            if isinstance(content.get(key), list):
+                return content[key]
+        if isinstance(response, dict) and response is not content:
+            for key in ITEM_KEYS:
+                if isinstance(response.get(key), list):
+                    return response[key]
+    return []
+
+
+def total_pages(response, page_size: int):
+    """Количество страниц из ответа (напрямую или по общему числу элементов). None, если неизвестно."""
+    for source in (_content(response), response):
+        if not isinstance(source, dict):
+            continue
+        for key in PAGES_KEYS:
+            if isinstance(source.get(key), int):
+                return source[key]
+        for key in TOTAL_KEYS:
+            if isinstance(source.get(key), int):
+                return math.ceil(source[key] / page_size) if page_size else None
+    return None
+
+
+def fetch_all_pages(fetch, page_size: int, max_workers: int = 8, first_page: int = 1) -> list:
+    """
+    Загружает все страницы списка: первая страница определяет их количество, остальные загружаются параллельно.
+    Если количество страниц неизвестно, страницы читаются последовательно до неполной.
+
+    :param fetch: Функция page -> ответ Digiseller
+    """
+    first = fetch(first_page)
+    items = list(page_items(first))
+    pages = total_pages(first, page_size)
+
+    if pages is None:
+        batch, page = items, first_page
+        while batch and len(batch) >= page_size:
+            page += 1
+            batch = page_items(fetch(page))
+            items.extend(batch)
+        return items
+
+    for response in map_concurrent(fetch, range(first_page + 1, first_page + pages), max_workers=max_workers):
+        items.extend(page_items(response))
+    return items
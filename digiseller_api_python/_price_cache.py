@@ -0,0 +1,178 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+from digiseller_api_python._concurrency import map_concurrent
+from digiseller_api_python._tracing import span
+
+
+def _normalize_options(options) -> str:
+    if not options:
+        return "[]"
+    normalized = [json.dumps(option, sort_keys=True, ensure_ascii=False) for option in options]
+    return "[" + ",".join(sorted(normalized)) + "]"
+
+
+def _normalize_currency(currency):
+    """Код валюты в верхнем регистре для ключа кэша (в запрос валюта передается как есть)."""
+    return currency.strip().upper() if isinstance(currency, str) else currency
+
+
+def _is_success(quote) -> bool:
+    # Ответы с ошибкой (retval != 0) не кэшируются
+    return isinstance(quote, dict) and quote.get("retval", 0) == 0
+
+
+def _content(response) -> dict:
+    content = response.get("content") if isinstance(response, dict) else None
+    return content if isinstance(content, dict) else {}
+
+
+def edit_task_id(response):
+    """Идентификатор асинхронной задачи из ответа product_edit_prices или None."""
+    if not isinstance(response, dict):
+        return None
+    return response.get("taskId") or _content(response).get("taskId")
+
+
+def edit_task_finished(response) -> bool:
+    """Задача из ответа product_edit_update_products_tasks_status завершена (все товары обработаны)."""
+    if not _is_success(response):
+        return False
+    status = {str(k).lower(): v for k, v in {**response, **_content(response)}.items()}
+    if str(status.get("status")).lower() in ("completed", "finished", "done", "success"):
+        return True
+    counts = [status.get(name) for name in ("successcount", "errorcount", "totalcount")]
+    return all(isinstance(count, int) for count in counts) and counts[0] + counts[1] >= counts[2]
+
+
+class PriceQuoteCache:
+    """
+    Кэш расчетов цены products_price_calc.
+
+    Ключ - нормализованные (товар, параметры, валюта, сумма, единицы, количество): порядок параметров не важен.
+    Успешный расчет (retval == 0) переиспользуется в течение ttl секунд и сбрасывается, когда через тот же DigisellerApi
+    вызываются change_exchange_rate, методы редактирования цен, товара или его параметров.
+    Пока асинхронная задача product_edit_prices не завершена, расчеты ее товаров не кэшируются: задача
+    считается завершенной, когда product_edit_update_products_tasks_status сообщает об этом, или через edit_timeout секунд.
+    Одновременные запросы одного расчета выполняют один запрос.
+
+    :param ttl: Время жизни расчета в секундах
+    :param max_entries: Максимум расчетов в памяти (вытесняются давно не использованные)
+    :param edit_timeout: Сколько секунд не кэшировать расчеты товаров незавершенной задачи изменения цен
+    """
+
+    def __init__(self, ttl: float = 60, max_entries: int = 10000, edit_timeout: float = 300):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.edit_timeout = edit_timeout
+        self.stats = {"hits": 0, "misses": 0, "invalidations": 0}
+        self._entries = OrderedDict()   # key -> (expires_at, quote)
+        self._inflight = {}
+        self._generation = 0
+        self._product_generation = {}
+        self._editing = {}   # product_id (None - все товары) -> monotonic, до которого не кэшировать
+        self._tasks = {}     # task_id -> product_ids
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(product_id, options, currency, amount, unit_cnt, count) -> tuple:
+        return (int(product_id), _normalize_options(options), _normalize_currency(currency), amount, unit_cnt, count)
+
+    def _generation_of(self, product_id):
+        return self._generation, self._product_generation.get(product_id, 0)
+
+    def _is_editing(self, product_id) -> bool:
+        now = time.monotonic()
+        for key in (product_id, None):
+            until = self._editing.get(key)
+            if until is not None and until <= now:
+                del self._editing[key]
+            elif until is not None:
+                return True
+        return False
+
+    def get(self, key: tuple, loader):
+        """Расчет из кэша или loader() при промахе."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.stats["hits"] += 1
+                return entry[1]
+            self.stats["misses"] += 1
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = Future()
+                generation = self._generation_of(key[0])
+        if not leader:
+            return future.result()
+
+        try:
+            quote = loader()
+        except BaseException as e:
+            with self._lock:
+                self._inflight.pop(key, None)
+            future.set_exception(e)
+            raise
+        with self._lock:
+            self._inflight.pop(key, None)
+            # Расчет, начатый до сброса кэша, не сохраняется
+            if generation == self._generation_of(key[0]) and _is_success(quote) and not self._is_editing(key[0]):
+                self._entries[key] = (time.monotonic() + self.ttl, quote)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        future.set_result(quote)
+        return quote
+
+    def invalidate(self, product_id=None):
+        """Сбрасывает расчеты товара или все расчеты (product_id=None)."""
+        with self._lock:
+            self.stats["invalidations"] += 1
+            if product_id is None:
+                self._generation += 1
+                self._entries.clear()
+                return
+            product_id = int(product_id)
+            self._product_generation[product_id] = self._product_generation.get(product_id, 0) + 1
+            for key in [key for key in self._entries if key[0] == product_id]:
+                del self._entries[key]
+
+    def begin_edit(self, task, product_ids):
+        """Сбрасывает расчеты товаров (None - всех) и не кэширует их, пока задача task не завершится."""
+        keys = [None] if product_ids is None else [int(product_id) for product_id in product_ids]
+        with self._lock:
+            self._tasks[task] = keys
+            until = time.monotonic() + self.edit_timeout
+            for key in keys:
+                self._editing[key] = max(until, self._editing.get(key, 0))
+        for key in keys:
+            self.invalidate(key)
+
+    def end_edit(self, task):
+        """Задача изменения цен завершена: расчеты ее товаров сбрасываются и снова кэшируются."""
+        with self._lock:
+            keys = self._tasks.pop(task, None)
+            if keys is None:
+                return
+            # Товар может входить в другую незавершенную задачу
+            busy = {key for other in self._tasks.values() for key in other}
+            for key in keys:
+                if key not in busy:
+                    self._editing.pop(key, None)
+        for key in keys:
+            self.invalidate(key)
+
+    def warm(self, api, product_id: int, option_sets, currency: str, amount=None, unit_cnt=None, count: int = 1,
+             max_workers: int = 8) -> list:
+        """Параллельно рассчитывает цены для частых комбинаций параметров. Ошибки возвращаются на месте расчетов."""
+        option_sets = list(option_sets)
+        with span(getattr(api, "tracer", None), "digiseller.price_cache.warm",
+                  {"digiseller.product_id": product_id, "digiseller.items": len(option_sets)}):
+            return map_concurrent(
+                lambda options: api.products_price_calc(product_id, options, currency, amount, unit_cnt, count),
+                option_sets, max_workers=max_workers, return_exceptions=True)
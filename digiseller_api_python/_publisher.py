@@ -0,0 +1,196 @@
+import contextvars
+import json
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from digiseller_api_python._exceptions import DigisellerInvalidResponseError
+from digiseller_api_python._tracing import set_attributes, span
+
+# Шаги публикации товара и их зависимости
+STEPS = {
+    "create": (),
+    "images": ("create",),
+    "videos": ("create",),
+    "content_text": ("create",),
+    "content_files": ("create",),
+    "categories": ("create",),
+    "enable": ("images", "videos", "content_text", "content_files", "categories"),
+}
+PRODUCT_ID_KEYS = ("product_id", "id", "id_goods")
+CLONE_DEFAULTS = {"count": 1, "categories": True, "notify": False, "discounts": True, "options": True,
+                  "commissions": True, "gallery": False}
+
+
+def _product_id(response):
+    content = response.get("content", response) if isinstance(response, dict) else response
+    if isinstance(content, list) and content:
+        content = content[0]
+    if isinstance(content, dict):
+        for key in PRODUCT_ID_KEYS:
+            if content.get(key) not in (None, ""):
+                return content[key]
+    if isinstance(content, int) and not isinstance(content, bool):
+        return content
+    raise LookupError(f"Product ID not found in the response: {str(response)[:300]}")
+
+
+def _check(response):
+    # Ошибка Digiseller в теле ответа с кодом 200
+    if isinstance(response, dict) and response.get("retval") not in (None, 0):
+        raise DigisellerInvalidResponseError(f"Digiseller returned an error: {response.get('retdesc') or response.get('errors') or response}")
+    return response
+
+
+class ProductPublisher:
+    """
+    Параллельная публикация товаров: шаги каждого товара выполняются как граф зависимостей.
+
+    Товар создается (product_create_<type> или product_clone), затем параллельно загружаются изображения,
+    видео, текстовое и файловое содержимое и добавляются категории платформ, после чего product_edit_base
+    включает продажи. Шаги разных товаров выполняются в общем пуле, поэтому через конвейер одновременно
+    проходит много товаров. Завершенные шаги и отдельные элементы многоэлементных шагов (содержимое, категории) записываются в журнал,
+    и повторный запуск продолжает с места остановки, не добавляя уже загруженное повторно.
+
+    Описание товара:
+        {"key": "уникальный ключ",
+         "create": {"type": "uniquefixed", "data": {...}} или "clone": {"product_id": 1, ...аргументы product_clone},
+         "images": {...files}, "videos": [url], "content_text": [{...data}], "content_files": [{...file}],
+         "categories": [category_id], "enable": {...data product_edit_base}}
+    Необязательные шаги без данных пропускаются.
+
+    :param api: Экземпляр DigisellerApi
+    :param max_workers: Сколько шагов выполнять одновременно
+    :param journal: Путь к JSONL-журналу завершенных шагов (None - без возобновления)
+    """
+
+    def __init__(self, api, max_workers: int = 16, journal: str = None):
+        self.api = api
+        self.max_workers = max_workers
+        self.journal = journal
+        self._journal_lock = threading.Lock()
+
+    def _load_journal(self) -> dict:
+        done = {}
+        if self.journal is None:
+            return done
+        try:
+            with open(self.journal, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue   # Незавершенная последняя строка после сбоя
+                    state = done.setdefault(record["key"], {"product_id": None, "steps": set(), "items": {}})
+                    if record.get("item") is None:
+                        state["steps"].add(record["step"])
+                    else:
+                        state["items"].setdefault(record["step"], set()).add(record["item"])
+                    if record.get("product_id") is not None:
+                        state["product_id"] = record["product_id"]
+        except OSError:
+            pass
+        return done
+
+    def _record(self, key, step, product_id, item: int = None):
+        if self.journal is None:
+            return
+        record = {"key": key, "step": step, "product_id": product_id}
+        if item is not None:
+            record["item"] = item
+        line = json.dumps(record, ensure_ascii=False)
+        with self._journal_lock, open(self.journal, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+    def _run_items(self, key, step, product_id, items, done, call):
+        # Каждый элемент записывается в журнал сразу: после сбоя посреди шага он не добавляется повторно
+        for index, item in enumerate(items):
+            if index in done:
+                continue
+            _check(call(item))
+            self._record(key, step, product_id, item=index)
+
+    def _run_step(self, spec: dict, step: str, product_id, done_items=()):
+        api = self.api
+        key = spec["key"]
+        if step == "create":
+            if "clone" in spec:
+                clone = dict(spec["clone"])
+                return _product_id(_check(api.product_clone(clone.pop("product_id"), **{**CLONE_DEFAULTS, **clone})))
+            create = spec["create"]
+            return _product_id(_check(getattr(api, f"product_create_{create['type']}")(create["data"])))
+        if step == "images":
+            _check(api.product_preview_add_images(product_id, spec["images"]))
+        elif step == "videos":
+            _check(api.product_preview_add_videos(product_id, spec["videos"]))
+        elif step == "content_text":
+            self._run_items(key, step, product_id, spec["content_text"], done_items,
+                            lambda data: api.product_content_add_text({"product_id": product_id, **data}))
+        elif step == "content_files":
+            self._run_items(key, step, product_id, spec["content_files"], done_items,
+                            lambda file: api.product_content_add_file(product_id, file))
+        elif step == "categories":
+            self._run_items(key, step, product_id, spec["categories"], done_items,
+                            lambda category_id: api.product_platform_category_add(product_id, category_id))
+        elif step == "enable":
+            _check(api.product_edit_base(product_id, spec["enable"]))
+        return product_id
+
+    def publish(self, specs) -> dict:
+        """
+        Публикует товары и возвращает отчет:
+        {key: {"product_id", "status": "published" | "failed", "steps": {шаг: "done" | "skipped" | "failed" | "blocked"},
+               "errors": {шаг: текст ошибки}}}
+        """
+        specs = {spec["key"]: spec for spec in specs}
+        journal = self._load_journal()
+        report, done_items = {}, {}
+        for key, spec in specs.items():
+            state = journal.get(key, {"product_id": None, "steps": set(), "items": {}})
+            steps = {step: "done" if step in state["steps"] else
+                     ("pending" if step == "create" or spec.get(step) else "skipped") for step in STEPS}
+            report[key] = {"product_id": state["product_id"], "status": None, "steps": steps, "errors": {}}
+            done_items[key] = state["items"]
+
+        def ready(key):
+            steps = report[key]["steps"]
+            return [step for step, status in steps.items() if status == "pending" and
+                    all(steps[dependency] in ("done", "skipped") for dependency in STEPS[step])]
+
+        with span(getattr(self.api, "tracer", None), "digiseller.publisher.publish",
+                  {"digiseller.products": len(specs)}) as current, \
+                ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            running = {}
+
+            def schedule(key):
+                for step in ready(key):
+                    report[key]["steps"][step] = "running"
+                    future = pool.submit(contextvars.copy_context().run, self._run_step, specs[key], step,
+                                         report[key]["product_id"], done_items[key].get(step, ()))
+                    running[future] = (key, step)
+
+            for key in specs:
+                schedule(key)
+            while running:
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    key, step = running.pop(future)
+                    entry = report[key]
+                    try:
+                        product_id = future.result()
+                    except Exception as e:
+                        entry["steps"][step] = "failed"
+                        entry["errors"][step] = f"{type(e).__name__}: {e}"
+                        continue
+                    entry["steps"][step] = "done"
+                    if step == "create":
+                        entry["product_id"] = product_id
+                    self._record(key, step, entry["product_id"])
+                    schedule(key)
+
+            for entry in report.values():
+                for step, status in entry["steps"].items():
+                    if status == "pending":
+                        entry["steps"][step] = "blocked"
+                entry["status"] = "failed" if entry["errors"] or "blocked" in entry["steps"].values() else "published"
+            set_attributes(current, **{"digiseller.failed": sum(e["status"] == "failed" for e in report.values())})
+        return report
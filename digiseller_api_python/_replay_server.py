@@ -0,0 +1,158 @@
+import json
+import random
+import threading
+import time
+from collections import Counter, defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+from digiseller_api_python._cassette import load_cassette, entry_body
+from digiseller_api_python._request_handler import _endpoint_template
+
+MAINTENANCE_PAGES = (
+    "<html><body><h1>Digiseller UPDATING</h1></body></html>",
+    "<html><body><p>Digiseller is experiencing an unscheduled maintenance work</p></body></html>",
+)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def _handle(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if length:
+            self.rfile.read(length)
+        self.server.replay._serve(self)
+
+    do_GET = do_POST = do_PUT = do_DELETE = _handle
+
+    def log_message(self, format, *args):
+        pass
+
+
+class ReplayServer:
+    """
+    Локальная замена Digiseller, отдающая ответы из кассеты Recorder.
+
+    Запросы принимаются по адресу http://127.0.0.1:<port>/<хост digiseller>/<путь>,
+    готовое соответствие хостов для DigisellerApi(base_urls=...) доступно в свойстве base_urls.
+
+    :param cassette: Путь к кассете или список записей
+    :param latency: Задержка ответа в секундах. None - задержка из записи
+    :param jitter: Случайная добавка к задержке (0..jitter секунд)
+    :param speed: Ускорение воспроизведения: задержки делятся на speed
+    :param faults: Доли внедряемых ошибок, например {"maintenance": 0.05, "timeout": 0.01, "auth": 0.01}
+    :param hang: Сколько секунд "висеть" при внедрении тайм-аута
+    """
+    HOSTS = ("api.digiseller.ru", "shop.digiseller.ru", "graph.digiseller.ru")
+    FAULTS = ("maintenance", "timeout", "auth")
+
+    def __init__(self, cassette, latency: float = None, jitter: float = 0.0, speed: float = 1.0,
+                 faults: dict = None, hang: float = 65.0, seed: int = None, host: str = "127.0.0.1", port: int = 0):
+        entries = load_cassette(cassette) if isinstance(cassette, str) else list(cassette)
+        unknown = set(faults or {}) - set(self.FAULTS)
+        if unknown:
+            raise ValueError(f"Unknown fault types: {', '.join(sorted(unknown))}")
+
+        self.latency = latency
+        self.jitter = jitter
+        self.speed = speed
+        self.faults = dict(faults or {})
+        self.hang = hang
+        self.stats = Counter()
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._cursors = Counter()
+        self._exact = defaultdict(list)
+        self._templates = defaultdict(list)
+        for entry in entries:
+            self._exact[(entry["method"], entry["host"], entry["path"])].append(entry)
+            self._templates[(entry["method"], entry["host"], _endpoint_template(entry["path"]))].append(entry)
+
+        self._server = ThreadingHTTPServer((host, port), _Handler)
+        self._server.daemon_threads = True
+        self._server.replay = self
+        self._thread = None
+
+    @property
+    def address(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def base_urls(self) -> dict:
+        return {f"https://{host}": f"{self.address}/{host}" for host in self.HOSTS}
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _pick(self, method, host, path):
+        for index, key in ((self._exact, (method, host, path)),
+                           (self._templates, (method, host, _endpoint_template(path)))):
+            candidates = index.get(key)
+            if candidates:
+                with self._lock:
+                    cursor = self._cursors[key]
+                    self._cursors[key] += 1
+                return candidates[cursor % len(candidates)]
+        return None
+
+    def _roll_fault(self):
+        with self._lock:
+            roll = self._random.random()
+            jitter = self._random.uniform(0, self.jitter) if self.jitter else 0.0
+        for name in self.FAULTS:
+            share = self.faults.get(name, 0)
+            if roll < share:
+                return name, jitter
+            roll -= share
+        return None, jitter
+
+    def _serve(self, handler):
+        host, _, path = urlsplit(handler.path).path.lstrip("/").partition("/")
+        path = "/" + path
+        fault, jitter = self._roll_fault()
+
+        if fault == "timeout":
+            self.stats["timeout"] += 1
+            time.sleep(self.hang)
+            handler.close_connection = True
+            return
+
+        entry = self._pick(handler.command, host, path)
+        delay = self.latency if self.latency is not None else (entry or {}).get("elapsed", 0.0)
+        time.sleep(max(0.0, (delay + jitter) / self.speed))
+
+        if fault == "maintenance":
+            status, content_type = 503, "text/html; charset=utf-8"
+            body = self._random.choice(MAINTENANCE_PAGES).encode()
+        elif fault == "auth":
+            status, content_type, body = 401, "application/json", b'{"retval": -1, "retdesc": "Unauthorized"}'
+        elif entry is None:
+            fault = "miss"
+            status, content_type = 404, "application/json"
+            body = json.dumps({"retval": -1, "retdesc": f"Not recorded: {handler.command} {host}{path}"}).encode()
+        else:
+            fault = "hit"
+            status, content_type, body = entry["status"], entry["content_type"], entry_body(entry)
+
+        self.stats[fault] += 1
+        handler.send_response(status)
+        if status != 204:
+            handler.send_header("Content-Type", content_type)
+        handler.send_header("Content-Length", str(len(body) if status != 204 else 0))
+        handler.end_headers()
+        if status != 204:
+            handler.wfile.write(body)
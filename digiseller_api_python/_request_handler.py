@@ -1,5 +1,10 @@
-import httpx
+import functools
+import importlib.util
 import json
+import re
+import time
+from contextlib import contextmanager, nullcontext
+from urllib.parse import urlsplit
 from ._exceptions import (
     DigisellerError,
     DigisellerTimeoutError,
@@ -7,16 +12,68 @@ from ._exceptions import (
     DigisellerHTTPError,
     DigisellerUnavailableError,
     DigisellerAPIAuthError,
-    DigisellerProxyError
+    DigisellerProxyError,
+    DigisellerConnectionError
 )
+from ._json_stream import iter_json_items
+from ._tracing import http_span, set_attributes, span
 
 
-def send_request(method, url: str, timeout: int = 60, proxy: str = None, **kwargs):
+def _endpoint_template(path: str) -> str:
+    """Шаблон эндпоинта: сегменты пути с цифрами заменяются на {}."""
+    return '/'.join('{}' if re.search(r'\d', part) else part for part in path.split('/'))
 
+
+def _span_endpoint(tracer, endpoint, url):
+    # Шаблон нужен только для атрибутов спана: без трассировщика он не вычисляется
+    if tracer is None:
+        return None
+    return endpoint or _endpoint_template(urlsplit(url).path)
+
+
+@functools.lru_cache(maxsize=None)
+def _accept_encoding() -> str:
+    # br и zstd объявляются, только если установлены декодеры (pip install digiseller-api-python[compression])
+    encodings = ["gzip", "deflate"]
+    if any(importlib.util.find_spec(name) for name in ("brotli", "brotlicffi")):
+        encodings.append("br")
+    import httpx
+    httpx_version = tuple(int(part) for part in re.findall(r"\d+", httpx.__version__)[:3])
+    if httpx_version >= (0, 27, 1) and importlib.util.find_spec("zstandard"):
+        encodings.append("zstd")
+    return ", ".join(encodings)
+
+
+def create_client(proxy: str = None, max_connections: int = 100) -> "httpx.Client":
+    """Общий клиент с пулом соединений; тайм-аут передается в каждый запрос."""
+    # httpx импортируется при создании первого клиента, а не при импорте пакета
+    import httpx
+    limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+    return httpx.Client(proxy=proxy, limits=limits)
+
+
+def check_proxy(client: "httpx.Client", url: str, timeout: float) -> float:
+    """Проверочный запрос через прокси клиента: любой HTTP-ответ - успех. Возвращает время ответа."""
+    with _translate_errors():
+        started = time.monotonic()
+        client.get(url, timeout=timeout)
+        return time.monotonic() - started
+
+
+def _client_scope(client, timeout, proxy):
+    # Общий клиент не закрывается после запроса, временный - закрывается
+    if client is not None:
+        return nullcontext(client)
+    import httpx
+    return httpx.Client(timeout=timeout, proxy=proxy)
+
+
+def _prepare_headers(kwargs):
     default_headers = {"Accept": "application/json, application/xml;q=0.9, text/xml;q=0.8, */*;q=0.7"}
 
     if 'files' in kwargs:
         default_headers = {'Accept': 'application/json'}
+    default_headers["Accept-Encoding"] = _accept_encoding()
 
     # Инициализируем заголовки, если их нет, или дополняем существующие
     if 'headers' not in kwargs:
@@ -25,79 +82,153 @@ def send_request(method, url: str, timeout: int = 60, proxy: str = None, **kwarg
         for key, value in default_headers.items():
             kwargs['headers'].setdefault(key, value)
 
+
+@contextmanager
+def _translate_errors():
+    import httpx
     try:
-        with httpx.Client(timeout=timeout, proxy=proxy) as client:
-            #print(f'Sending request to {url}...')
-            response = client.request(method, url, **kwargs)
-            content_type = response.headers.get("Content-Type", "")
+        yield
+
+    except httpx.TimeoutException as e:
+        phase = {httpx.ConnectTimeout: "connect", httpx.ReadTimeout: "read", httpx.WriteTimeout: "write",
+                 httpx.PoolTimeout: "pool"}.get(type(e))
+        raise DigisellerTimeoutError("The exceeded response time from Digiseller.", phase)
+
+    except httpx.ProxyError as e:
+        raise DigisellerProxyError(f"Proxy error: {e}")
 
-            if response.status_code in (401, 403):
-                raise DigisellerAPIAuthError(
-                    "Access denied. Check your API key access permissions and try again..")
+    except httpx.RequestError as e:
+        raise DigisellerConnectionError(f"Error when performing a request to {e.request.url}: {e}")
 
-            elif response.status_code in (200, 400):
-                #print(f"Received a {response.status_code} response from Digiseller. {response.url}")
 
-                # Обработка JSON ответа
-                if content_type.startswith("application/json"):
-                    try:
-                        return response.json()
-                    except json.JSONDecodeError as e:
-                        raise DigisellerInvalidResponseError(f"Json decoding error: {e}. Data: {response.text}")
+def _handle_response(response):
+    content_type = response.headers.get("Content-Type", "")
 
-                # Обработка XML
-                elif content_type.startswith(("application/xml", "text/xml")):
-                    return response.text
+    if response.status_code in (401, 403):
+        raise DigisellerAPIAuthError(
+            "Access denied. Check your API key access permissions and try again..")
 
-                # Обработка изображений
-                elif content_type.startswith("image/"):
-                    return response.content
+    elif response.status_code in (200, 400):
+        #print(f"Received a {response.status_code} response from Digiseller. {response.url}")
 
-                # HTML ловим
-                elif content_type.startswith("text/html"):
-                    raise DigisellerInvalidResponseError(
-                        f"Received unexpected HTML content. "
-                        f"Check the URL and parameters. Preview:\n{response.text[:300]}"
-                    )
+        # Обработка JSON ответа
+        if content_type.startswith("application/json"):
+            try:
+                return response.json()
+            except json.JSONDecodeError as e:
+                raise DigisellerInvalidResponseError(f"Json decoding error: {e}. Data: {response.text}")
 
-                # Всё остальное
-                elif response.text:
-                    return response.text
+        # Обработка XML
+        elif content_type.startswith(("application/xml", "text/xml")):
+            return response.text
 
-                else:
-                    return response.status_code
+        # Обработка изображений
+        elif content_type.startswith("image/"):
+            return response.content
 
-            elif response.status_code == 204:
-                return {"success": True}
+        # HTML ловим
+        elif content_type.startswith("text/html"):
+            raise DigisellerInvalidResponseError(
+                f"Received unexpected HTML content. "
+                f"Check the URL and parameters. Preview:\n{response.text[:300]}"
+            )
 
-            else:
-                # Сервер вернул HTML
-                if content_type.startswith("text/html"):
-                    text = response.text.strip()
-
-                    if any(keyword in text for keyword in ("Digiseller UPDATING", "404 - File or directory not found", "Server Error", "Digiseller is experiencing an unscheduled maintenance work")):
-                        raise DigisellerUnavailableError(
-                            f"Digiseller is likely undergoing maintenance.\n"
-                            f"Response code: {response.status_code}\n"
-                            f"URL: {response.url}\n"
-                            f"Preview:\n{text[:300]}"
-                        )
-                    else:
-                        raise DigisellerInvalidResponseError(
-                            f"An unexpected HTML response was received. Perhaps the path or parameters are incorrect.\n"
-                            f"Response code: {response.status_code}\n"
-                            f"URL: {response.url}\n"
-                            f"Preview:\n{text[:300]}"
-                        )
-
-                # Если не HTML
-                raise DigisellerHTTPError(response.status_code, response.text)
-
-    except httpx.TimeoutException:
-        raise DigisellerTimeoutError("The exceeded response time from Digiseller.")
+        # Всё остальное
+        elif response.text:
+            return response.text
 
-    except httpx.ProxyError as e:
-        raise DigisellerProxyError(f"Proxy error: {e}")
+        else:
+            return response.status_code
 
-    except httpx.RequestError as e:
-        raise DigisellerError(f"Error when performing a request to {e.request.url}: {e}")
\ No newline at end of file
+    elif response.status_code == 204:
+        return {"success": True}
+
+    else:
+        # Сервер вернул HTML
+        if content_type.startswith("text/html"):
+            text = response.text.strip()
+
+            if any(keyword in text for keyword in ("Digiseller UPDATING", "404 - File or directory not found", "Server Error", "Digiseller is experiencing an unscheduled maintenance work")):
+                raise DigisellerUnavailableError(
+                    f"Digiseller is likely undergoing maintenance.\n"
+                    f"Response code: {response.status_code}\n"
+                    f"URL: {response.url}\n"
+                    f"Preview:\n{text[:300]}"
+                )
+            else:
+                raise DigisellerInvalidResponseError(
+                    f"An unexpected HTML response was received. Perhaps the path or parameters are incorrect.\n"
+                    f"Response code: {response.status_code}\n"
+                    f"URL: {response.url}\n"
+                    f"Preview:\n{text[:300]}"
+                )
+
+        # Если не HTML
+        raise DigisellerHTTPError(response.status_code, response.text)
+
+
+def _trace_response(current, response):
+    set_attributes(current, **{
+        "http.response.status_code": response.status_code,
+        "http.request.body.size": int(response.request.headers.get("Content-Length", 0)),
+        "http.response.header.content-encoding": response.headers.get("Content-Encoding"),
+    })
+
+
+def send_request(method, url: str, timeout: int = 60, proxy: str = None, recorder=None, tracer=None,
+                 endpoint: str = None, client=None, logical_url: str = None, **kwargs):
+    """:param logical_url: Адрес до подмены base_urls, под которым запрос записывается в кассету"""
+    _prepare_headers(kwargs)
+    endpoint = _span_endpoint(tracer, endpoint, url)
+
+    with http_span(tracer, method, endpoint, url, kwargs) as current:
+        with _translate_errors():
+            with _client_scope(client, timeout, proxy) as http:
+                #print(f'Sending request to {url}...')
+                started = time.monotonic()
+                response = http.request(method, url, timeout=timeout, **kwargs)
+                if recorder is not None:
+                    recorder.record(method, logical_url or url, kwargs, response, time.monotonic() - started)
+        if current is None:
+            return _handle_response(response)
+        _trace_response(current, response)
+        with span(tracer, "digiseller.decode", {"digiseller.endpoint": endpoint,
+                                                 "http.response.body.size": len(response.content),
+                                                 "http.response.content_type": response.headers.get("Content-Type")}):
+            return _handle_response(response)
+
+
+def stream_request(method, url: str, timeout: int = 60, proxy: str = None, item_key: str = None, tracer=None,
+                   endpoint: str = None, client=None, **kwargs):
+    """
+    Потоковый вариант send_request для больших списков: генератор элементов JSON-массива,
+    которые разбираются по мере получения тела ответа (см. iter_json_items).
+    Ответы, которые нельзя разобрать потоково (ошибки, не JSON), обрабатываются как в send_request.
+    """
+    _prepare_headers(kwargs)
+
+    with http_span(tracer, method, _span_endpoint(tracer, endpoint, url), url, kwargs) as current, _translate_errors():
+        with _client_scope(client, timeout, proxy) as http:
+            with http.stream(method, url, timeout=timeout, **kwargs) as response:
+                if current is not None:
+                    _trace_response(current, response)
+                content_type = response.headers.get("Content-Type", "")
+                if response.status_code == 200 and content_type.startswith("application/json"):
+                    try:
+                        yield from iter_json_items(response.iter_bytes(), item_key)
+                    except json.JSONDecodeError as e:
+                        raise DigisellerInvalidResponseError(f"Json decoding error: {e}")
+                    return
+
+                response.read()
+                result = _handle_response(response)
+                if isinstance(result, list):
+                    yield from result
+                    return
+                if isinstance(result, dict):
+                    lists = [value for name, value in result.items()
+                             if isinstance(value, list) and (item_key is None or name == item_key)]
+                    if lists:
+                        yield from lists[0]
+                        return
+                raise DigisellerInvalidResponseError(f"The response does not contain a list of items: {str(result)[:300]}")
@@ -0,0 +1,158 @@
+import contextvars
+import json
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from digiseller_api_python._fields import first_value, parse_date
+from digiseller_api_python._pagination import page_items
+from digiseller_api_python._tracing import span
+
+ID_KEYS = ("id", "review_id", "id_review")
+DATE_KEYS = ("date", "date_crt", "date_add", "created")
+REVIEW_LIST_KEYS = ("review", "reviews")
+
+
+def _page_reviews(response) -> list:
+    items = page_items(response)
+    if not items and isinstance(response, dict):
+        content = response.get("content") if isinstance(response.get("content"), dict) else response
+        items = next((content[key] for key in REVIEW_LIST_KEYS if isinstance(content.get(key), list)), [])
+    return [item for item in items if isinstance(item, dict)]
+
+
+class ReviewsCrawler:
+    """
+    Параллельный инкрементальный сбор отзывов о товарах через product_reviews.
+
+    Для каждого товара запоминается самый новый увиденный отзыв (ID и дата). Следующий обход читает
+    страницы товара от новых отзывов к старым и останавливается на первом уже увиденном отзыве
+    (или на отзыве старше запомненного), поэтому обычно загружается одна страница на товар.
+
+    :param api: Экземпляр DigisellerApi
+    :param seller_id: ID продавца
+    :param path: JSON-файл для хранения отметок между запусками (None - только в памяти)
+    :param rows: Отзывов на странице
+    :param type_: Тип отзывов (параметр type product_reviews)
+    :param owner_id: Параметр owner_id product_reviews
+    :param lang: Язык ответа
+    :param max_workers: Сколько товаров обходить параллельно
+    :param max_pages: Ограничение страниц на товар (например, для первого обхода)
+    """
+
+    def __init__(self, api, seller_id: int, path: str = None, rows: int = 50, type_: str = "all", owner_id: int = None,
+                 lang: str = "ru-RU", max_workers: int = 16, max_pages: int = None):
+        self.api = api
+        self.seller_id = seller_id
+        self.path = path
+        self.rows = rows
+        self.type_ = type_
+        self.owner_id = owner_id
+        self.lang = lang
+        self.max_workers = max_workers
+        self.max_pages = max_pages
+        self.stats = {"products": 0, "pages": 0, "new": 0}
+        self._watermarks = {}   # str(product_id) -> {"id": ..., "date": ...}
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        if self.path is None:
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self._watermarks = json.load(f)
+        except (OSError, ValueError):
+            return
+
+    def save(self):
+        """Сохраняет отметки в файл path."""
+        if self.path is None:
+            return
+        with self._lock:
+            watermarks = dict(self._watermarks)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(self.path)), suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(watermarks, f)
+        os.replace(tmp, self.path)
+
+    def watermark(self, product_id):
+        """Самый новый увиденный отзыв товара: {"id", "date"} или None."""
+        with self._lock:
+            return self._watermarks.get(str(product_id))
+
+    def _is_seen(self, review: dict, watermark) -> bool:
+        if watermark is None:
+            return False
+        review_id = first_value(review, ID_KEYS)
+        if review_id is not None and str(review_id) == str(watermark["id"]):
+            return True
+        date, seen_date = parse_date(first_value(review, DATE_KEYS)), parse_date(watermark.get("date"))
+        return date is not None and seen_date is not None and date < seen_date
+
+    def fetch_new(self, product_id) -> list:
+        """Новые отзывы товара (от новых к старым) без сдвига отметки."""
+        watermark = self.watermark(product_id)
+        new, page = [], 1
+        while self.max_pages is None or page <= self.max_pages:
+            reviews = _page_reviews(self.api.product_reviews(self.seller_id, product_id, self.type_, self.owner_id,
+                                                             page, self.rows, self.lang))
+            self._count("pages")
+            for review in reviews:
+                if self._is_seen(review, watermark):
+                    return new
+                new.append(review)
+            if len(reviews) < self.rows:
+                break
+            page += 1
+        return new
+
+    def _count(self, name, value=1):
+        with self._lock:
+            self.stats[name] += value
+
+    def _advance(self, product_id, new: list):
+        if not new:
+            return
+        newest = new[0]
+        with self._lock:
+            self._watermarks[str(product_id)] = {"id": first_value(newest, ID_KEYS), "date": first_value(newest, DATE_KEYS)}
+
+    def crawl(self, product_ids):
+        """
+        Обходит товары параллельно и выдает (product_id, отзыв) для новых отзывов по мере готовности товаров.
+        Отметка товара сдвигается после выдачи всех его новых отзывов, файл отметок сохраняется в конце обхода.
+        Ошибка загрузки товара пробрасывается после того, как уже загруженные товары выданы.
+        """
+        product_ids = list(product_ids)
+        if not product_ids:
+            return
+        error, futures = None, {}
+        pool = ThreadPoolExecutor(max_workers=min(self.max_workers, len(product_ids)))
+        try:
+            # Загрузки товаров - дочерние спаны обхода (контекст копируется при постановке в пул)
+            with span(getattr(self.api, "tracer", None), "digiseller.reviews.crawl",
+                      {"digiseller.products": len(product_ids)}):
+                futures = {pool.submit(contextvars.copy_context().run, self.fetch_new, product_id): product_id
+                           for product_id in product_ids}
+            for future in as_completed(futures):
+                product_id = futures[future]
+                try:
+                    new = future.result()
+                except Exception as e:
+                    error = error or e
+                    continue
+                for review in new:
+                    yield product_id, review
+                self._count("products")
+                self._count("new", len(new))
+                self._advance(product_id, new)
+        finally:
+            # Если обход прерван, еще не начатые товары не загружаются
+            for future in futures:
+                future.cancel()
+            pool.shutdown(wait=True)
+            self.save()
+        if error is not None:
+            raise error
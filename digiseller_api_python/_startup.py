@@ -0,0 +1,74 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from digiseller_api_python._replay_server import ReplayServer
+from digiseller_api_python._stats import percentile
+
+# Замер в отдельном процессе: импорт пакета, создание клиента и первый вызов с холодного старта
+_CHILD = r"""
+import json, sys, time
+started = time.perf_counter()
+import digiseller_api_python
+imported = time.perf_counter()
+httpx_on_import = "httpx" in sys.modules
+api = digiseller_api_python.DigisellerApi("1", "startup-benchmark", base_urls=json.loads(sys.argv[1]),
+                                          token_cache=sys.argv[2] or None)
+constructed = time.perf_counter()
+httpx_on_construct = "httpx" in sys.modules
+api.purchase_info(1)
+called = time.perf_counter()
+print(json.dumps({"import": imported - started, "construct": constructed - imported, "first_call": called - constructed,
+                  "httpx_on_import": httpx_on_import, "httpx_on_construct": httpx_on_construct}))
+"""
+
+STARTUP_CASSETTE = [
+    {"method": "POST", "host": "api.digiseller.ru", "path": "/api/apilogin", "query": {}, "status": 200,
+     "content_type": "application/json; charset=utf-8", "encoding": "text", "elapsed": 0.0,
+     "body": json.dumps({"retval": 0, "token": "startup-benchmark-token"})},
+    {"method": "GET", "host": "api.digiseller.ru", "path": "/api/purchase/info/1", "query": {}, "status": 200,
+     "content_type": "application/json; charset=utf-8", "encoding": "text", "elapsed": 0.0,
+     "body": json.dumps({"retval": 0, "content": {"invoice_id": 1}})},
+]
+
+
+def _run_child(base_urls: dict, token_cache: str) -> dict:
+    output = subprocess.run([sys.executable, "-c", _CHILD, json.dumps(base_urls), token_cache or ""],
+                            check=True, capture_output=True, text=True).stdout
+    return json.loads(output)
+
+
+def measure_startup(repeat: int = 5, latency: float = None) -> dict:
+    """
+    Замеряет холодный старт в новых процессах Python: импорт пакета, создание DigisellerApi
+    и первый вызов (purchase_info) к локальному ReplayServer - с получением токена и с токеном из token_cache.
+
+    :param repeat: Количество процессов для каждого варианта
+    :param latency: Задержка ответов ReplayServer в секундах (None - как в кассете, без задержки)
+    :return: {"import", "construct", "first_call", "first_call_cached_token"} - медианы в секундах,
+        {"httpx_on_import", "httpx_on_construct"} - загружался ли httpx до первого вызова
+    """
+    with ReplayServer(STARTUP_CASSETTE, latency=latency) as server, tempfile.TemporaryDirectory() as directory:
+        cold = [_run_child(server.base_urls, None) for _ in range(repeat)]
+        token_cache = os.path.join(directory, "tokens.json")
+        _run_child(server.base_urls, token_cache)
+        warm = [_run_child(server.base_urls, token_cache) for _ in range(repeat)]
+
+    def median(runs, key):
+        return percentile([run[key] for run in runs], 50)
+    return {
+        "import": median(cold + warm, "import"),
+        "construct": median(cold + warm, "construct"),
+        "first_call": median(cold, "first_call"),
+        "first_call_cached_token": median(warm, "first_call"),
+        "httpx_on_import": any(run["httpx_on_import"] for run in cold + warm),
+        "httpx_on_construct": any(run["httpx_on_construct"] for run in cold + warm),
+    }
+
+
+if __name__ == "__main__":
+    result = measure_startup(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
+    for name, value in result.items():
+        print(f"{name}: {value * 1000:.1f}ms" if isinstance(value, float) else f"{name}: {value}")
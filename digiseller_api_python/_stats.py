@@ -0,0 +1,10 @@
+import math
+
+
+def percentile(values, q: float):
+    """Перцентиль q (0..100) методом ближайшего ранга. Для пустой выборки возвращает None."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(q / 100 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
@@ -0,0 +1,98 @@
+from digiseller_api_python._concurrency import map_concurrent
+from digiseller_api_python._pagination import fetch_all_pages
+from digiseller_api_python._tracing import set_attributes, span
+
+# Фильтры templates_products с их значениями по умолчанию (не передаются)
+TEMPLATE_FILTERS = {
+    "product_id": None,
+    "price_min": None,
+    "price_max": None,
+    "currency": None,
+    "language": None,
+    "name": None,
+    "min_comiss": None,
+    "max_comiss": None,
+    "in_affiliate": None,
+    "not_in_affiliate": None,
+    "only_payment": None,
+}
+
+
+class TemplateProductsSync:
+    """
+    Синхронизация товаров шаблона комиссионных отчислений по разнице с желаемым состоянием.
+
+    snapshot() загружает все страницы templates_products параллельно и индексирует товары по ID,
+    diff() находит только отличающиеся поля, apply() отправляет изменения пакетами update_template_products.
+
+    :param api: Экземпляр DigisellerApi
+    :param template_id: ID шаблона
+    :param page_size: Размер страницы templates_products
+    :param batch_size: Сколько товаров отправлять в одном update_template_products
+    :param max_workers: Параллельность загрузки страниц и отправки пакетов
+    :param id_field: Поле с ID товара в ответе и в запросе обновления
+    """
+
+    def __init__(self, api, template_id: int, page_size: int = 100, batch_size: int = 100, max_workers: int = 8,
+                 id_field: str = "product_id"):
+        self.api = api
+        self.template_id = template_id
+        self.page_size = page_size
+        self.batch_size = batch_size
+        self.max_workers = max_workers
+        self.id_field = id_field
+
+    def snapshot(self, **filters) -> dict:
+        """Текущее состояние шаблона: {product_id: товар}. Принимает фильтры templates_products."""
+        unknown = set(filters) - set(TEMPLATE_FILTERS)
+        if unknown:
+            raise TypeError(f"Unknown templates_products filters: {', '.join(sorted(unknown))}")
+        arguments = {**TEMPLATE_FILTERS, **filters}
+
+        def fetch(page):
+            return self.api.templates_products(self.template_id, page=page, count=self.page_size, **arguments)
+
+        with span(getattr(self.api, "tracer", None), "digiseller.template_sync.snapshot",
+                  {"digiseller.template_id": self.template_id}) as current:
+            items = fetch_all_pages(fetch, self.page_size, max_workers=self.max_workers)
+            set_attributes(current, **{"digiseller.items": len(items)})
+        return {item[self.id_field]: item for item in items if isinstance(item, dict) and self.id_field in item}
+
+    @staticmethod
+    def diff(desired: dict, snapshot: dict) -> dict:
+        """
+        Минимальная разница: {product_id: {поле: новое значение}} только для отличающихся полей.
+        Товары, которых нет в snapshot, попадают в разницу целиком.
+        """
+        changes = {}
+        for product_id, fields in desired.items():
+            current = snapshot.get(product_id)
+            if current is None:
+                changes[product_id] = dict(fields)
+                continue
+            changed = {name: value for name, value in fields.items() if current.get(name) != value}
+            if changed:
+                changes[product_id] = changed
+        return changes
+
+    def apply(self, desired: dict, snapshot: dict = None, dry_run: bool = False) -> dict:
+        """
+        Приводит шаблон к желаемому состоянию {product_id: {поле: значение}}.
+
+        :return: {"changes": разница, "responses": ответы update_template_products}
+        """
+        if snapshot is None:
+            snapshot = self.snapshot()
+        changes = self.diff(desired, snapshot)
+        if dry_run or not changes:
+            return {"changes": changes, "responses": []}
+
+        # Изменившийся товар отправляется со всеми желаемыми полями, неизменившиеся не отправляются
+        products = [{self.id_field: product_id, **desired[product_id]} for product_id in changes]
+        batches = [products[i:i + self.batch_size] for i in range(0, len(products), self.batch_size)]
+        with span(getattr(self.api, "tracer", None), "digiseller.template_sync.apply",
+                  {"digiseller.template_id": self.template_id, "digiseller.items": len(products)}):
+            responses = map_concurrent(
+                lambda batch: self.api.update_template_products({"template_id": self.template_id, "products": batch}),
+                batches, max_workers=self.max_workers)
+        return {"changes": changes, "responses": responses}
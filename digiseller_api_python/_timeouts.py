@@ -0,0 +1,96 @@
+import contextvars
+import time
+
+from digiseller_api_python._exceptions import DigisellerError, DigisellerDeadlineExceededError
+
+TIMEOUT_PHASES = ("connect", "read", "write", "pool")
+
+_current_deadline = contextvars.ContextVar("digiseller_deadline", default=None)
+
+
+def _check_seconds(value, name: str):
+    if value is None:
+        return
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or value < 0:
+        raise DigisellerError(f"Invalid {name} timeout: {value!r} (expected a non-negative number or None)")
+
+
+def check_timeout(value):
+    """Проверяет настройку тайм-аута без импорта httpx (при создании DigisellerApi)."""
+    if type(value).__module__.split(".")[0] == "httpx":
+        return   # httpx.Timeout
+    if isinstance(value, dict):
+        unknown = set(value) - {"default", *TIMEOUT_PHASES}
+        if unknown:
+            raise DigisellerError(f"Unknown timeout phases: {', '.join(sorted(unknown))}")
+        for phase, seconds in value.items():
+            _check_seconds(seconds, phase)
+        return
+    _check_seconds(value, "request")
+
+
+def build_timeout(value) -> "httpx.Timeout":
+    """
+    Приводит настройку тайм-аута к httpx.Timeout.
+
+    :param value: Число секунд на каждую фазу, httpx.Timeout
+        или словарь {"default", "connect", "read", "write", "pool"} (None - без ограничения)
+    """
+    import httpx
+    if isinstance(value, httpx.Timeout):
+        return value
+    if isinstance(value, dict):
+        check_timeout(value)
+        default = value.get("default", 60)
+        return httpx.Timeout(default, **{phase: value.get(phase, default) for phase in TIMEOUT_PHASES})
+    return httpx.Timeout(value)
+
+
+def cap_timeout(timeout: "httpx.Timeout", remaining: float) -> "httpx.Timeout":
+    """Ограничивает каждую фазу тайм-аута оставшимся временем дедлайна."""
+    import httpx
+
+    def cap(seconds):
+        return remaining if seconds is None else min(seconds, remaining)
+    return httpx.Timeout(**{phase: cap(getattr(timeout, phase)) for phase in TIMEOUT_PHASES})
+
+
+class Deadline:
+    """
+    Общий бюджет времени на цепочку запросов (обновление токена, пагинация, массовые операции).
+
+    Используется как контекстный менеджер: все запросы DigisellerApi внутри блока (в том числе
+    из пулов потоков библиотеки) получают тайм-ауты не больше оставшегося времени, а после
+    исчерпания бюджета завершаются DigisellerDeadlineExceededError без отправки.
+    Вложенный дедлайн не может быть позже внешнего.
+    """
+
+    def __init__(self, seconds: float):
+        self.expires_at = time.monotonic() + seconds
+        self._token = None
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return time.monotonic() >= self.expires_at
+
+    def check(self):
+        if self.expired:
+            raise DigisellerDeadlineExceededError("The deadline for the operation has been exceeded.")
+
+    def __enter__(self):
+        outer = _current_deadline.get()
+        if outer is not None and outer.expires_at < self.expires_at:
+            self.expires_at = outer.expires_at
+        self._token = _current_deadline.set(self)
+        return self
+
+    def __exit__(self, *exc):
+        _current_deadline.reset(self._token)
+
+
+def current_deadline():
+    """Дедлайн, действующий в текущем контексте, или None."""
+    return _current_deadline.get()
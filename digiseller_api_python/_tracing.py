@@ -0,0 +1,166 @@
+import contextvars
+import functools
+from contextlib import contextmanager
+
+# Фазы HTTP-запроса по событиям трассировки httpcore (extensions={"trace": ...}).
+# Событие "<шаг>.started" открывает спан фазы, "<шаг>.complete" последнего шага или "<шаг>.failed" - закрывает.
+HTTP_PHASES = {
+    "connection.connect_tcp": ("connect", True),
+    "connection.connect_unix_socket": ("connect", True),
+    "connection.start_tls": ("tls", True),
+    "http11.send_request_headers": ("send", False),
+    "http11.send_request_body": ("send", True),
+    "http11.receive_response_headers": ("receive", False),
+    "http11.receive_response_body": ("receive", True),
+    "http2.send_request_headers": ("send", False),
+    "http2.send_request_body": ("send", True),
+    "http2.receive_response_headers": ("receive", False),
+    "http2.receive_response_body": ("receive", True),
+}
+
+# Публичные методы DigisellerApi без собственного спана
+UNTRACED_METHODS = {"deadline", "get_token", "batch", "close"}
+
+
+class _NoopSpan:
+    def set_attribute(self, key, value):
+        pass
+
+    def __enter__(self):
+        return None
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP = _NoopSpan()
+
+
+def span(tracer, name: str, attributes: dict = None):
+    """
+    Спан трассировщика в стиле OpenTelemetry (tracer.start_as_current_span) или пустой контекст, если tracer=None.
+    Значение контекста - спан или None.
+    """
+    if tracer is None:
+        return _NOOP
+    return tracer.start_as_current_span(name, attributes={k: v for k, v in (attributes or {}).items() if v is not None})
+
+
+def set_attributes(current, **attributes):
+    """Устанавливает атрибуты спана; None-значения и отсутствующий спан пропускаются."""
+    if current is None:
+        return
+    for key, value in attributes.items():
+        if value is not None:
+            current.set_attribute(key, value)
+
+
+def traced_iter(tracer, name: str, make_items, attributes: dict = None):
+    """
+    Генератор элементов make_items() в спане, который закрывается после последнего элемента или при закрытии
+    генератора (close(), contextlib.closing). Спан и запросы генератора выполняются в отдельной копии контекста:
+    спан текущий только пока вычисляется очередной элемент, и код между элементами не становится его потомком.
+    """
+    context = contextvars.copy_context()
+    manager = span(tracer, name, attributes)
+    current = context.run(manager.__enter__)
+    items, error, count = None, None, 0
+    try:
+        items = context.run(make_items)
+        while True:
+            try:
+                item = context.run(next, items)
+            except StopIteration:
+                break
+            count += 1
+            yield item
+        set_attributes(current, **{"digiseller.items": count})
+    except GeneratorExit:
+        raise
+    except BaseException as e:
+        error = e
+        raise
+    finally:
+        if items is not None and hasattr(items, "close"):
+            context.run(items.close)
+        context.run(manager.__exit__, type(error) if error else None, error, error.__traceback__ if error else None)
+
+
+class HttpTrace:
+    """Обработчик событий трассировки httpcore, открывающий дочерние спаны connect, tls, send и receive."""
+
+    def __init__(self, tracer):
+        self.tracer = tracer
+        self._open = {}
+
+    def __call__(self, event_name: str, info: dict):
+        step, _, stage = event_name.rpartition(".")
+        if step not in HTTP_PHASES:
+            return
+        phase, last = HTTP_PHASES[step]
+        if stage == "started" and phase not in self._open:
+            manager = self.tracer.start_as_current_span(f"digiseller.http.{phase}")
+            self._open[phase] = (manager, manager.__enter__())
+        elif stage == "failed" or (stage == "complete" and last):
+            self._close(phase, info.get("exception") if stage == "failed" else None)
+
+    def _close(self, phase, exception=None):
+        manager, _ = self._open.pop(phase, (None, None))
+        if manager is not None:
+            if exception is None:
+                manager.__exit__(None, None, None)
+            else:
+                manager.__exit__(type(exception), exception, exception.__traceback__)
+
+    def close(self):
+        """Закрывает фазы, для которых не пришло завершающее событие (в обратном порядке открытия)."""
+        for phase in reversed(list(self._open)):
+            self._close(phase)
+
+
+@contextmanager
+def http_span(tracer, method: str, endpoint: str, url: str, kwargs: dict):
+    """Спан HTTP-запроса с дочерними спанами фаз; при tracer=None ничего не делает."""
+    if tracer is None:
+        yield None
+        return
+    trace = HttpTrace(tracer)
+    kwargs["extensions"] = {**kwargs.get("extensions", {}), "trace": trace}
+    with span(tracer, f"digiseller.http {method}", {
+        "http.request.method": method,
+        "digiseller.endpoint": endpoint,
+        "url.full": url.split("?")[0],
+    }) as current:
+        try:
+            yield current
+        finally:
+            trace.close()
+
+
+def traced_method(fn):
+    """Оборачивает метод DigisellerApi в спан "digiseller.<имя метода>", если у экземпляра задан tracer."""
+    name = f"digiseller.{fn.__name__}"
+
+    if fn.__name__.startswith("iter_"):
+        @functools.wraps(fn)
+        def iter_wrapper(self, *args, **kwargs):
+            if self.tracer is None:
+                return fn(self, *args, **kwargs)
+            return traced_iter(self.tracer, name, lambda: fn(self, *args, **kwargs))
+        return iter_wrapper
+
+    @functools.wraps(fn)
+    def wrapper(self, *args, **kwargs):
+        if self.tracer is None:
+            return fn(self, *args, **kwargs)
+        with span(self.tracer, name):
+            return fn(self, *args, **kwargs)
+    return wrapper
+
+
+def trace_public_methods(cls):
+    """Декоратор класса: спан на каждый публичный метод, кроме UNTRACED_METHODS."""
+    for attribute, value in list(vars(cls).items()):
+        if callable(value) and not attribute.startswith("_") and attribute not in UNTRACED_METHODS:
+            setattr(cls, attribute, traced_method(value))
+    return cls
@@ -0,0 +1,147 @@
+import threading
+import time
+from concurrent.futures import Future
+
+from digiseller_api_python._publisher import _check
+from digiseller_api_python._tracing import span
+
+
+class WriteBehindBatcher:
+    """
+    Отложенная запись изменений статуса и цен товаров крупными пакетами.
+
+    Изменения копятся в течение window секунд (или до max_batch товаров), для каждого товара остается
+    последнее изменение, статусы группируются по new_status и отправляются через product_edit_v2,
+    цены - через product_edit_prices. Каждый вызов возвращает Future, который завершается ответом
+    пакетного запроса (или его ошибкой, в том числе DigisellerInvalidResponseError при retval != 0)
+    после отправки изменения.
+
+    :param api: Экземпляр DigisellerApi
+    :param window: Сколько секунд собирать изменения перед отправкой
+    :param max_batch: Сколько товаров отправлять в одном запросе; при накоплении стольких изменений отправка начинается сразу
+    :param prices_payload: Функция list[dict] -> тело product_edit_prices; по умолчанию отправляется сам список
+    """
+
+    def __init__(self, api, window: float = 1.0, max_batch: int = 500, prices_payload=None):
+        self.api = api
+        self.window = window
+        self.max_batch = max_batch
+        self.prices_payload = prices_payload or (lambda products: products)
+        self._statuses = {}   # product_id -> (new_status, [Future])
+        self._prices = {}     # product_id -> (fields, [Future])
+        self._first_at = None
+        self._closed = False
+        self._taken = 0      # Сколько пакетов забрал поток отправки
+        self._finished = 0   # Сколько из них отправлено
+        self._condition = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="digiseller-write-behind", daemon=True)
+        self._thread.start()
+
+    def _put(self, pending: dict, product_id, value) -> Future:
+        future = Future()
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("WriteBehindBatcher is closed.")
+            _, futures = pending.get(product_id, (None, []))
+            pending[product_id] = (value, futures + [future])
+            if self._first_at is None:
+                self._first_at = time.monotonic()
+            self._condition.notify_all()
+        return future
+
+    def set_status(self, product_id: int, new_status: str) -> Future:
+        """Изменение статуса товара (product_edit_v2)."""
+        return self._put(self._statuses, product_id, new_status)
+
+    def set_price(self, product_id: int, **fields) -> Future:
+        """Изменение цены товара (product_edit_prices), например set_price(1, price=100, currency="RUB")."""
+        return self._put(self._prices, product_id, fields)
+
+    def _pending_count(self) -> int:
+        return len(self._statuses) + len(self._prices)
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._closed and (self._first_at is None or
+                                            (self._pending_count() < self.max_batch and
+                                             time.monotonic() < self._first_at + self.window)):
+                    timeout = None if self._first_at is None else self._first_at + self.window - time.monotonic()
+                    self._condition.wait(timeout)
+                statuses, self._statuses = self._statuses, {}
+                prices, self._prices = self._prices, {}
+                self._first_at = None
+                closed = self._closed
+                if statuses or prices:
+                    self._taken += 1
+            if statuses or prices:
+                try:
+                    with span(getattr(self.api, "tracer", None), "digiseller.write_behind.flush",
+                              {"digiseller.statuses": len(statuses), "digiseller.prices": len(prices)}):
+                        self._send(statuses, prices)
+                except Exception as e:
+                    # Непредвиденная ошибка не должна остановить поток и оставить Future незавершенными
+                    for _, futures in (*statuses.values(), *prices.values()):
+                        for future in futures:
+                            if not future.done():
+                                future.set_exception(e)
+                with self._condition:
+                    self._finished += 1
+                    self._condition.notify_all()
+            if closed:
+                with self._condition:
+                    if not self._pending_count():
+                        return
+
+    @staticmethod
+    def _chunks(items: list, size: int):
+        return [items[i:i + size] for i in range(0, len(items), size)]
+
+    @staticmethod
+    def _resolve(futures, call):
+        try:
+            response = _check(call())
+        except Exception as e:
+            for future in futures:
+                future.set_exception(e)
+        else:
+            for future in futures:
+                future.set_result(response)
+
+    def _send(self, statuses: dict, prices: dict):
+        by_status = {}
+        for product_id, (new_status, futures) in statuses.items():
+            by_status.setdefault(new_status, []).append((product_id, futures))
+        for new_status, products in by_status.items():
+            for chunk in self._chunks(products, self.max_batch):
+                ids = [product_id for product_id, _ in chunk]
+                self._resolve([f for _, futures in chunk for f in futures],
+                              lambda: self.api.product_edit_v2(new_status, ids))
+
+        for chunk in self._chunks(list(prices.items()), self.max_batch):
+            products = [{"product_id": product_id, **fields} for product_id, (fields, _) in chunk]
+            self._resolve([f for _, (_, futures) in chunk for f in futures],
+                          lambda: self.api.product_edit_prices(self.prices_payload(products)))
+
+    def flush(self):
+        """Отправляет накопленные изменения, не дожидаясь окна, и ждет завершения их и уже отправляемого пакета."""
+        with self._condition:
+            target = self._taken
+            if self._first_at is not None:
+                target += 1
+                self._first_at = time.monotonic() - self.window
+                self._condition.notify_all()
+            self._condition.wait_for(lambda: self._finished >= target)
+
+    def close(self):
+        """Отправляет оставшиеся изменения и останавливает фоновый поток."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        self._thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
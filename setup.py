@@ -15,6 +15,9 @@ setup(
     url='https://github.com/Ernieleo/Digiseller-API-Python',
     packages=find_packages(),
     install_requires=['httpx>=0.26.0'],
+    extras_require={
+        'compression': ['brotli', 'zstandard'],
+    },
     classifiers=[
         'Programming Language :: Python :: 3.8',
         'Programming Language :: Python :: 3.9',
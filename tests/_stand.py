@@ -0,0 +1,20 @@
+import json
+
+
+def json_entry(method, path, payload, status=200, host="api.digiseller.ru", elapsed=0.0):
+    """Запись кассеты с JSON-ответом для ReplayServer."""
+    return {
+        "method": method,
+        "host": host,
+        "path": path,
+        "query": {},
+        "status": status,
+        "content_type": "application/json; charset=utf-8",
+        "body": json.dumps(payload),
+        "encoding": "text",
+        "elapsed": elapsed,
+    }
+
+
+def login_entry():
+    return json_entry("POST", "/api/apilogin", {"retval": 0, "token": "replayed-token-0123456789"})
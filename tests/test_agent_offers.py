@@ -0,0 +1,53 @@
+import threading
+import time
+import unittest
+
+from digiseller_api_python import AgentOfferScanner
+
+
+class FakeAgentApi:
+    """По 12 предложений у каждого продавца; продавец 13 отвечает ошибкой."""
+
+    def __init__(self):
+        self.requests = []
+        self.lock = threading.Lock()
+
+    def agents_offer(self, seller_id, product_name, product_id, only_in_stock, only_individual, page, count):
+        with self.lock:
+            self.requests.append((seller_id, page, time.monotonic()))
+        if seller_id == 13:
+            raise RuntimeError("seller unavailable")
+        offers = [{"productId": seller_id * 100 + n, "productName": f"Game key {n}", "inStock": n % 2 == 0,
+                   "isIndividual": n == 3} for n in range(12)]
+        return {"retval": 0, "content": {"items": offers[(page - 1) * count:page * count], "totalItems": 12}}
+
+
+class TestAgentOfferScanner(unittest.TestCase):
+    def test_scan_cache_and_search(self):
+        """Страницы загружаются с ограничением частоты, повторный поиск идет по кэшу"""
+        api = FakeAgentApi()
+        scanner = AgentOfferScanner(api, rate=50, burst=5, page_size=5, max_workers=4)
+        started = time.monotonic()
+        results = scanner.scan([1, 2, 3, 13])
+        self.assertEqual([len(results[seller]) for seller in (1, 2, 3)], [12, 12, 12])
+        self.assertIsInstance(results[13], RuntimeError)
+        # 10 запросов: 5 без ожидания, остальные - не чаще 50 в секунду
+        self.assertEqual(len(api.requests), 10)
+        self.assertGreaterEqual(time.monotonic() - started, 0.08)
+
+        found = scanner.search([1, 2, 3, 13], name="KEY 1", in_stock=False)
+        self.assertEqual(sorted(offer["productId"] for _, offer in found), [101, 111, 201, 211, 301, 311])
+        self.assertEqual(len(scanner.search(individual=True)), 3)
+        self.assertEqual(len(api.requests), 11)  # повторно запрошен только продавец с ошибкой
+
+    def test_search_without_sellers_skips_expired(self):
+        """Поиск по всему кэшу не возвращает устаревшие предложения"""
+        scanner = AgentOfferScanner(FakeAgentApi(), rate=1000, ttl=0.05, page_size=20)
+        scanner.scan([1])
+        self.assertEqual(len(scanner.search()), 12)
+        time.sleep(0.06)
+        self.assertEqual(scanner.search(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
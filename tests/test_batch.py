@@ -0,0 +1,43 @@
+import unittest
+
+from digiseller_api_python import DigisellerApi, DigisellerHTTPError, ReplayServer
+from tests._stand import json_entry, login_entry
+
+
+class TestBatch(unittest.TestCase):
+    def test_gather_and_batch(self):
+        """Результаты и ошибки возвращаются в порядке вызовов"""
+        entries = [login_entry()] + [json_entry("GET", f"/api/purchase/info/{n}", {"retval": 0, "content": {"inv": n}})
+                                     for n in range(1, 6)]
+        entries.append(json_entry("GET", "/api/purchase/info/404", {"error": "not found"}, status=404))
+        with ReplayServer(entries, latency=0.05) as server, \
+                DigisellerApi("123", "key", base_urls=server.base_urls, batch_workers=8) as api:
+            api.get_token()
+            results = api.gather([(api.purchase_info, n) for n in (1, 2, 404, 3)] + [lambda: api.purchase_info(5)])
+            self.assertEqual([r["content"]["inv"] for i, r in enumerate(results) if i != 2], [1, 2, 3, 5])
+            self.assertIsInstance(results[2], DigisellerHTTPError)
+            with self.assertRaises(DigisellerHTTPError):
+                api.gather([(api.purchase_info, 404)], return_exceptions=False)
+
+            with api.batch() as batch:
+                first = batch.purchase_info(4)
+                batch.purchase_info(404)
+            self.assertEqual(first.result()["content"]["inv"], 4)
+            self.assertIsInstance(batch.results()[1], DigisellerHTTPError)
+
+            # Вложенный gather выполняется в потоке задачи
+            nested = api.gather([lambda: api.gather([(api.purchase_info, 1), (api.purchase_info, 2)])])
+            self.assertEqual([r["content"]["inv"] for r in nested[0]], [1, 2])
+
+    def test_concurrent_calls_refresh_token_once(self):
+        """Параллельные вызовы с истекшим токеном выполняют один apilogin"""
+        entries = [login_entry()] + [json_entry("GET", f"/api/purchase/info/{n}", {"retval": 0}) for n in range(8)]
+        with ReplayServer(entries, latency=0.05) as server, \
+                DigisellerApi("123", "key", base_urls=server.base_urls, batch_workers=8) as api:
+            results = api.gather([(api.purchase_info, n) for n in range(8)], return_exceptions=False)
+            self.assertEqual(len(results), 8)
+            self.assertEqual(server.stats["hit"], 9)
+
+
+if __name__ == "__main__":
+    unittest.main()
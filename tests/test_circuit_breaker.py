@@ -0,0 +1,31 @@
+import time
+import unittest
+
+from digiseller_api_python import (CircuitBreaker, DigisellerApi, DigisellerCircuitOpenError,
+                                   DigisellerUnavailableError, ReplayServer)
+from tests._stand import login_entry
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    def test_opens_and_recovers(self):
+        """Выключатель размыкается при обслуживании и замыкается после пробного запроса"""
+        breaker = CircuitBreaker(failure_threshold=2, recovery_timeout=0.2)
+        with ReplayServer([login_entry()], latency=0, faults={"maintenance": 1.0}) as server:
+            api = DigisellerApi("123", "key", base_urls=server.base_urls, circuit_breaker=breaker)
+            for _ in range(2):
+                with self.assertRaises(DigisellerUnavailableError):
+                    api.get_token()
+            self.assertEqual(breaker.state("api.digiseller.ru"), CircuitBreaker.OPEN)
+            with self.assertRaises(DigisellerCircuitOpenError):
+                api.get_token()
+            self.assertEqual(server.stats["maintenance"], 2)
+
+            server.faults.clear()
+            time.sleep(0.25)
+            self.assertEqual(breaker.state("api.digiseller.ru"), CircuitBreaker.HALF_OPEN)
+            api.get_token()
+        self.assertEqual(breaker.health()["api.digiseller.ru"]["state"], CircuitBreaker.CLOSED)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,35 @@
+import time
+import unittest
+
+from digiseller_api_python import DigisellerApi, HedgePolicy, ReplayServer
+from tests._stand import json_entry, login_entry
+
+
+class TestHedging(unittest.TestCase):
+    def test_slow_response_is_hedged(self):
+        """Медленный ответ перекрывается вторым запросом"""
+        entries = [
+            login_entry(),
+            json_entry("GET", "/api/purchase/info/1", {"retval": 0, "attempt": "slow"}, elapsed=2.0),
+            json_entry("GET", "/api/purchase/info/1", {"retval": 0, "attempt": "fast"}),
+        ]
+        policy = HedgePolicy(initial_delay=0.1, budget=1.0, burst=1)
+        with ReplayServer(entries) as server:
+            api = DigisellerApi("123", "key", base_urls=server.base_urls, hedging=policy)
+            api.get_token()
+            started = time.monotonic()
+            result = api.purchase_info(1)
+            self.assertLess(time.monotonic() - started, 1.5)
+        self.assertEqual(result["attempt"], "fast")
+        self.assertEqual(policy.stats["hedge_wins"], 1)
+
+    def test_budget_limits_hedges(self):
+        """Бюджет ограничивает долю дополнительных запросов"""
+        policy = HedgePolicy(initial_delay=0, budget=0.25, burst=1)
+        for _ in range(8):
+            policy.execute("slow", lambda: time.sleep(0.01) or "ok")
+        self.assertEqual(policy.stats["hedges"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+import tempfile
+import threading
+import time
+import unittest
+
+from digiseller_api_python import ImageCache
+
+
+class TestImageCache(unittest.TestCase):
+    def setUp(self):
+        self.cache = ImageCache(tempfile.mkdtemp(), max_bytes=10)
+        self.calls = 0
+
+    def loader(self, content, delay=0.0):
+        def load():
+            self.calls += 1
+            time.sleep(delay)
+            return content
+        return load
+
+    def test_concurrent_misses_are_deduplicated(self):
+        """Одновременные промахи по одному ключу выполняют один запрос"""
+        key = ImageCache.make_key(1, 400, 200, 150, False)
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(self.cache.get(key, self.loader(b"img", 0.1))))
+                   for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results, [b"img"] * 5)
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(self.cache.get(key, self.loader(b"other")), b"img")
+
+    def test_lru_eviction_under_budget(self):
+        """Вытеснение давно не использованных записей при превышении бюджета"""
+        self.cache.get("a", self.loader(b"aaaa"))
+        self.cache.get("b", self.loader(b"bbbb"))
+        self.cache.get("a", self.loader(b"aaaa"))
+        self.cache.get("c", self.loader(b"cccc"))
+        self.assertEqual(self.cache.size, 8)
+        self.assertEqual(self.cache.get("b", self.loader(b"new")), b"new")
+        self.assertEqual(self.cache.stats["evictions"], 2)
+
+        reopened = ImageCache(self.cache.directory, max_bytes=10)
+        self.assertEqual(reopened.get("b", self.loader(b"x")), b"new")
+
+    def test_index_is_appended_and_compacted(self):
+        """Запись в кэш дописывает индекс, а не перезаписывает его; журнал периодически сжимается"""
+        cache = ImageCache(tempfile.mkdtemp(), max_bytes=40)
+        for i in range(200):
+            cache.get(str(i), self.loader(b"%04d" % i))
+        self.assertLessEqual(cache._index_records, 2 * len(cache._entries) + 64)
+
+        reopened = ImageCache(cache.directory, max_bytes=40)
+        self.assertEqual(list(reopened._entries), [str(i) for i in range(190, 200)])
+        self.assertEqual(reopened.get("199", self.loader(b"x")), b"0199")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,46 @@
+import json
+import unittest
+from unittest import mock
+
+from digiseller_api_python import DigisellerApi, DigisellerInvalidResponseError, ReplayServer
+from digiseller_api_python import _json_stream
+from digiseller_api_python._json_stream import iter_json_items
+from tests._stand import json_entry, login_entry
+
+
+def chunked(data: bytes, size: int):
+    return (data[i:i + size] for i in range(0, len(data), size))
+
+
+class TestJsonStream(unittest.TestCase):
+    def test_items_across_chunk_boundaries(self):
+        """Элементы разбираются при любом разбиении потока, включая многобайтовые символы и числа"""
+        document = {"retval": 0, "meta": {"a": [1, 2]}, "sales": [{"id": 12345, "name": "Ключ"}, 67890, "x"]}
+        data = json.dumps(document, ensure_ascii=False).encode()
+        for size in (1, 2, 3, 7, len(data)):
+            with self.subTest(size=size):
+                self.assertEqual(list(iter_json_items(chunked(data, size), "sales")), document["sales"])
+        self.assertEqual(list(iter_json_items(chunked(b"[1, 22, 333]", 1))), [1, 22, 333])
+        with self.assertRaises(DigisellerInvalidResponseError):
+            list(iter_json_items([b'{"retval": -1, "retdesc": "error"}']))
+
+    def test_large_item_over_many_chunks(self):
+        """Крупный элемент, разбитый на тысячи фрагментов, разбирается один раз"""
+        message = {"id": 1, "text": "Сообщение \\\"в кавычках\" [{" * 2000, "files": [{"n": i} for i in range(2000)]}
+        data = json.dumps({"messages": [message, 42, "tail"]}, ensure_ascii=False).encode()
+        decoder = mock.Mock(wraps=_json_stream._decoder)
+        with mock.patch.object(_json_stream, "_decoder", decoder):
+            self.assertEqual(list(iter_json_items(chunked(data, 16), "messages")), [message, 42, "tail"])
+        self.assertEqual(decoder.raw_decode.call_count, 4)   # Имя поля и три элемента
+
+    def test_iter_seller_last_sales(self):
+        """Потоковый метод API возвращает элементы списка"""
+        sales = [{"invoice_id": i} for i in range(100)]
+        entries = [login_entry(), json_entry("GET", "/api/seller-last-sales", {"retval": 0, "sales": sales})]
+        with ReplayServer(entries, latency=0) as server:
+            api = DigisellerApi("123", "key", base_urls=server.base_urls)
+            self.assertEqual(list(api.iter_seller_last_sales(top=100)), sales)
+
+
+if __name__ == "__main__":
+    unittest.main()
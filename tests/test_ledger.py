@@ -0,0 +1,83 @@
+import threading
+import unittest
+from datetime import datetime, timedelta
+
+from digiseller_api_python import LedgerSync
+
+
+class FakeAccountApi:
+    """Операции по одной в час, отдаваемые по интервалу start/finish, и журнал запрошенных окон."""
+
+    def __init__(self, start, hours):
+        self.operations = [{"id": n, "code": f"C{n % 5}", "currency": "RUB", "amount": 10,
+                            "date": (start + timedelta(hours=n)).strftime("%d.%m.%Y %H:%M:%S")} for n in range(hours)]
+        self.external = [{"id": f"e{n}", "aggregator": "qiwi", "amount": 1} for n in range(30, 0, -1)]
+        self.windows = []
+        self.lock = threading.Lock()
+
+    def sellers_account_receipts(self, page, count, currency, rtype, codeFilter, allowType, start, finish):
+        with self.lock:
+            self.windows.append((start, finish, page))
+        start, finish = datetime.fromisoformat(start), datetime.fromisoformat(finish)
+        items = [o for o in self.operations if start <= datetime.strptime(o["date"], "%d.%m.%Y %H:%M:%S") < finish
+                 and codeFilter in (None, o["code"])]
+        return {"retval": 0, "content": {"items": items[(page - 1) * count:page * count], "total_count": len(items)}}
+
+    def sellers_account_receipts_external(self, page, count, order, code, aggregator):
+        return {"retval": 0, "content": {"items": self.external[(page - 1) * count:page * count]}}
+
+    def sellers_account_balance_info(self):
+        return {"retval": 0, "content": [{"currency": "RUB", "balance": 500}]}
+
+
+class TestLedgerSync(unittest.TestCase):
+    def test_incremental_sync(self):
+        """Интервал делится на окна, повторная синхронизация загружает только новое, поиск и сверка по базе"""
+        start = datetime(2024, 1, 1)
+        api = FakeAccountApi(start, 48)
+        with LedgerSync(api, ":memory:", page_size=5, window=timedelta(hours=12), overlap=timedelta(0)) as ledger:
+            self.assertEqual(ledger.sync_receipts("RUB", "in", since=start, until=start + timedelta(hours=36)), 36)
+            self.assertEqual(len({w[:2] for w in api.windows}), 3)
+
+            api.windows.clear()
+            self.assertEqual(ledger.sync_receipts("RUB", "in", until=start + timedelta(hours=48)), 12)
+            self.assertEqual({w[:2] for w in api.windows}, {("2024-01-02 12:00:00", "2024-01-03 00:00:00")})
+            self.assertEqual(ledger.watermark("RUB", "in"), start + timedelta(hours=48))
+
+            self.assertEqual(len(ledger.by_code("C1")), 10)
+            self.assertEqual([o["id"] for o in ledger.between("2024-01-01 10:00:00", "2024-01-01 13:00:00")], [10, 11, 12])
+            self.assertEqual(ledger.check_balance(opening={"RUB": 20})["RUB"],
+                             {"balance": 500.0, "ledger": 500.0, "difference": 0.0, "ok": True})
+
+            self.assertEqual(ledger.sync_external(), 30)
+            api.external[:0] = [{"id": "e31", "aggregator": "qiwi", "amount": 1}]
+            self.assertEqual(ledger.sync_external(), 1)
+
+    def test_explicit_since_after_watermark_keeps_gap(self):
+        """Синхронизация с since позже отметки не сдвигает отметку через незагруженный промежуток"""
+        start = datetime(2024, 1, 1)
+        api = FakeAccountApi(start, 48)
+        with LedgerSync(api, ":memory:", page_size=50, window=timedelta(hours=12), overlap=timedelta(0)) as ledger:
+            ledger.sync_receipts("RUB", "in", since=start, until=start + timedelta(hours=12))
+            ledger.sync_receipts("RUB", "in", since=start + timedelta(hours=24), until=start + timedelta(hours=36))
+            self.assertEqual(ledger.watermark("RUB", "in"), start + timedelta(hours=12))
+
+            self.assertEqual(ledger.sync_receipts("RUB", "in", until=start + timedelta(hours=48)), 36)
+            self.assertEqual(ledger.watermark("RUB", "in"), start + timedelta(hours=48))
+            self.assertEqual(len(ledger.between("2024-01-01 00:00:00", "2024-01-03 00:00:00")), 48)
+
+    def test_filtered_sync_keeps_watermark(self):
+        """Синхронизация с фильтром не сдвигает отметку, следующая полная загружает отфильтрованные операции"""
+        start = datetime(2024, 1, 1)
+        api = FakeAccountApi(start, 48)
+        with LedgerSync(api, ":memory:", page_size=50, window=timedelta(hours=12), overlap=timedelta(0),
+                        initial=timedelta(hours=48)) as ledger:
+            self.assertEqual(ledger.sync_receipts("RUB", "in", code_filter="C1", until=start + timedelta(hours=48)), 10)
+            self.assertIsNone(ledger.watermark("RUB", "in"))
+
+            self.assertEqual(ledger.sync_receipts("RUB", "in", until=start + timedelta(hours=48)), 48)
+            self.assertEqual(ledger.watermark("RUB", "in"), start + timedelta(hours=48))
+
+
+if __name__ == "__main__":
+    unittest.main()
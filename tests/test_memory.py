@@ -0,0 +1,34 @@
+import io
+import unittest
+
+from digiseller_api_python import DigisellerApi, MemoryProfiler, ReplayServer
+from tests._stand import json_entry, login_entry
+
+
+class TestMemoryProfiler(unittest.TestCase):
+    def test_report_per_endpoint(self):
+        """Память считается по вызовам и эндпоинтам, для внешних вызовов - пик и места выделения"""
+        sales = {"retval": 0, "content": [{"invoice_id": n, "product": "x" * 200} for n in range(2000)]}
+        entries = [login_entry(), json_entry("GET", "/api/seller-last-sales", sales)]
+        with ReplayServer(entries, latency=0) as server, MemoryProfiler(top=5) as profiler:
+            api = DigisellerApi("123", "key", base_urls=server.base_urls, tracer=profiler)
+            kept = api.seller_last_sales()
+            report = profiler.report()
+
+        self.assertEqual(len(kept["content"]), 2000)
+        call = report["digiseller.seller_last_sales"]
+        self.assertEqual(call["calls"], 1)
+        self.assertGreater(call["max_retained"], 400000)
+        self.assertGreaterEqual(call["max_peak"], call["max_retained"])
+        self.assertTrue(call["top"])
+        self.assertIn("digiseller.http GET /api/seller-last-sales", report)
+        self.assertIsNone(report["digiseller.decode /api/seller-last-sales"]["max_peak"])
+        self.assertIn("digiseller.decode /api/apilogin", report)
+
+        output = io.StringIO()
+        profiler.dump(output, limit=1)
+        self.assertTrue(output.getvalue().startswith("digiseller.seller_last_sales: calls=1"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,102 @@
+import asyncio
+import io
+import threading
+import unittest
+
+from digiseller_api_python import DigisellerApi, NotificationReceiver, ReplayServer
+from tests._stand import json_entry, login_entry
+
+
+class TestNotificationReceiver(unittest.TestCase):
+    def test_wsgi_ack_dedup_and_enrich(self):
+        """Уведомление подтверждается сразу, повтор отбрасывается, заказ дополняется purchase_info"""
+        entries = [
+            login_entry(),
+            json_entry("GET", "/api/purchase/info/777", {"retval": 0, "content": {"invoice_id": 777}}),
+            json_entry("GET", "/api/purchases/unique-code/ABC123", {"retval": 0, "unique_code": "ABC123"}),
+        ]
+        results = []
+        with ReplayServer(entries, latency=0) as server:
+            api = DigisellerApi("123", "key", base_urls=server.base_urls)
+            receiver = NotificationReceiver(api, lambda n, p, u: results.append((n["ID_I"], p, u)),
+                                            with_unique_code=True)
+            statuses = []
+            for _ in range(3):
+                body = b"ID_I=777&ID_D=1&unique_code=ABC123"
+                environ = {"CONTENT_LENGTH": str(len(body)), "CONTENT_TYPE": "application/x-www-form-urlencoded",
+                           "wsgi.input": io.BytesIO(body)}
+                receiver(environ, lambda status, headers: statuses.append(status))
+            receiver.stop()
+
+        self.assertEqual(statuses, ["200 OK"] * 3)
+        self.assertEqual(receiver.stats["duplicates"], 2)
+        self.assertEqual(len(results), 1)
+        invoice, purchase, unique = results[0]
+        self.assertEqual((invoice, purchase["content"]["invoice_id"], unique["unique_code"]), ("777", 777, "ABC123"))
+
+    def test_asgi_matches_wsgi(self):
+        """ASGI отвечает так же, как WSGI, и останавливает обработчики при завершении приложения"""
+        receiver = NotificationReceiver(DigisellerApi("123", "key"), lambda n, p, u: None)
+        wsgi = []
+        environ = {"CONTENT_LENGTH": "8", "CONTENT_TYPE": "application/json", "wsgi.input": io.BytesIO(b"not json")}
+        wsgi_body = receiver(environ, lambda status, headers: wsgi.append(status))
+
+        async def scenario():
+            lifespan_events, lifespan_sent, response = asyncio.Queue(), [], []
+
+            async def send_lifespan(message):
+                lifespan_sent.append(message)
+
+            async def send_response(message):
+                response.append(message)
+
+            async def receive_request():
+                return {"type": "http.request", "body": b"not json"}
+
+            await lifespan_events.put({"type": "lifespan.startup"})
+            lifespan = asyncio.ensure_future(receiver.asgi({"type": "lifespan"}, lifespan_events.get, send_lifespan))
+            await asyncio.sleep(0)
+            await receiver.asgi({"type": "http", "headers": [(b"content-type", b"application/json")]},
+                                receive_request, send_response)
+            await lifespan_events.put({"type": "lifespan.shutdown"})
+            await lifespan
+            return lifespan_sent, response
+
+        lifespan, response = asyncio.run(scenario())
+        self.assertEqual(wsgi, ["400 Bad Request"])
+        self.assertEqual((response[0]["status"], response[1]["body"]), (400, b"".join(wsgi_body)))
+        self.assertEqual([m["type"] for m in lifespan],
+                         ["lifespan.startup.complete", "lifespan.shutdown.complete"])
+        self.assertEqual(receiver._threads, [])
+
+    def test_stop_without_drain_skips_queue(self):
+        """stop(drain=False) не обрабатывает очередь, отброшенные заказы принимаются повторно"""
+        class SlowApi:
+            def __init__(self):
+                self.started, self.release, self.invoices = threading.Event(), threading.Event(), []
+
+            def purchase_info(self, invoice):
+                self.invoices.append(invoice)
+                self.started.set()
+                self.release.wait(timeout=5)
+                return {"retval": 0}
+
+        api = SlowApi()
+        receiver = NotificationReceiver(api, lambda n, p, u: None, workers=1, queue_size=3)
+        for invoice in range(1, 5):
+            self.assertEqual(receiver.submit({"id_i": invoice}), 200)
+            api.started.wait(timeout=5)
+        threading.Timer(0.05, api.release.set).start()
+        receiver.stop(drain=False)
+
+        self.assertEqual(api.invoices, ["1"])
+        self.assertEqual(receiver.stats["processed"], 1)
+        receiver.join()
+        self.assertEqual(receiver.submit({"id_i": 2}), 200)
+        receiver.stop()
+        self.assertEqual(api.invoices, ["1", "2"])
+        self.assertEqual(receiver.stats["duplicates"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
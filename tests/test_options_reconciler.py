@@ -0,0 +1,71 @@
+import itertools
+import threading
+import unittest
+
+from digiseller_api_python import OptionsReconciler
+
+
+class FakeOptionsApi:
+    """Параметры товаров в памяти и журнал изменяющих вызовов."""
+
+    def __init__(self):
+        self.ids = itertools.count(100)
+        self.options = {1: {10: {"id": 10, "name": "Регион", "type": "radio",
+                                 "variants": [{"id": 11, "name": "EU", "modify_value": 0},
+                                              {"id": 12, "name": "US", "modify_value": 5}]}},
+                        2: {}}
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def _log(self, *call):
+        with self.lock:
+            self.calls.append(call)
+
+    def products_options_list(self, product_id):
+        return {"retval": 0, "content": [{"id": option_id} for option_id in self.options[product_id]]}
+
+    def products_options_info(self, option_id):
+        option = next(o[option_id] for o in self.options.values() if option_id in o)
+        return {"retval": 0, "content": option}
+
+    def products_options_add(self, data):
+        self._log("option_add", data["product_id"], data["name"])
+        return {"retval": 0, "content": {"option_id": next(self.ids)}}
+
+    def products_options_update(self, data):
+        self._log("option_update", data["option_id"])
+        return {"retval": 0}
+
+    def products_variant_add(self, option_id, data):
+        self._log("variant_add", option_id, data["name"])
+        return {"retval": 0}
+
+    def products_variant_edit(self, option_id, variants, data):
+        self._log("variant_edit", option_id, variants)
+        return {"retval": 0}
+
+    def products_variant_delete(self, option_id, variant_id):
+        self._log("variant_delete", option_id, variant_id)
+        return {"retval": 0}
+
+
+class TestOptionsReconciler(unittest.TestCase):
+    def test_minimal_plan_and_ordering(self):
+        """Изменяются только отличающиеся варианты, варианты нового параметра создаются после него"""
+        api = FakeOptionsApi()
+        region = {"name": "Регион", "data": {"name": "Регион", "type": "radio"}, "variants": [
+            {"name": "EU", "data": {"name": "EU", "modify_value": 0}},
+            {"name": "US", "data": {"name": "US", "modify_value": 7}},
+        ]}
+        desired = {1: [region], 2: [dict(region, variants=[{"name": "EU", "data": {"name": "EU"}}])]}
+        result = OptionsReconciler(api, delete_missing=True).reconcile(desired)
+
+        self.assertEqual([(s.product_id, s.action) for s in result["plan"]],
+                         [(1, "variant_edit"), (2, "option_add"), (2, "variant_add")])
+        self.assertTrue(all(error is None for _, _, error in result["results"]))
+        self.assertIn(("variant_edit", 10, 12), api.calls)
+        self.assertLess(api.calls.index(("option_add", 2, "Регион")), api.calls.index(("variant_add", 100, "EU")))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+import os
+import tempfile
+import threading
+import unittest
+
+from digiseller_api_python import DigisellerAPIAuthError, DigisellerUnavailableError, Outbox
+
+
+class FakeWriteApi:
+    """Первые два вызова chat_send_message попадают на обслуживание Digiseller."""
+
+    def __init__(self):
+        self.sent = []
+        self.prices = {}
+        self.maintenance = 2
+        self.lock = threading.Lock()
+
+    def chat_send_message(self, order_id, data):
+        with self.lock:
+            if self.maintenance:
+                self.maintenance -= 1
+                raise DigisellerUnavailableError("Digiseller UPDATING")
+            self.sent.append((order_id, data["message"]))
+        return {"retval": 0}
+
+    def product_edit_price(self, product_id, price):
+        with self.lock:
+            if self.maintenance:
+                self.maintenance -= 1
+                raise DigisellerUnavailableError("Digiseller UPDATING")
+            self.prices[product_id] = price
+        return {"retval": 0}
+
+    def product_edit_base(self, product_id, data):
+        raise DigisellerAPIAuthError("Access denied.")
+
+
+class TestOutbox(unittest.TestCase):
+    def test_retry_dedup_and_restart(self):
+        """Временные ошибки повторяются, ключ отбрасывает дубликат, очередь переживает перезапуск"""
+        api = FakeWriteApi()
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "outbox.sqlite3")
+            outbox = Outbox(api, path, backoff=0.01)
+            first = outbox.enqueue("chat_send_message", 1, {"message": "hello"}, key="order-1-hello")
+            outbox.enqueue("chat_send_message", 1, {"message": "hello"}, key="order-1-hello")
+            outbox.enqueue("chat_send_message", 2, data={"message": "bye"})
+            failing = outbox.enqueue("product_edit_base", 3, {"enabled": True})
+            self.assertEqual(outbox.pending(), 3)
+            outbox.close()
+
+            with Outbox(api, path, backoff=0.01) as outbox:
+                self.assertTrue(outbox.drain(timeout=5))
+                self.assertEqual(sorted(api.sent), [(1, "hello"), (2, "bye")])
+                self.assertEqual(outbox.status(first)["status"], "done")
+                self.assertEqual(outbox.status(first)["result"], {"retval": 0})
+                self.assertEqual([(f["key"], f["attempts"]) for f in outbox.failed()], [(failing, 1)])
+                self.assertEqual(outbox.purge(), 2)
+
+                with self.assertRaises(AttributeError):
+                    outbox.enqueue("no_such_method")
+
+    def test_drain_waits_for_backoff(self):
+        """drain() ждет вызовы, ожидающие повтора, пока не выйдет время"""
+        api = FakeWriteApi()
+        with tempfile.TemporaryDirectory() as directory, \
+                Outbox(api, os.path.join(directory, "outbox.sqlite3"), backoff=0.2) as outbox:
+            outbox.enqueue("chat_send_message", 1, {"message": "hello"})
+            self.assertFalse(outbox.drain(timeout=0.1))
+            self.assertTrue(outbox.drain(timeout=5))
+            self.assertEqual(api.sent, [(1, "hello")])
+
+    def test_retry_keeps_order_per_target(self):
+        """Вызов, ожидающий повтора, не обгоняется следующими изменениями того же объекта"""
+        api = FakeWriteApi()
+        api.maintenance = 1
+        with tempfile.TemporaryDirectory() as directory:
+            outbox = Outbox(api, os.path.join(directory, "outbox.sqlite3"), backoff=0.1)
+            outbox.enqueue("product_edit_price", 1, 100)
+            outbox.enqueue("product_edit_price", 1, 200)
+            outbox.enqueue("product_edit_price", 2, 300)
+            outbox.enqueue("chat_send_message", 1, {"message": "hello"}, order_key="order-1")
+            with outbox:
+                self.assertTrue(outbox.drain(timeout=5))
+            self.assertEqual(api.prices, {1: 200, 2: 300})
+            self.assertEqual(api.sent, [(1, "hello")])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+import time
+import unittest
+from unittest import mock
+
+from digiseller_api_python import DigisellerApi, PriceQuoteCache, ReplayServer
+from tests._stand import json_entry, login_entry
+
+
+class TestPriceQuoteCache(unittest.TestCase):
+    def test_reuse_and_invalidation(self):
+        """Расчет переиспользуется при любом порядке параметров и сбрасывается изменением цен"""
+        entries = [
+            login_entry(),
+            json_entry("GET", "/api/products/price/calc", {"retval": 0, "data": {"price": 100}}),
+            json_entry("POST", "/api/product/edit/prices", {"retval": 0}),
+            json_entry("POST", "/api/sellers/currency", {"retval": 0}),
+        ]
+        cache = PriceQuoteCache(ttl=60)
+        with ReplayServer(entries, latency=0) as server:
+            api = DigisellerApi("123", "key", base_urls=server.base_urls, price_cache=cache)
+            api.products_price_calc(1, [{"id": 1, "value": 2}, {"id": 3, "value": 4}], "rub", None, None, 1)
+            api.products_price_calc(1, [{"value": 4, "id": 3}, {"id": 1, "value": 2}], "RUB", None, None, 1)
+            self.assertEqual((cache.stats["hits"], cache.stats["misses"]), (1, 1))
+
+            api.product_edit_prices([{"product_id": 2, "price": 5}])
+            api.products_price_calc(1, [{"id": 1, "value": 2}, {"id": 3, "value": 4}], "RUB", None, None, 1)
+            self.assertEqual((cache.stats["hits"], cache.stats["misses"]), (2, 1))
+
+            api.product_edit_prices([{"product_id": 1, "price": 5}])
+            quotes = cache.warm(api, 1, [[{"id": 1, "value": 2}, {"id": 3, "value": 4}], []], "RUB")
+            self.assertEqual(quotes, [{"retval": 0, "data": {"price": 100}}] * 2)
+            self.assertEqual(cache.stats["misses"], 3)
+
+            api.change_exchange_rate("USD", 90.0, "cbr", 0.0, "fixed")
+            self.assertEqual(len(cache._entries), 0)
+
+    def test_errors_are_not_cached(self):
+        """Ответ с ошибкой не кэшируется; валюта нормализуется только в ключе, в запрос передается как есть"""
+        api = DigisellerApi("123", "key", price_cache=PriceQuoteCache(ttl=60))
+        responses = [{"retval": 1, "retdesc": "Временная ошибка"}, {"retval": 0, "data": {"price": 100}}]
+        with mock.patch.object(api, "_send_request", side_effect=responses) as send:
+            self.assertEqual(api.products_price_calc(1, [], " rub", None, None, 1)["retval"], 1)
+            self.assertEqual(api.products_price_calc(1, [], "RUB", None, None, 1)["retval"], 0)
+            self.assertEqual(api.products_price_calc(1, [], "rub", None, None, 1)["retval"], 0)
+        self.assertEqual(send.call_count, 2)
+        self.assertEqual([call.kwargs["params"]["currency"] for call in send.call_args_list], [" rub", "RUB"])
+
+    def test_not_cached_until_price_task_finishes(self):
+        """Пока задача изменения цен выполняется, расчет товара не кэшируется; завершение сбрасывает кэш"""
+        cache = PriceQuoteCache(ttl=60)
+        api = DigisellerApi("123", "key", price_cache=cache)
+        api.token, api.token_expiration = "token", int(time.time()) + 3600
+        status = {"retval": 0, "content": {"SuccessCount": 0, "ErrorCount": 0, "TotalCount": 1}}
+
+        def send(method, url, **kwargs):
+            if url.endswith("product/edit/prices"):
+                return {"retval": 0, "content": {"taskId": "task-1"}}
+            if url.endswith("UpdateProductsTaskStatus"):
+                return status
+            return {"retval": 0, "data": {"price": 100}}
+        with mock.patch.object(api, "_send_request", side_effect=send):
+            api.products_price_calc(1, [], "RUB", None, None, 1)
+            api.product_edit_prices([{"product_id": 1, "price": 5}])
+            api.products_price_calc(1, [], "RUB", None, None, 1)
+            api.products_price_calc(2, [], "RUB", None, None, 1)
+            api.product_edit_update_products_tasks_status("task-1")
+            self.assertEqual({key[0] for key in cache._entries}, {2})
+
+            status["content"]["SuccessCount"] = 1
+            api.product_edit_update_products_tasks_status("task-1")
+            api.products_price_calc(1, [], "RUB", None, None, 1)
+            self.assertEqual({key[0] for key in cache._entries}, {1, 2})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+import time
+import unittest
+from unittest import mock
+
+from digiseller_api_python import (
+    Deadline,
+    DigisellerApi,
+    DigisellerConnectionError,
+    DigisellerTimeoutError,
+    ProxyPool,
+    ReplayServer
+)
+from tests._stand import json_entry, login_entry
+
+DEAD_PROXY = "http://127.0.0.1:9"
+
+
+class TestProxyPool(unittest.TestCase):
+    def test_failover_and_ejection(self):
+        """Идемпотентный запрос повторяется через рабочий прокси, неработающий прокси исключается"""
+        entries = [login_entry(), json_entry("GET", "/api/token/perms", {"retval": 0, "content": []})]
+        with ReplayServer(entries, latency=0) as server:
+            # ReplayServer принимает запросы в абсолютной форме, поэтому сам служит HTTP-прокси
+            target = "http://api.digiseller.ru/"
+            alive = server.address
+            pool = ProxyPool([DEAD_PROXY, alive], max_failures=1, eject_time=60)
+            api = DigisellerApi("123", "key", proxy_pool=pool,
+                                base_urls={"https://api.digiseller.ru/": target + "api.digiseller.ru/"})
+            with self.assertRaises(DigisellerConnectionError):
+                api.get_token()  # apilogin не идемпотентен и не повторяется
+
+            for _ in range(3):
+                api.perms_token()
+            health = pool.health()
+            self.assertFalse(health[DEAD_PROXY]["available"])
+            self.assertEqual(health[DEAD_PROXY]["errors"], 1)
+            self.assertEqual(health[alive]["requests"], 4)
+
+            pool.check_url = target
+            pool.check()
+            self.assertFalse(pool.health()[DEAD_PROXY]["available"])
+            pool.close()
+
+    def test_connect_timeout_is_proxy_failure(self):
+        """Тайм-аут соединения исключает прокси и повторяется через другой, тайм-аут чтения - нет"""
+        pool = ProxyPool(["http://blackhole:1", "http://alive:1"], max_failures=1, eject_time=60)
+
+        def send(proxy, client):
+            if proxy == "http://blackhole:1":
+                raise DigisellerTimeoutError("connect", "connect")
+            return "ok"
+        self.assertEqual([pool.call(send) for _ in range(3)], ["ok"] * 3)
+        self.assertFalse(pool.health()["http://blackhole:1"]["available"])
+
+        def read_timeout(proxy, client):
+            raise DigisellerTimeoutError("read", "read")
+        with self.assertRaises(DigisellerTimeoutError):
+            pool.call(read_timeout)
+        self.assertEqual(pool.health()["http://alive:1"]["errors"], 0)
+        pool.close()
+
+    def test_deadline_timeout_is_not_proxy_failure(self):
+        """Тайм-аут соединения из-за исчерпанного дедлайна не исключает прокси и не повторяется"""
+        pool = ProxyPool(["http://first:1", "http://second:1"], max_failures=1, eject_time=60)
+        attempts = []
+
+        def send(proxy, client):
+            attempts.append(proxy)
+            time.sleep(0.02)
+            raise DigisellerTimeoutError("connect", "connect")
+        with Deadline(0.01), self.assertRaises(DigisellerTimeoutError):
+            pool.call(send)
+        self.assertEqual(len(attempts), 1)
+        self.assertTrue(all(state["available"] and not state["errors"] for state in pool.health().values()))
+
+        api = DigisellerApi("123", "key", proxy_pool=pool)
+        with mock.patch.object(pool, "close") as close:
+            api.close()
+        close.assert_called_once_with()
+        pool.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,96 @@
+import itertools
+import os
+import tempfile
+import threading
+import unittest
+
+from digiseller_api_python import ProductPublisher
+
+
+class FakeCatalogApi:
+    """Журнал вызовов публикации; загрузка изображений товара "bad" завершается ошибкой, пока fail_images=True."""
+
+    def __init__(self):
+        self.calls = []
+        self.ids = itertools.count(100)
+        self.fail_images = True
+        self.fail_category = None
+        self.lock = threading.Lock()
+
+    def _log(self, *call):
+        with self.lock:
+            self.calls.append(call)
+
+    def product_create_uniquefixed(self, data):
+        product_id = next(self.ids)
+        self._log("create", data["name"], product_id)
+        return {"retval": 0, "content": {"product_id": product_id}}
+
+    def product_preview_add_images(self, product_id, files):
+        self._log("images", product_id)
+        if self.fail_images and files.get("bad"):
+            return {"retval": 1, "retdesc": "invalid image"}
+        return {"retval": 0}
+
+    def product_content_add_text(self, data):
+        self._log("content_text", data["product_id"])
+        return {"retval": 0}
+
+    def product_platform_category_add(self, product_id, category_id):
+        self._log("categories", product_id, category_id)
+        if category_id == self.fail_category:
+            return {"retval": 1, "retdesc": "category unavailable"}
+        return {"retval": 0}
+
+    def product_edit_base(self, product_id, data):
+        self._log("enable", product_id)
+        return {"retval": 0}
+
+
+def spec(name, bad=False):
+    return {"key": name, "create": {"type": "uniquefixed", "data": {"name": name}},
+            "images": {"bad": bad}, "content_text": [{"content": "text"}], "categories": [1, 2], "enable": {"enabled": True}}
+
+
+class TestProductPublisher(unittest.TestCase):
+    def test_publish_and_resume(self):
+        """Шаги выполняются по графу зависимостей, повторный запуск продолжает с места ошибки"""
+        api = FakeCatalogApi()
+        with tempfile.TemporaryDirectory() as directory:
+            publisher = ProductPublisher(api, max_workers=8, journal=os.path.join(directory, "publish.jsonl"))
+            specs = [spec(f"p{n}") for n in range(20)] + [spec("bad", bad=True)]
+            report = publisher.publish(specs)
+
+            self.assertEqual(sum(entry["status"] == "published" for entry in report.values()), 20)
+            bad = report["bad"]
+            self.assertEqual((bad["status"], bad["steps"]["images"], bad["steps"]["enable"], bad["steps"]["videos"]),
+                             ("failed", "failed", "blocked", "skipped"))
+            for entry in report.values():
+                calls = [call[0] for call in api.calls if call[1] == entry["product_id"] or call[-1] == entry["product_id"]]
+                self.assertEqual(calls[0], "create")
+                self.assertEqual(calls[-1] == "enable", entry["status"] == "published")
+
+            api.calls.clear()
+            api.fail_images = False
+            report = publisher.publish(specs)
+            self.assertTrue(all(entry["status"] == "published" for entry in report.values()))
+            self.assertEqual(sorted(call[0] for call in api.calls), ["enable", "images"])
+            self.assertEqual({call[1] for call in api.calls}, {bad["product_id"]})
+
+    def test_resume_inside_multi_item_step(self):
+        """После ошибки посреди шага повторный запуск добавляет только оставшиеся элементы"""
+        api = FakeCatalogApi()
+        api.fail_category = 3
+        with tempfile.TemporaryDirectory() as directory:
+            publisher = ProductPublisher(api, journal=os.path.join(directory, "publish.jsonl"))
+            item = {**spec("p"), "images": None, "categories": [1, 2, 3, 4]}
+            self.assertEqual(publisher.publish([item])["p"]["steps"]["categories"], "failed")
+
+            api.calls.clear()
+            api.fail_category = None
+            self.assertEqual(publisher.publish([item])["p"]["status"], "published")
+            self.assertEqual([call[2] for call in api.calls if call[0] == "categories"], [3, 4])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,48 @@
+import os
+import tempfile
+import unittest
+
+from digiseller_api_python import (DigisellerApi, DigisellerUnavailableError, Recorder, ReplayServer,
+                                   load_cassette, mixed_workload, run_load)
+from tests._stand import json_entry, login_entry
+
+
+class TestReplay(unittest.TestCase):
+    def setUp(self):
+        self.entries = [
+            login_entry(),
+            json_entry("GET", "/api/purchase/info/100", {"retval": 0, "content": {"invoice_id": 100, "email": "a@b.c"}}),
+        ]
+
+    def test_replay_and_record(self):
+        """Ответы отдаются из кассеты, запись очищает секреты"""
+        path = os.path.join(tempfile.mkdtemp(), "cassette.jsonl")
+        with ReplayServer(self.entries, latency=0) as server:
+            api = DigisellerApi("123", "key", base_urls=server.base_urls, recorder=Recorder(path))
+            self.assertEqual(api.purchase_info(555)["content"]["invoice_id"], 100)
+
+        recorded = load_cassette(path)
+        self.assertEqual([e["path"] for e in recorded], ["/api/apilogin", "/api/purchase/info/555"])
+        self.assertEqual({e["host"] for e in recorded}, {"api.digiseller.ru"})
+        self.assertNotIn("replayed-token", recorded[0]["body"])
+        self.assertEqual(recorded[1]["query"]["token"], "***")
+        self.assertNotIn("a@b.c", recorded[1]["body"])
+
+    def test_fault_injection_and_load(self):
+        """Внедрение страницы обслуживания и прогон нагрузки"""
+        with ReplayServer(self.entries, latency=0, faults={"maintenance": 1.0}) as server:
+            api = DigisellerApi("123", "key", base_urls=server.base_urls)
+            with self.assertRaises(DigisellerUnavailableError):
+                api.get_token()
+
+        with ReplayServer(self.entries, latency=0.001) as server:
+            api = DigisellerApi("123", "key", base_urls=server.base_urls)
+            calls = mixed_workload({"purchase_info": (1, (1,), {})}, count=20, rate=1000, seed=1)
+            report = run_load(api, calls, concurrency=4, speed=10)
+        self.assertEqual(report.total, 20)
+        self.assertFalse(report.errors)
+        self.assertIsNotNone(report.percentile(99, "purchase_info"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,44 @@
+import os
+import tempfile
+import threading
+import unittest
+
+from digiseller_api_python import ReviewsCrawler
+
+
+class FakeReviewsApi:
+    """Отзывы товаров от новых к старым и журнал запрошенных страниц."""
+
+    def __init__(self, products):
+        self.reviews = {p: [{"id": f"{p}-{n}", "date": f"2024-01-{n:02d} 10:00:00"} for n in range(20, 0, -1)]
+                        for p in products}
+        self.pages = []
+        self.lock = threading.Lock()
+
+    def product_reviews(self, seller_id, product_id, type_, owner_id, page, rows, lang):
+        with self.lock:
+            self.pages.append((product_id, page))
+        items = self.reviews[product_id][(page - 1) * rows:page * rows]
+        return {"retval": 0, "totalItems": len(self.reviews[product_id]), "review": items}
+
+
+class TestReviewsCrawler(unittest.TestCase):
+    def test_only_new_reviews(self):
+        """Первый обход читает все страницы, следующий - только до уже увиденного отзыва"""
+        api = FakeReviewsApi(range(10))
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "reviews.json")
+            crawler = ReviewsCrawler(api, seller_id=1, path=path, rows=5, max_workers=4)
+            self.assertEqual(len(list(crawler.crawl(range(10)))), 200)
+            self.assertEqual(len(api.pages), 50)
+
+            api.pages.clear()
+            api.reviews[3][:0] = [{"id": "3-new", "date": "2024-01-21 10:00:00"}]
+            crawler = ReviewsCrawler(api, seller_id=1, path=path, rows=5, max_workers=4)
+            self.assertEqual(list(crawler.crawl(range(10))), [(3, {"id": "3-new", "date": "2024-01-21 10:00:00"})])
+            self.assertEqual(len(api.pages), 10)
+            self.assertEqual(crawler.watermark(3)["id"], "3-new")
+
+
+if __name__ == "__main__":
+    unittest.main()
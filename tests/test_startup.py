@@ -0,0 +1,53 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+from digiseller_api_python import DigisellerApi, ReplayServer
+from tests._stand import json_entry, login_entry
+
+
+class TestStartup(unittest.TestCase):
+    def test_lazy_imports(self):
+        """Импорт пакета и создание клиента не загружают httpx и вспомогательные модули"""
+        code = ("import json, sys; import digiseller_api_python as d; d.DigisellerApi('1', 'key', timeout={'read': 5}); "
+                "print(json.dumps([m in sys.modules for m in ('httpx', 'sqlite3', 'http.server', 'tracemalloc')]))")
+        output = subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, text=True).stdout
+        self.assertEqual(json.loads(output), [False, False, False, False])
+
+    def test_token_cache(self):
+        """Токен из файла используется другим экземпляром без запроса apilogin"""
+        entries = [login_entry(), json_entry("GET", "/api/purchase/info/1", {"retval": 0})]
+        with ReplayServer(entries) as server, tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "tokens.json")
+            DigisellerApi("123", "key", base_urls=server.base_urls, token_cache=path).purchase_info(1)
+            self.assertEqual(server.stats["hit"], 2)
+
+            api = DigisellerApi("123", "key", base_urls=server.base_urls, token_cache=path)
+            api.purchase_info(1)
+            self.assertEqual(api.token, "replayed-token-0123456789")
+            self.assertEqual(server.stats["hit"], 3)
+
+            # Токен другого продавца в файле не используется
+            DigisellerApi("456", "key", base_urls=server.base_urls, token_cache=path).purchase_info(1)
+            self.assertEqual(server.stats["hit"], 5)
+            with open(path, encoding="utf-8") as f:
+                self.assertEqual(set(json.load(f)), {"123", "456"})
+
+    def test_token_cache_write_failure(self):
+        """Ошибка записи кэша токена не прерывает вызов и не оставляет временных файлов"""
+        entries = [login_entry(), json_entry("GET", "/api/purchase/info/1", {"retval": 0})]
+        with ReplayServer(entries) as server, tempfile.TemporaryDirectory() as directory:
+            api = DigisellerApi("123", "key", base_urls=server.base_urls, token_cache=os.path.join(directory, "t.json"))
+            for error in (OSError("disk full"), TypeError("not serializable")):
+                with self.subTest(error=error), mock.patch("json.dump", side_effect=error):
+                    api.token = None
+                    self.assertEqual(api.purchase_info(1), {"retval": 0})
+                    self.assertEqual([name for name in os.listdir(directory) if name.endswith(".tmp")], [])
+
+
+if __name__ == "__main__":
+    unittest.main()
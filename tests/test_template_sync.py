@@ -0,0 +1,47 @@
+import threading
+import unittest
+
+from digiseller_api_python import TemplateProductsSync
+
+
+class FakeTemplatesApi:
+    """Шаблон из 25 товаров, отдаваемый страницами, и журнал обновлений."""
+
+    def __init__(self):
+        self.products = [{"product_id": i, "percent": 10, "in_affiliate": True} for i in range(25)]
+        self.updates = []
+        self.lock = threading.Lock()
+
+    def templates_products(self, template_id, product_id, price_min, price_max, currency, language, name,
+                           min_comiss, max_comiss, in_affiliate, not_in_affiliate, only_payment, page, count):
+        items = self.products[(page - 1) * count:page * count]
+        return {"retval": 0, "content": {"items": items, "total_count": len(self.products), "page": page}}
+
+    def update_template_products(self, data):
+        with self.lock:
+            self.updates.append(data)
+        return {"retval": 0}
+
+
+class TestTemplateProductsSync(unittest.TestCase):
+    def test_sync_sends_only_changes(self):
+        """Загружаются все страницы, отправляются только изменившиеся товары пакетами"""
+        api = FakeTemplatesApi()
+        sync = TemplateProductsSync(api, template_id=5, page_size=10, batch_size=2)
+        self.assertEqual(len(sync.snapshot()), 25)
+
+        desired = {i: {"percent": 10, "in_affiliate": True} for i in range(25)}
+        desired[3] = {"percent": 15, "in_affiliate": True}
+        desired[7] = {"percent": 10, "in_affiliate": False}
+        desired[100] = {"percent": 5, "in_affiliate": True}
+        result = sync.apply(desired)
+
+        self.assertEqual(result["changes"], {3: {"percent": 15}, 7: {"in_affiliate": False}, 100: desired[100]})
+        self.assertEqual(len(api.updates), 2)
+        sent = sorted(p["product_id"] for update in api.updates for p in update["products"])
+        self.assertEqual(sent, [3, 7, 100])
+        self.assertEqual(sync.apply(desired, snapshot=sync.snapshot(), dry_run=True)["responses"], [])
+
+
+if __name__ == "__main__":
+    unittest.main()
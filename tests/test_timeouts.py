@@ -0,0 +1,45 @@
+import time
+import unittest
+
+import httpx
+
+from digiseller_api_python import DigisellerApi, DigisellerDeadlineExceededError, DigisellerError, ReplayServer
+from tests._stand import json_entry, login_entry
+
+
+class TestTimeouts(unittest.TestCase):
+    def test_endpoint_overrides(self):
+        """Переопределение тайм-аутов по префиксу эндпоинта и для загрузок"""
+        api = DigisellerApi("123", "key", timeout={"connect": 2, "read": 10},
+                            endpoint_timeouts={"purchase/info": 3, "upload": 300})
+        self.assertEqual(api._timeout_for(api.URL + "purchase/info/1", {}).read, 3)
+        self.assertEqual(api._timeout_for(api.URL + "product/preview/add/images/1", {"files": {}}).read, 300)
+        default = api._timeout_for(api.URL + "chat_status", {})
+        self.assertEqual((default.connect, default.read, default.write), (2, 10, 60))
+
+    def test_invalid_timeouts_rejected_on_construction(self):
+        """Некорректный тайм-аут отклоняется при создании клиента"""
+        for timeout in ("abc", -1, True, {"read": "5"}, {"connect": -2}, {"unknown": 1}):
+            with self.subTest(timeout=timeout), self.assertRaises(DigisellerError):
+                DigisellerApi("123", "key", timeout=timeout)
+        with self.assertRaises(DigisellerError):
+            DigisellerApi("123", "key", endpoint_timeouts={"purchase/info": "fast"})
+        for timeout in (None, 0, 2.5, {"default": None, "read": 10}, httpx.Timeout(5)):
+            DigisellerApi("123", "key", timeout=timeout)
+
+    def test_deadline_cancels_remaining_work(self):
+        """Запросы после исчерпания дедлайна не отправляются"""
+        entries = [login_entry(), json_entry("GET", "/api/purchase/info/1", {"retval": 0}, elapsed=0.2)]
+        with ReplayServer(entries) as server:
+            api = DigisellerApi("123", "key", base_urls=server.base_urls)
+            started = time.monotonic()
+            with self.assertRaises(DigisellerDeadlineExceededError):
+                with api.deadline(0.5):
+                    for _ in range(10):
+                        api.purchase_info(1)
+            self.assertLess(time.monotonic() - started, 1.0)
+            self.assertLessEqual(server.stats["hit"], 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+import contextvars
+import unittest
+from contextlib import contextmanager
+
+from digiseller_api_python import DigisellerApi, ReplayServer
+from tests._stand import json_entry, login_entry
+
+_current = contextvars.ContextVar("current_span", default=None)
+
+
+class FakeSpan:
+    def __init__(self, name, parent, attributes):
+        self.name, self.parent, self.attributes = name, parent, dict(attributes or {})
+        self.ended = False
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+
+class FakeTracer:
+    """Минимальный трассировщик с интерфейсом start_as_current_span."""
+
+    def __init__(self):
+        self.spans = []
+
+    @contextmanager
+    def start_as_current_span(self, name, attributes=None):
+        span = FakeSpan(name, _current.get(), attributes)
+        self.spans.append(span)
+        token = _current.set(span)
+        try:
+            yield span
+        finally:
+            _current.reset(token)
+            span.ended = True
+
+    def names(self, parent):
+        return [span.name for span in self.spans if span.parent is parent]
+
+
+class TestTracing(unittest.TestCase):
+    def test_span_tree(self):
+        """Спан вызова включает обновление токена, HTTP-запрос с фазами и разбор ответа"""
+        entries = [login_entry(), json_entry("GET", "/api/token/perms", {"retval": 0, "content": []})]
+        tracer = FakeTracer()
+        with ReplayServer(entries, latency=0) as server:
+            api = DigisellerApi("123", "key", base_urls=server.base_urls, tracer=tracer)
+            api.perms_token()
+
+        call = tracer.spans[0]
+        self.assertEqual(call.name, "digiseller.perms_token")
+        self.assertEqual(tracer.names(call), ["digiseller.token_refresh", "digiseller.http GET"])
+        refresh, http = [span for span in tracer.spans if span.parent is call]
+        self.assertEqual(tracer.names(refresh), ["digiseller.http POST"])
+        login = [span for span in tracer.spans if span.parent is refresh][0]
+        self.assertEqual(tracer.names(login), ["digiseller.http.connect", "digiseller.http.send",
+                                               "digiseller.http.receive", "digiseller.decode"])
+        # Соединение из общего пула переиспользуется
+        self.assertEqual(tracer.names(http), ["digiseller.http.send", "digiseller.http.receive", "digiseller.decode"])
+        self.assertEqual(http.attributes["digiseller.endpoint"], "/api/token/perms")
+        self.assertEqual(http.attributes["http.response.status_code"], 200)
+
+    def test_iter_span_is_not_current_between_items(self):
+        """Спан потокового метода не становится родителем кода между элементами и закрывается при close()"""
+        sales = [{"invoice_id": i} for i in range(3)]
+        entries = [login_entry(), json_entry("GET", "/api/seller-last-sales", {"retval": 0, "sales": sales})]
+        tracer = FakeTracer()
+        with ReplayServer(entries, latency=0) as server:
+            api = DigisellerApi("123", "key", base_urls=server.base_urls, tracer=tracer)
+            items = api.iter_seller_last_sales(top=3)
+            next(items)
+            with tracer.start_as_current_span("user"):
+                pass
+            items.close()
+
+        stream, user = tracer.spans[0], [span for span in tracer.spans if span.name == "user"][0]
+        self.assertEqual(stream.name, "digiseller.iter_seller_last_sales")
+        self.assertIsNone(user.parent)
+        self.assertTrue(stream.ended)
+        self.assertIn("digiseller.http GET", tracer.names(stream))
+        self.assertIsNone(_current.get())
+
+    def test_no_tracer(self):
+        """Без трассировщика методы вызываются напрямую"""
+        api = DigisellerApi("123", "key")
+        self.assertIsNone(api.tracer)
+        self.assertEqual(DigisellerApi.perms_token.__name__, "perms_token")
+
+
+if __name__ == "__main__":
+    unittest.main()
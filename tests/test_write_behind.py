@@ -0,0 +1,95 @@
+import threading
+import time
+import unittest
+
+from digiseller_api_python import DigisellerInvalidResponseError, WriteBehindBatcher
+
+
+class BrokenTracer:
+    def start_as_current_span(self, name, attributes=None):
+        raise RuntimeError("tracer is broken")
+
+
+class FakeEditApi:
+    def __init__(self):
+        self.calls = []
+        self.tracer = None
+        self.delay = 0
+        self.rejected = set()
+        self.sending = threading.Event()
+
+    def product_edit_v2(self, new_status, products):
+        self.sending.set()
+        time.sleep(self.delay)
+        self.calls.append(("status", new_status, sorted(products)))
+        return {"retval": 0, "taskId": f"status-{len(self.calls)}"}
+
+    def product_edit_prices(self, data):
+        self.calls.append(("prices", data))
+        if any(product["product_id"] in self.rejected for product in data):
+            return {"retval": 1, "retdesc": "bad price"}
+        return {"retval": 0, "taskId": f"prices-{len(self.calls)}"}
+
+
+class TestWriteBehindBatcher(unittest.TestCase):
+    def test_coalesces_changes(self):
+        """Изменения объединяются: последнее значение на товар, статусы группируются"""
+        api = FakeEditApi()
+        with WriteBehindBatcher(api, window=10) as batcher:
+            first = batcher.set_status(1, "disabled")
+            futures = [batcher.set_status(1, "enabled"), batcher.set_status(2, "enabled"),
+                       batcher.set_status(3, "disabled"), batcher.set_price(1, price=10),
+                       batcher.set_price(1, price=12, currency="RUB")]
+            batcher.flush()
+            self.assertTrue(all(f.done() for f in futures + [first]))
+
+        self.assertEqual(sorted(c for c in api.calls if c[0] == "status"),
+                         [("status", "disabled", [3]), ("status", "enabled", [1, 2])])
+        self.assertIn(("prices", [{"product_id": 1, "price": 12, "currency": "RUB"}]), api.calls)
+        self.assertEqual(first.result(), futures[0].result())
+
+    def test_size_threshold(self):
+        """Достижение max_batch запускает отправку без ожидания окна"""
+        api = FakeEditApi()
+        batcher = WriteBehindBatcher(api, window=60, max_batch=3)
+        futures = [batcher.set_status(i, "enabled") for i in range(3)]
+        self.assertEqual(futures[0].result(timeout=5)["retval"], 0)
+        batcher.close()
+
+    def test_errors_do_not_stop_worker(self):
+        """Ошибка при подготовке пакета завершает его Future, а поток продолжает отправку"""
+        api = FakeEditApi()
+
+        def payload(products):
+            raise KeyError("currency")
+        with WriteBehindBatcher(api, window=0.01, prices_payload=payload) as batcher:
+            price = batcher.set_price(1, price=10)
+            self.assertIsInstance(price.exception(timeout=5), KeyError)
+            api.tracer = BrokenTracer()   # Сбой вне пакетного запроса
+            broken = batcher.set_status(1, "enabled")
+            self.assertIsInstance(broken.exception(timeout=5), RuntimeError)
+            api.tracer = None
+            self.assertEqual(batcher.set_status(2, "enabled").result(timeout=5)["retval"], 0)
+
+    def test_rejected_edit_is_error(self):
+        """Ответ с retval != 0 завершает Future ошибкой"""
+        api = FakeEditApi()
+        api.rejected.add(1)
+        with WriteBehindBatcher(api, window=10) as batcher:
+            price = batcher.set_price(1, price=-1)
+            batcher.flush()
+            self.assertIsInstance(price.exception(timeout=0), DigisellerInvalidResponseError)
+
+    def test_flush_waits_for_batch_in_flight(self):
+        """flush() ждет и пакет, который поток уже отправляет"""
+        api = FakeEditApi()
+        api.delay = 0.3
+        with WriteBehindBatcher(api, window=0.01) as batcher:
+            future = batcher.set_status(1, "enabled")
+            self.assertTrue(api.sending.wait(timeout=5))
+            batcher.flush()
+            self.assertTrue(future.done())
+
+
+if __name__ == "__main__":
+    unittest.main()